@@ -0,0 +1,18 @@
+import time
+
+
+def best_of(func, *args, repeat=3, **kwargs):
+    """
+    Runs func several times and keeps the fastest run, which is the least disturbed by whatever else the machine
+        is doing.
+
+    :param func: the callable being timed.
+    :param repeat: int for the number of runs.
+    :return: tuple of (float seconds, the value returned by the last run)
+    """
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best, result
@@ -0,0 +1,331 @@
+"""
+A local stand-in for the Data Brokers, to load test the collectors end to end under controlled conditions. Each site
+    gets its own HTTP server, imitating its URL scheme and answering with pages made from the sample pages in
+    tests/fixtures/pages, with the names of the person searched for put in place of the sample ones:
+
+    Spokeo  : GET  /{Given-Family}/{State}/{City}                    the search page
+    Radaris : GET  /ng/search?ff={given}&fl={family}&fs=..&fc=..     the search page
+    MyLife  : GET  /pub-multisearch.pubview?search={given}+{family}  a search page of the sample search hits
+              POST /search-api                                       the JSON search backend (an Algolia style query)
+              GET  /{given-family}/{id}                              a record page, with a profile picture
+              GET  /photos/{id}.jpg                                  the profile pictures
+
+    python -m benchmarks.broker [--latency 0.05] [--jitter 0.1] [--error-rate 0.01] [--throttle-rate 0.05]
+                                [--schema-change-rate 0.01] [--scale 1] [--seed 0]
+
+Every response first waits --latency seconds, plus an exponentially distributed extra delay averaging --jitter
+    seconds to give the latencies a tail. It is then, at random, a 500 error (--error-rate), a 429 with a Retry-After
+    (--throttle-rate), or a page with its data scripts missing as if the site changed its schema
+    (--schema-change-rate). The collectors are pointed at the servers by the "base_urls" setting, or the base_url=
+    keyword, with the base urls printed on start.
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from os import path
+from threading import Lock, Thread
+from urllib.parse import urlsplit, parse_qs, unquote_plus
+
+from benchmarks.synthetic import PAGES_DIR, RE_LD_JSON, RE_PRELOADED_STATE, sample_page, scale_page
+
+SITES = ('Spokeo', 'Radaris', 'MyLife')
+SEARCH_HITS = path.join(path.dirname(PAGES_DIR), 'mylife_search.json')
+
+# The names on the sample pages, replaced by the name searched for.
+RE_GIVEN_NAME = re.compile(rb'\b(?:John|JOHN|john)\b')
+RE_FAMILY_NAME = re.compile(rb'\b(?:Smith|SMITH|smith)\b')
+
+# Kinds of response, as counted in MockBroker.stats
+OK = 'ok'
+ERROR = 'error'
+THROTTLED = 'throttled'
+SCHEMA_CHANGE = 'schema-change'
+NOT_FOUND = 'not-found'
+
+
+def personalize(body, given_name, family_name):
+    """
+    :param body: bytes of a sample response, about John Smith.
+    :param given_name: str
+    :param family_name: str
+    :return: bytes of the response about the person searched for, keeping the case of each name.
+    """
+    def _replace(name):
+        name = name.encode('utf-8')
+
+        def _in_case(match):
+            if match.group(0).isupper():
+                return name.upper()
+            return name.lower() if match.group(0).islower() else name.title()
+        return _in_case
+
+    if given_name:
+        body = RE_GIVEN_NAME.sub(_replace(given_name), body)
+    if family_name:
+        body = RE_FAMILY_NAME.sub(_replace(family_name), body)
+    return body
+
+
+def schema_changed(page):
+    """:return: bytes of the page without its ld+json and __PRELOADED_STATE__ scripts, nor search hits."""
+    page = page.decode('utf-8')
+    page = RE_PRELOADED_STATE.sub('', RE_LD_JSON.sub('', page))
+    return page.replace('ais-InfiniteHits-item', 'ais-Hits-item').encode('utf-8')
+
+
+def search_page(hits):
+    """
+    :param hits: list() of the search backend's hits.
+    :return: bytes of a search page with the same markup as MyLife's InstantSearch widget.
+    """
+    def _values(class_, values):
+        values = ''.join(f'<span class="hit-values">{value}</span>' for value in values if value)
+        return f'<div class="{class_}">{values}</div>'
+
+    items = ''.join(
+        '<li class="ais-InfiniteHits-item">'
+        f'<a class="hit-name" href="{hit["url"]}">{hit["name"]}</a>'
+        f'<div class="hit-location">{hit["location"]}</div>'
+        f'{_values("hit-pastAddresses", hit.get("pastAddresses") or list())}'
+        f'{_values("hit-work", [hit.get("work")])}'
+        f'{_values("hit-high-school", [hit.get("highSchool")])}'
+        '</li>' for hit in hits
+    )
+    refinements = ''.join(
+        f'<div class="{facet}"><ul>' + ''.join(
+            f'<li><span class="refinementList-text">{value}</span></li>' for value in values
+        ) + '</ul></div>' for facet, values in (
+            ('STATE', sorted({hit['location'].rsplit(', ', 1)[-1] for hit in hits})),
+            ('CITY', sorted({hit['location'].rsplit(', ', 1)[0] for hit in hits})),
+        )
+    )
+    return f'<html><body>{refinements}<ul class="ais-InfiniteHits-list">{items}</ul></body></html>'.encode('utf-8')
+
+
+class _BrokerServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, broker, site, address):
+        super(_BrokerServer, self).__init__(address, _BrokerHandler)
+        self.broker = broker
+        self.site = site
+
+
+class _BrokerHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.broker.handle(self, self.server.site)
+
+    def do_POST(self):
+        self.server.broker.handle(self, self.server.site)
+
+    def log_message(self, *args):
+        pass
+
+
+class MockBroker:
+    """
+    Local HTTP servers imitating Spokeo, Radaris and MyLife, with configurable latency, errors, throttling and schema
+        changes. Use it as a context manager, or call start() and stop():
+
+        with MockBroker(latency=0.05, throttle_rate=0.1) as broker:
+            Spokeo(person, base_url=broker.base_urls['Spokeo'])
+    """
+
+    def __init__(self, sites=SITES, host='127.0.0.1', latency=0.0, jitter=0.0, error_rate=0.0, throttle_rate=0.0,
+                 retry_after=1, schema_change_rate=0.0, scale=1, seed=None):
+        """
+        :param sites: iterable of the sites to serve.
+        :param host: str of the address the servers listen on. Each site gets a free port.
+        :param latency: float, seconds every response waits before it is sent.
+        :param jitter: float, mean seconds of an exponentially distributed delay added to the latency.
+        :param error_rate: float, the share of requests answered with a 500 error.
+        :param throttle_rate: float, the share of requests answered with a 429.
+        :param retry_after: int, the Retry-After seconds of the 429s.
+        :param schema_change_rate: float, the share of pages served without their data scripts.
+        :param scale: int, times each search record is repeated on the search pages (see benchmarks.synthetic).
+        :param seed: seed for the random delays and faults.
+        """
+        self.sites = tuple(sites)
+        self.host = host
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.schema_change_rate = schema_change_rate
+        self.stats = {site: dict() for site in self.sites}
+
+        self._random = random.Random(seed)
+        self._lock = Lock()
+        self._servers = dict()
+        self._pages = {
+            'Spokeo': scale_page(sample_page('spokeo'), scale),
+            'Radaris': scale_page(sample_page('radaris'), scale),
+            'MyLife': sample_page('mylife'),
+        }
+        with open(SEARCH_HITS) as f:
+            self._search_results = json.load(f)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def start(self):
+        for site in self.sites:
+            server = _BrokerServer(self, site, (self.host, 0))
+            Thread(target=server.serve_forever, daemon=True).start()
+            self._servers[site] = server
+        return self
+
+    def stop(self):
+        for server in self._servers.values():
+            server.shutdown()
+            server.server_close()
+        self._servers = dict()
+
+    @property
+    def base_urls(self):
+        """:return: dict() of {site: base url}, ready for the "base_urls" setting."""
+        return {site: f'http://{self.host}:{server.server_port}/' for site, server in self._servers.items()}
+
+    @property
+    def search_api(self):
+        """:return: dict() for MyLife's search_api= keyword, or the "search_api" of the "mylife" settings."""
+        return {'url': f'{self.base_urls["MyLife"]}search-api'} if 'MyLife' in self._servers else dict()
+
+    def _count(self, site, kind):
+        with self._lock:
+            self.stats[site][kind] = self.stats[site].get(kind, 0) + 1
+
+    def _fault(self):
+        """:return: tuple of (float seconds to wait, the kind of response to send)"""
+        with self._lock:
+            delay = self.latency + (self._random.expovariate(1 / self.jitter) if self.jitter > 0 else 0)
+            roll = self._random.random()
+        for kind, rate in ((ERROR, self.error_rate), (THROTTLED, self.throttle_rate),
+                           (SCHEMA_CHANGE, self.schema_change_rate)):
+            if roll < rate:
+                return delay, kind
+            roll -= rate
+        return delay, OK
+
+    def handle(self, handler, site):
+        """Answers a request to one of the sites' servers."""
+        delay, kind = self._fault()
+        time.sleep(delay)
+
+        split_url = urlsplit(handler.path)
+        body = None
+        if handler.command == 'POST':
+            request = json.loads(handler.rfile.read(int(handler.headers.get('Content-Length', 0))) or b'{}')
+        else:
+            request = None
+
+        if kind == ERROR:
+            status, content_type, body = 500, 'text/plain', b'Internal Server Error'
+        elif kind == THROTTLED:
+            status, content_type, body = 429, 'text/plain', b'Too Many Requests'
+        else:
+            status, content_type = 200, 'text/html; charset=utf-8'
+            route = getattr(self, f'_{site.lower()}')
+            response = route(split_url, request)
+            if response is None:
+                kind, status, content_type, body = NOT_FOUND, 404, 'text/plain', b'Not Found'
+            else:
+                content_type, body = response
+                if kind == SCHEMA_CHANGE:
+                    body = b'{}' if content_type == 'application/json' else schema_changed(body)
+
+        self._count(site, kind)
+        handler.send_response(status)
+        handler.send_header('Content-Type', content_type)
+        handler.send_header('Content-Length', str(len(body)))
+        if status == 429:
+            handler.send_header('Retry-After', str(self.retry_after))
+        if content_type == 'image/jpeg':
+            handler.send_header('ETag', f'"{hashlib.sha256(body).hexdigest()[:16]}"')
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def _spokeo(self, split_url, request):
+        segments = [unquote_plus(s) for s in split_url.path.strip('/').split('/') if s != '']
+        if len(segments) < 2:
+            return None
+        given_name, _, family_name = segments[0].partition('-')
+        return 'text/html; charset=utf-8', personalize(self._pages['Spokeo'], given_name, family_name)
+
+    def _radaris(self, split_url, request):
+        if split_url.path.rstrip('/') != '/ng/search':
+            return None
+        query = parse_qs(split_url.query)
+        return 'text/html; charset=utf-8', personalize(
+            self._pages['Radaris'], query.get('ff', [''])[0], query.get('fl', [''])[0])
+
+    def _mylife(self, split_url, request):
+        segments = [s for s in split_url.path.strip('/').split('/') if s != '']
+
+        if split_url.path == '/search-api' and request is not None:
+            given_name, _, family_name = request.get('query', '').partition(' ')
+            page = min(max(int(request.get('page', 0)), 0), len(self._search_results) - 1)
+            return 'application/json', personalize(
+                json.dumps(self._search_results[page]).encode('utf-8'), given_name, family_name)
+
+        if split_url.path == '/pub-multisearch.pubview':
+            given_name, _, family_name = parse_qs(split_url.query).get('search', [''])[0].partition(' ')
+            hits = [hit for results in self._search_results for hit in results['hits']]
+            return 'text/html; charset=utf-8', personalize(search_page(hits), given_name, family_name)
+
+        if len(segments) == 2 and segments[0] == 'photos':
+            photo_id = segments[1].rsplit('.', 1)[0]
+            return 'image/jpeg', b'\xff\xd8\xff\xe0' + hashlib.sha256(photo_id.encode()).digest() * 64 + b'\xff\xd9'
+
+        if len(segments) == 2:
+            given_name, _, family_name = segments[0].partition('-')
+            record_id = segments[1]
+            page = self._pages['MyLife'].replace(b'john-smith/e123', f'john-smith/{record_id}'.encode('utf-8'))
+            picture = f'<img class="profile-picture-holder" src="{self.base_urls["MyLife"]}photos/{record_id}.jpg">'
+            page = page.replace(b'</body>', picture.encode('utf-8') + b'</body>', 1)
+            return 'text/html; charset=utf-8', personalize(page, given_name, family_name)
+
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='A local stand-in for the Data Brokers')
+    parser.add_argument('--sites', nargs='+', default=list(SITES), choices=SITES)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds every response waits')
+    parser.add_argument('--jitter', type=float, default=0.0, help='mean seconds of extra, exponential, delay')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of 500 errors')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='share of 429s')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds of the 429s')
+    parser.add_argument('--schema-change-rate', type=float, default=0.0, help='share of pages without their data')
+    parser.add_argument('--scale', type=int, default=1, help='times each search record is repeated')
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args(argv)
+
+    broker = MockBroker(args.sites, args.host, args.latency, args.jitter, args.error_rate, args.throttle_rate,
+                        args.retry_after, args.schema_change_rate, args.scale, args.seed)
+    with broker:
+        print('** Mock brokers running, for settings/config.json: **')
+        print(json.dumps({'base_urls': broker.base_urls}, indent=2))
+        if 'MyLife' in broker.sites:
+            print(json.dumps({'mylife': {'search_api': broker.search_api}}, indent=2))
+        try:
+            while True:
+                time.sleep(60)
+        except KeyboardInterrupt:
+            pass
+        print(json.dumps(broker.stats, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Compares pulling the JSON scripts out of the sample pages in tests/fixtures/pages with a full BeautifulSoup tree (the
+    way the collectors used to) against each collectors.extract backend.
+
+    python -m benchmarks.extract [repeat]
+"""
+import json
+import re
+import sys
+from os import path
+
+from bs4 import BeautifulSoup as bs
+
+from benchmarks import best_of
+from collectors.extract import BACKENDS, ld_json, preloaded_state
+
+PAGES_DIR = path.join(path.dirname(path.dirname(__file__)), 'tests', 'fixtures', 'pages')
+PAGES = ('spokeo', 'radaris', 'mylife')
+
+
+def full_tree(page):
+    """The ld+json payloads and __PRELOADED_STATE__ found the way Spokeo, Radaris and MyLife used to find them."""
+    soup = bs(page, 'html.parser')
+    payloads = [json.loads(tag.string, strict=False) for tag in soup.find_all(
+        lambda tag: tag.name == 'script' and tag.get('type') == 'application/ld+json')]
+
+    state, re_json = None, re.compile("<script>var __PRELOADED_STATE__ = (.*)</script>")
+    for script in soup.find_all('script'):
+        matches = re_json.findall(str(script))
+        if len(matches) == 1:
+            state = json.loads(matches[0])
+            break
+    return payloads, state
+
+
+def extract(page, backend):
+    return ld_json(page, backend=backend), preloaded_state(page, backend=backend)
+
+
+def main(repeat=5):
+    print(f'{"page":<10}{"full tree":>12}' + ''.join(f'{backend:>12}' for backend in BACKENDS))
+    for site in PAGES:
+        with open(path.join(PAGES_DIR, f'{site}.html'), 'rb') as f:
+            page = f.read()
+
+        baseline, expected = best_of(full_tree, page, repeat=repeat)
+        row = f'{site:<10}{baseline * 1000:>10.1f}ms'
+        for backend in BACKENDS:
+            seconds, result = best_of(extract, page, backend, repeat=repeat)
+            assert result == expected, f'{backend} disagrees with the full tree on {site}'
+            row += f'{seconds * 1000:>7.1f}ms {baseline / seconds:>3.0f}x'
+        print(row)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,195 @@
+"""
+Load test of the collection pipeline end to end, against the local mock brokers of benchmarks.broker. Runs a
+    synthetic batch of people through collectors.scheduler.CollectionScheduler, as collect_people_data does, and
+    reports the throughput, the tail latency of the jobs by site, and the responses the mock brokers sent.
+
+    python -m benchmarks.load [--people 50] [--sites Spokeo Radaris] [--workers 4] [--rate 20]
+                              [--latency 0.05] [--jitter 0.1] [--error-rate 0.01] [--throttle-rate 0.05]
+                              [--schema-change-rate 0.01] [--scale 1] [--seed 0] [--output load.json]
+
+A job is one collector run for one person: fetch, parse, validate and save. The scheduler's site limits, in order
+    commits, relative merging and journal all apply, so the relatives found are collected too. Unlike a real batch, a
+    failed job is counted rather than stopping the batch. The collectors are pointed at the mock brokers through the
+    "base_urls" setting. Requests to the mock brokers are paced at --rate per second by their own RateLimiter, which
+    also retries the 429s, and never go through the response cache. Results, reviews, downloads and the journal go to
+    a temporary directory. MyLife loads its record pages in a browser, so it is
+    only in --sites when a browser is installed.
+"""
+import argparse
+import io
+import json
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from os import path
+
+from benchmarks.broker import MockBroker, SITES
+from benchmarks.synthetic import people_table
+from collectors import Spokeo, Radaris, MyLife
+from collectors.abstract import main as abstract
+from collectors.cache import get_cache
+from collectors.downloads import Downloader
+from collectors.index import RecordIndex
+from collectors.journal import Journal
+from collectors.metrics import Metrics
+from collectors.review import ReviewQueue
+from collectors.scheduler import CollectionScheduler
+from collectors.session import get_session
+from collectors.store import ResultsStore
+from collectors.throttle import RateLimiter
+
+COLLECTORS = {collector.__name__: collector for collector in (Spokeo, Radaris, MyLife)}
+JOB = 'job'  # stage of the Metrics timing each job from start to finish
+
+
+def percentile(seconds, q):
+    """:return: float, the q quantile of a list() of seconds, or None if it's empty."""
+    if len(seconds) == 0:
+        return None
+    seconds = sorted(seconds)
+    return seconds[min(len(seconds) - 1, int(round(q * (len(seconds) - 1))))]
+
+
+class LoadScheduler(CollectionScheduler):
+    """CollectionScheduler that times every job and counts its outcome, and keeps going when a job fails."""
+
+    def __init__(self, people, metrics, **kwargs):
+        """
+        :param people: Pandas.DataFrame of the batch.
+        :param metrics: Metrics the jobs are timed and counted in, also given to every Collector.
+        :param kwargs: passed on to CollectionScheduler.
+        """
+        super(LoadScheduler, self).__init__(people, metrics=metrics, **kwargs)
+        # The collectors save to the scheduler's record index rather than the shared one in files/.
+        self.collector_kwargs['record_index'] = self.record_index
+        self.metrics = metrics
+        self.jobs = list()  # (site, seconds, outcome) of every job, as they finish
+
+    def _run_job(self, person, collector, people):
+        start = time.perf_counter()
+        outcome = 'ok'
+        try:
+            return super(LoadScheduler, self)._run_job(person, collector, people)
+        except Exception as e:
+            outcome = type(e).__name__
+            return dict(), False
+        finally:
+            seconds = time.perf_counter() - start
+            self.metrics.observe(collector.__name__, JOB, seconds)
+            self.metrics.count(collector.__name__, outcome)
+            self.jobs.append((collector.__name__, seconds, outcome))
+
+
+def run(broker, sites=('Spokeo', 'Radaris'), people=50, workers=4, rate=20):
+    """
+    :param broker: MockBroker, started.
+    :param sites: iterable of the collectors to run, by name.
+    :param people: int for the number of people in the batch, before any relatives are added.
+    :param workers: int for the number of jobs run at the same time. The scheduler's site limits still apply.
+    :param rate: float for the requests per second to the mock brokers. 0 sends them as fast as they go.
+    :return: dict() of the results, with the Metrics summary of the run under 'metrics'.
+    """
+    metrics = Metrics()
+    session, cache = get_session(), get_cache()
+    rate_limiter, cache_mode, base_urls = session.rate_limiter, cache.mode, dict(abstract.BASE_URLS)
+    session.rate_limiter = RateLimiter(hosts={broker.host: {'rate': rate, 'burst': max(1, int(rate))}} if rate else {})
+    cache.mode = 'off'
+    abstract.BASE_URLS.update(broker.base_urls)
+
+    try:
+        with tempfile.TemporaryDirectory() as root, redirect_stdout(io.StringIO()):
+            journal = Journal(path.join(root, 'journal.jsonl'))
+            record_index = RecordIndex(path.join(root, 'index.sqlite'))
+            scheduler = LoadScheduler(
+                people_table(people), metrics, collectors=[COLLECTORS[site] for site in sites], workers=workers,
+                journal=journal, record_index=record_index,
+                test=True,
+                interactive=False,
+                review_queue=ReviewQueue(':memory:'),
+                results_store=ResultsStore(path.join(root, 'results')),
+                downloader=Downloader(path.join(root, 'photos')),
+                search_api=broker.search_api)
+            start = time.perf_counter()
+            try:
+                collected = scheduler.run()
+            finally:
+                journal.close()
+            elapsed = time.perf_counter() - start
+    finally:
+        session.rate_limiter, cache.mode = rate_limiter, cache_mode
+        abstract.BASE_URLS.clear()
+        abstract.BASE_URLS.update(base_urls)
+
+    jobs = scheduler.jobs
+    by_site = dict()
+    for site, seconds, outcome in jobs:
+        site_jobs = by_site.setdefault(site, {'seconds': list(), 'outcomes': dict()})
+        site_jobs['seconds'].append(seconds)
+        site_jobs['outcomes'][outcome] = site_jobs['outcomes'].get(outcome, 0) + 1
+
+    return {
+        'people': people,
+        'relatives': len(collected.index) - people,
+        'workers': workers,
+        'jobs': len(jobs),
+        'elapsed': round(elapsed, 3),
+        'jobs_per_second': round(len(jobs) / elapsed, 3),
+        'sites': {
+            site: {
+                'jobs': len(site_jobs['seconds']),
+                'outcomes': site_jobs['outcomes'],
+                'p50': percentile(site_jobs['seconds'], 0.5),
+                'p95': percentile(site_jobs['seconds'], 0.95),
+                'p99': percentile(site_jobs['seconds'], 0.99),
+                'max': max(site_jobs['seconds']),
+            } for site, site_jobs in by_site.items()
+        },
+        'responses': broker.stats,
+        'metrics': metrics.summary(),
+    }
+
+
+def print_results(results):
+    print(f'** {results["jobs"]} jobs for {results["people"]} people and {results["relatives"]} relatives on '
+          f'{results["workers"]} workers in '
+          f'{results["elapsed"]:.2f}s: {results["jobs_per_second"]:.2f} jobs/s **')
+    print(f'{"site":<10} {"jobs":>6} {"p50":>9} {"p95":>9} {"p99":>9} {"max":>9}  outcomes')
+    for site, result in results['sites'].items():
+        print('{site:<10} {jobs:>6} {p50:>8.3f}s {p95:>8.3f}s {p99:>8.3f}s {max:>8.3f}s  {outcomes}'.format(
+            site=site, **result))
+    print(f'responses: {json.dumps(results["responses"])}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load test of the collectors against local mock brokers')
+    parser.add_argument('--people', type=int, default=50)
+    parser.add_argument('--sites', nargs='+', default=['Spokeo', 'Radaris'], choices=SITES)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--rate', type=float, default=20,
+                        help='requests per second to the mock brokers, 0 for no limit')
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds every response waits')
+    parser.add_argument('--jitter', type=float, default=0.05, help='mean seconds of extra, exponential, delay')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of 500 errors')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='share of 429s')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds of the 429s')
+    parser.add_argument('--schema-change-rate', type=float, default=0.0, help='share of pages without their data')
+    parser.add_argument('--scale', type=int, default=1, help='times each search record is repeated')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='JSON file to save the results, with the stage metrics, in')
+    args = parser.parse_args(argv)
+
+    with MockBroker(args.sites, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                    throttle_rate=args.throttle_rate, retry_after=args.retry_after,
+                    schema_change_rate=args.schema_change_rate, scale=args.scale, seed=args.seed) as broker:
+        results = run(broker, args.sites, args.people, args.workers, args.rate)
+
+    print_results(results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
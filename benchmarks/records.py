@@ -0,0 +1,63 @@
+"""
+Compares the per-record work of validate_data and check_relatives over Pandas rows (iterrows(), the way the collectors
+    used to) against collectors.records.SiteRecord: the memory each record takes while it is being worked on, and the
+    time to go through every record's name, first address and relatives.
+
+    python -m benchmarks.records [rows]
+"""
+import sys
+
+from benchmarks import best_of
+from benchmarks.suite import peak_memory
+from benchmarks.synthetic import search_results
+from collectors.records import SiteRecord
+
+
+def walk_rows(site_records):
+    """The fields of each record, read from the Series iterrows() builds for it."""
+    fields = list()
+    for _, site_record in site_records.iterrows():
+        address = site_record.get('address', dict())
+        if type(address) is list:
+            address = address[0] if len(address) > 0 else dict()
+        related_to = site_record.get('relatedTo', list())
+        fields.append((
+            site_record['name'].lower(),
+            address.get('addressLocality', '').lower(),
+            [relative['name'] for relative in related_to] if type(related_to) is list else list(),
+        ))
+    return fields
+
+
+def walk_records(site_records):
+    """The same fields, read from SiteRecords."""
+    return [(
+        site_record.name.lower(),
+        site_record.first_address.addressLocality.lower(),
+        [relative['name'] for relative in site_record.related_to],
+    ) for site_record in site_records]
+
+
+def _rows(site_records):
+    return [site_record for _, site_record in site_records.iterrows()]
+
+
+def main(rows=10_000):
+    frame = search_results(rows)
+    records = SiteRecord.from_frame(frame)
+
+    row_time, row_fields = best_of(walk_rows, frame)
+    record_time, record_fields = best_of(walk_records, records)
+    assert row_fields == record_fields, 'Records differ'
+
+    row_bytes = peak_memory(_rows, frame)
+    record_bytes = peak_memory(SiteRecord.from_frame, frame)
+
+    print(f'{rows:,} records')
+    print(f'\tper record (iterrows)  : {row_time:8.3f}s {row_bytes / rows:8.0f} bytes/record')
+    print(f'\tper record (SiteRecord): {record_time:8.3f}s {record_bytes / rows:8.0f} bytes/record')
+    print(f'\tspeedup                : {row_time / record_time:8.1f}x')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
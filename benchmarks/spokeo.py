@@ -0,0 +1,107 @@
+"""
+Compares the normalization of Spokeo's hidden search results before and after it was batched over all records.
+
+    python -m benchmarks.spokeo [records]
+"""
+import random
+import sys
+
+import pandas as pd
+from pandas import json_normalize
+
+from benchmarks import best_of
+from collectors.spokeo import Spokeo
+
+CITIES = [
+    ('Los Angeles', 'CA', '90001'), ('Pasadena', 'CA', '91101'), ('Culver City', 'CA', '90230'),
+    ('Boston', 'MA', '02108'), ('Austin', 'TX', '73301'),
+]
+
+
+def synthetic_people(records, seed=0):
+    """
+    :param records: int for the number of people to make.
+    :param seed: seed for the random choices.
+    :return: list() of dict() shaped like the 'people' of Spokeo's __PRELOADED_STATE__
+    """
+    rng = random.Random(seed)
+    people = list()
+    for i in range(records):
+        cities = rng.sample(CITIES, rng.randint(1, len(CITIES)))
+        people.append({
+            'id': str(i),
+            'full_name': 'John Smith',
+            'main_name': {'first_name': 'John', 'middle_name': rng.choice(['', 'Allen']), 'last_name': 'Smith'},
+            'addl_full_names': list(),
+            'age': rng.randint(20, 90),
+            'top_city_states': [
+                {'city': city, 'state': state, 'postal_code': postal_code, 'latitude': 34.0, 'longitude': -118.2}
+                for city, state, postal_code in cities],
+            'top_city_states_best_match_index': rng.choice([None] + list(range(len(cities)))),
+            'family_members': rng.sample(['Jane Smith', 'Jim Smith', 'Joan Smith'], rng.randint(0, 3)),
+            'has_address': True,
+            'has_phone': True,
+            'has_email': False,
+            'directory_page_id': i,
+        })
+    return people
+
+
+def legacy_normalize_people(people):
+    """Spokeo._normalize_people as it was before the batched version, one record at a time."""
+    search_results = pd.DataFrame(people)
+    search_results.rename(inplace=True, columns={'id': '@id'})
+    name_fields = json_normalize(search_results.pop('main_name'))
+    search_results['givenName'] = name_fields['first_name']
+    search_results['middleName'] = name_fields['middle_name']
+    search_results['familyName'] = name_fields['last_name']
+    search_results.rename(inplace=True, columns={'top_city_states': 'geo', 'family_members': 'relatedTo'})
+    search_results['address'] = None
+
+    for record_id, site_record in search_results.iterrows():
+        geos = json_normalize(site_record['geo'])
+
+        address = pd.DataFrame()
+        address['addressLocality'] = geos.pop('city')
+        address['addressRegion'] = geos.pop('state')
+        address['postalCode'] = geos.pop('postal_code')
+
+        geos['@type'] = 'GeoCoordinates'
+        geos = geos.to_dict('records')
+
+        top_city_match = site_record['top_city_states_best_match_index']
+        if pd.isna(top_city_match):
+            top_city_match = 0
+        top_city_match = int(top_city_match)
+        geos.insert(0, geos.pop(top_city_match))
+        search_results.at[record_id, 'geo'] = geos
+
+        address['@type'] = 'PostalAddress'
+        address = address.to_dict('records')
+        address.insert(0, address.pop(top_city_match))
+        search_results.at[record_id, 'address'] = address
+
+        related_to = [{'name': relation} for relation in site_record.get('relatedTo', [])]
+        search_results.at[record_id, 'relatedTo'] = related_to
+
+    search_results.drop(inplace=True, columns=[
+        'has_address', 'has_phone', 'has_email', 'directory_page_id', 'top_city_states_best_match_index',
+        'addl_full_names', 'full_name'])
+    return search_results
+
+
+def main(records=500):
+    people = synthetic_people(records)
+    legacy_seconds, legacy = best_of(legacy_normalize_people, people)
+    batched_seconds, batched = best_of(Spokeo._normalize_people, people)
+
+    assert list(legacy.columns) == list(batched.columns)
+    assert legacy.to_dict('records') == batched.to_dict('records')
+
+    print(f'{records} records')
+    print(f'\tper record: {legacy_seconds * 1000:.1f}ms')
+    print(f'\tbatched:    {batched_seconds * 1000:.1f}ms ({legacy_seconds / batched_seconds:.0f}x)')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,92 @@
+"""
+Times importing the packages in a fresh interpreter, and lists the heavy dependencies each import pulls in.
+
+    python -m benchmarks.startup [--repeat 5] [--budget 0.05] [modules ...]
+
+Importing definitions or collectors should take tens of milliseconds and pull in none of the heavy dependencies: the
+    site collectors, and pandas, bs4 or selenium with them, are only imported when they are used (see
+    collectors.REGISTRY). A light module over --budget seconds, or pulling in a heavy dependency, makes the benchmark
+    exit with status 1.
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+from definitions import ROOT_DIR
+
+# Modules that must import quickly, without any HEAVY dependency.
+LIGHT = ('definitions', 'collectors', 'collectors.metrics', 'collectors.throttle', 'collectors.proxies',
+         'collectors.records')
+# Modules shown for comparison, ex: what a worker running Spokeo pays.
+OTHERS = ('collectors.spokeo', 'collectors.mylife', 'removers.main')
+HEAVY = ('pandas', 'numpy', 'pyarrow', 'bs4', 'selenium', 'requests', 'pyautogui')
+BUDGET = 0.05  # seconds
+
+_IMPORT = '''
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps([seconds, [m for m in {heavy!r} if m in sys.modules]]))
+'''
+
+
+def time_import(module, python=sys.executable):
+    """
+    Imports a module in a fresh interpreter.
+
+    :param module: str, ex: 'collectors'
+    :param python: str of the interpreter to run.
+    :return: tuple of (float seconds the import took, list() of the HEAVY modules it imported)
+    """
+    output = subprocess.run(
+        [python, '-c', _IMPORT.format(module=module, heavy=HEAVY)],
+        cwd=ROOT_DIR, capture_output=True, text=True, check=True).stdout
+    seconds, heavy = json.loads(output.strip().splitlines()[-1])
+    return seconds, heavy
+
+
+def run(modules, repeat=5):
+    """
+    :param modules: iterable of str
+    :param repeat: int for the number of fresh interpreters each module is timed in. The fastest is kept.
+    :return: list() of dict() with the module, its best seconds and the heavy modules it imported.
+    """
+    results = list()
+    for module in modules:
+        timings = [time_import(module) for _ in range(repeat)]
+        results.append({
+            'module': module,
+            'seconds': min(seconds for seconds, _ in timings),
+            'heavy': timings[0][1],
+        })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Times importing the packages in a fresh interpreter')
+    parser.add_argument('modules', nargs='*', default=[*LIGHT, *OTHERS])
+    parser.add_argument('--repeat', type=int, default=5, help='fresh interpreters per module, the best is kept')
+    parser.add_argument('--budget', type=float, default=BUDGET, help='seconds a light module may take to import')
+    args = parser.parse_args(argv)
+
+    over_budget = 0
+    for result in run(args.modules, args.repeat):
+        light = result['module'] in LIGHT
+        over = light and (result['seconds'] > args.budget or len(result['heavy']) > 0)
+        over_budget += over
+        print('{module:<24} {ms:>8.1f} ms  {heavy}{flag}'.format(
+            module=result['module'],
+            ms=result['seconds'] * 1000,
+            heavy=', '.join(result['heavy']) or '-',
+            flag='  OVER BUDGET' if over else ''))
+
+    if over_budget > 0:
+        print(f'** {over_budget} module{"s" if over_budget != 1 else ""} over budget **')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
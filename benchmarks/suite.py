@@ -0,0 +1,212 @@
+"""
+Offline benchmarks of the collectors, over the synthetic sample pages in tests/fixtures/pages (see
+    benchmarks.synthetic) and synthetic data at 10x, 100x and 1000x the size of a realistic run. The sample pages
+    are stand-ins, not captures of the live sites. Reports the best time and the peak memory of each benchmark.
+
+    python -m benchmarks.suite [--scales 1 10 100] [--only parse normalize] [--save results.json]
+                               [--compare results.json]
+
+With --compare, a benchmark that got slower or bigger than --threshold times the saved results is flagged, and the
+    suite exits with status 1.
+"""
+import argparse
+import io
+import json
+import sys
+import tempfile
+import tracemalloc
+from contextlib import redirect_stdout
+from os import path
+
+from benchmarks import best_of
+from benchmarks.spokeo import synthetic_people
+from benchmarks.synthetic import RECORDS, PEOPLE, SCALES, sample_page, scale_page, people_table, search_results
+from collectors import Spokeo, Radaris, MyLife
+from collectors.abstract import AbstractCollector
+from collectors.index import RecordIndex
+from collectors.people import PeopleRegistry
+from collectors.records import SiteRecord
+from collectors.review import ReviewQueue
+from collectors.store import ResultsStore
+from tests import TEST_PERSON
+
+THRESHOLD = 1.25  # a benchmark this many times slower or bigger than the saved results is a regression
+# Each MyLife profile is its own page, parsed one at a time, so its time only grows linearly with the number of
+#   pages. Past this many pages it is left out rather than spend minutes showing the same per page cost.
+MYLIFE_MAX_PAGES = 200
+
+
+def peak_memory(func, *args, **kwargs):
+    """
+    :return: int, the most bytes allocated at once while func ran.
+    """
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        func(*args, **kwargs)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _collector(cls, person=None, **kwargs):
+    collector = cls((TEST_PERSON if person is None else person).copy(), test=True, **kwargs)
+    collector.interactive = False
+    collector.review_queue = ReviewQueue(':memory:')
+    return collector
+
+
+def parse_spokeo(page):
+    collector = _collector(Spokeo)
+    collector.content = page
+    collector.get_data()
+    return collector.data_from_website
+
+
+def parse_radaris(page):
+    collector = _collector(Radaris)
+    collector.content = page
+    collector.get_data()
+    return collector.data_from_website
+
+
+def parse_mylife(pages):
+    collector = _collector(MyLife)
+    return [collector._parse_deep_page(page) for page in pages]
+
+
+def classify(records):
+    person = TEST_PERSON.copy()
+    person['middleName'] = 'Trevor'
+    return _collector(AbstractCollector, person, base_url='')._classify_records(records)
+
+
+def check_relatives(records, people):
+    person = TEST_PERSON.copy()
+    person['checkRelatives'] = True
+    collector = _collector(AbstractCollector, person, base_url='')
+    collector.site_records = records
+    with redirect_stdout(io.StringIO()):
+        return collector.check_relatives(people)
+
+
+def save(records):
+    with tempfile.TemporaryDirectory() as root:
+        collector = _collector(Spokeo)
+        collector.data_from_website = records
+        collector.results_store = ResultsStore(path.join(root, 'results'))
+        collector.record_index = RecordIndex(path.join(root, 'index.sqlite'))
+        with redirect_stdout(io.StringIO()):
+            return collector.save_results()
+
+
+def benchmarks(scale):
+    """
+    The benchmarks at a scale, with their data made ahead of time so it isn't part of the measurement.
+
+    :param scale: int, 1 for the sample pages and a realistic run.
+    :return: list() of (benchmark name, rows, callable)
+    """
+    records, people = RECORDS * scale, PEOPLE * scale
+    spokeo_page = scale_page(sample_page('spokeo'), scale)
+    radaris_page = scale_page(sample_page('radaris'), scale)
+    mylife_pages = [sample_page('mylife')] * min(records, MYLIFE_MAX_PAGES)
+    normalized = Spokeo._normalize_people(synthetic_people(records)).set_index('@id')
+    site_records = SiteRecord.from_frame(search_results(records))
+    people_registry = PeopleRegistry.from_frame(people_table(people))
+
+    return [
+        ('parse spokeo', records, lambda: parse_spokeo(spokeo_page)),
+        ('parse radaris', records, lambda: parse_radaris(radaris_page)),
+        *([('parse mylife profiles', records, lambda: parse_mylife(mylife_pages))]
+          if records <= MYLIFE_MAX_PAGES else list()),
+        ('normalize spokeo', records, lambda: Spokeo._normalize_people(synthetic_people(records))),
+        ('validate classify', records, lambda: classify(site_records)),
+        ('check_relatives dedupe', records, lambda: check_relatives(site_records, people_registry)),
+        ('save', records, lambda: save(normalized)),
+    ]
+
+
+def run(scales=(1, *SCALES), only=None, repeat=3):
+    """
+    :param scales: list() of int
+    :param only: list() of str, run only the benchmarks whose name starts with one of these.
+    :param repeat: int for the number of timed runs of each benchmark. Runs at 1000x are timed once.
+    :return: list() of dict() with the name, scale, rows, seconds and peak bytes of each benchmark.
+    """
+    results = list()
+    for scale in scales:
+        for name, rows, func in benchmarks(scale):
+            if only is not None and not any(name.startswith(prefix) for prefix in only):
+                continue
+            seconds, _ = best_of(func, repeat=1 if scale >= 1000 else repeat)
+            results.append({
+                'name': name,
+                'scale': scale,
+                'rows': rows,
+                'seconds': seconds,
+                'peak_bytes': peak_memory(func),
+            })
+            print_result(results[-1])
+    return results
+
+
+def print_result(result, baseline=None, threshold=THRESHOLD):
+    """
+    Prints one line for a benchmark, compared to its baseline if there is one.
+
+    :return: Boolean, True if the benchmark regressed against the baseline.
+    """
+    line = '{name:<24} {scale:>5}x {rows:>8,} rows {seconds:>10.4f}s {peak:>10.1f} MiB'.format(
+        peak=result['peak_bytes'] / 2 ** 20, **result)
+    if baseline is None:
+        print(line)
+        return False
+
+    time_ratio = result['seconds'] / max(baseline['seconds'], 1e-9)
+    memory_ratio = result['peak_bytes'] / max(baseline['peak_bytes'], 1)
+    regressed = time_ratio > threshold or memory_ratio > threshold
+    print(f'{line}   time {time_ratio:5.2f}x  memory {memory_ratio:5.2f}x{"  REGRESSION" if regressed else ""}')
+    return regressed
+
+
+def compare(results, baseline_results, threshold=THRESHOLD):
+    """
+    :return: int for the number of benchmarks that regressed against the baseline results.
+    """
+    baselines = {(b['name'], b['scale']): b for b in baseline_results}
+    print(f'\n** Compared to the saved results (regression above {threshold}x) **')
+    return sum(
+        print_result(result, baselines[(result['name'], result['scale'])], threshold)
+        for result in results if (result['name'], result['scale']) in baselines
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Offline benchmarks of the collectors')
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, *SCALES],
+                        help='multiples of a realistic run, 1 for the sample pages')
+    parser.add_argument('--only', nargs='+', help='run only the benchmarks starting with these names')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs of each benchmark, the best is kept')
+    parser.add_argument('--save', help='JSON file to save the results in')
+    parser.add_argument('--compare', help='JSON file of earlier results to compare with')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD)
+    args = parser.parse_args(argv)
+
+    results = run(args.scales, args.only, args.repeat)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions > 0:
+            print(f'** {regressions} regression{"s" if regressions != 1 else ""} **')
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""
+Synthetic data for the benchmarks, sized as a multiple of a realistic run: the sample pages in tests/fixtures/pages
+    hold one search of RECORDS records each, and a batch collects PEOPLE people.
+
+The sample pages are hand made stand-ins with the structure of each site's pages (its ld+json and
+    __PRELOADED_STATE__ scripts), not captures of the live sites, so timings over them show how the parsing scales
+    rather than how long a real broker page takes.
+"""
+import json
+import random
+import re
+from os import path
+
+import pandas as pd
+
+from benchmarks.validate import synthetic_records, GIVEN_NAMES, MIDDLE_NAMES, FAMILY_NAMES, CITIES, REGIONS
+
+PAGES_DIR = path.join(path.dirname(path.dirname(__file__)), 'tests', 'fixtures', 'pages')
+
+RECORDS = 20  # records on a search page
+PEOPLE = 10  # people in a batch
+SCALES = (10, 100, 1000)
+
+RE_LD_JSON = re.compile(r'(<script type="application/ld\+json">)(.*?)(</script>)', re.DOTALL)
+RE_PRELOADED_STATE = re.compile(r'(<script>var __PRELOADED_STATE__ = )(.*?)(;?\s*</script>)', re.DOTALL)
+
+
+def relative_name(k):
+    """:return: str, the k-th of an endless list of distinct relative names."""
+    return f'{GIVEN_NAMES[k % 6]} {FAMILY_NAMES[k % 4]}{k}'
+
+
+def sample_page(site):
+    """:return: bytes of the sample page of a site, ex: 'spokeo'"""
+    with open(path.join(PAGES_DIR, f'{site}.html'), 'rb') as f:
+        return f.read()
+
+
+def _copy(record, copy):
+    """:return: dict() of a copy of a record, with 'x{copy}' added to its ids and urls so every copy is distinct."""
+    if copy == 0:
+        return record
+    return {
+        **record,
+        **{key: f'{record[key]}x{copy}' for key in ('@id', 'id', 'url') if type(record.get(key)) is str},
+    }
+
+
+def _repeat(records, scale):
+    return [_copy(record, copy) for copy in range(scale) for record in records]
+
+
+def scale_page(page, scale):
+    """
+    Makes a page like a sample one, with every search record in its ld+json and __PRELOADED_STATE__ scripts
+        repeated `scale` times.
+
+    :param page: bytes of a sample page.
+    :param scale: int
+    :return: bytes
+    """
+    def _ld_json(match):
+        data = json.loads(match.group(2), strict=False)
+        if type(data) is list:
+            data = _repeat(data, scale)
+        return match.group(1) + json.dumps(data) + match.group(3)
+
+    def _preloaded_state(match):
+        state = json.loads(match.group(2), strict=False)
+        people = state.get('data', dict()).get('people')
+        if type(people) is list:
+            state['data']['people'] = _repeat(people, scale)
+            state['data']['total'] = len(state['data']['people'])
+        return match.group(1) + json.dumps(state) + match.group(3)
+
+    page = page.decode('utf-8')
+    page = RE_LD_JSON.sub(_ld_json, page)
+    page = RE_PRELOADED_STATE.sub(_preloaded_state, page)
+    return page.encode('utf-8')
+
+
+def people_table(rows, seed=0):
+    """
+    The people are the even relative_name()s, so about half the relatives in search_results() are already known.
+
+    :param rows: int for the number of people.
+    :param seed: seed for the random choices.
+    :return: Pandas.DataFrame shaped like files/names.csv
+    """
+    rng = random.Random(seed)
+    people = list()
+    for i in range(rows):
+        given_name, family_name = relative_name(2 * i).split()
+        people.append({
+            'givenName': given_name,
+            'middleName': rng.choice(MIDDLE_NAMES),
+            'familyName': family_name,
+            'addressLocality': rng.choice(CITIES),
+            'addressRegion': rng.choice([r for r in REGIONS if r != '']),
+            'checkRelatives': rng.random() < 0.5,
+        })
+    return pd.DataFrame(people)
+
+
+def search_results(rows, seed=0):
+    """
+    :param rows: int for the number of site records.
+    :param seed: seed for the random choices.
+    :return: Pandas.DataFrame shaped like AbstractCollector.data_from_website, with 'relatedTo' lists of up to 3 of
+        the first `rows` relative_name()s.
+    """
+    rng = random.Random(seed)
+    records = synthetic_records(rows, seed)
+    records['relatedTo'] = [
+        [{'@type': 'Person', 'name': relative_name(rng.randrange(rows))} for _ in range(rng.randint(0, 3))]
+        for _ in range(rows)
+    ]
+    return records
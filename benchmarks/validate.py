@@ -0,0 +1,125 @@
+"""
+Compares the record classification of AbstractCollector.validate_data before and after the name variant index.
+
+    python -m benchmarks.validate [rows]
+"""
+import random
+import sys
+
+import pandas as pd
+
+from benchmarks import best_of
+from collectors.abstract import AbstractCollector
+from collectors.abstract.main import STATES, MISMATCH_NAME, MISMATCH_LOCALITY, MATCH_AKA, MATCH_PERSON
+from tests import TEST_PERSON
+
+GIVEN_NAMES = ['John', 'Jon', 'Johnny', 'Jonathan', 'James', 'Jane', 'J', 'Jo', 'Smith']
+MIDDLE_NAMES = ['', 'Trevor', 'G', 'Gordon', 'Allen', 'Lee']
+FAMILY_NAMES = ['Smith', 'Smyth', 'Smithers', 'Trevor-Smith', 'John', 'Schmidt']
+CITIES = ['Los Angeles', 'Manhattan Beach', 'Culver City', 'Oceanside', 'Boston', 'Austin']
+REGIONS = ['CA', 'California', 'MA', 'TX', '']
+
+
+def synthetic_records(rows, seed=0):
+    """
+    :param rows: int for the number of site records to make.
+    :param seed: seed for the random name and address choices.
+    :return: Pandas.DataFrame shaped like AbstractCollector.data_from_website
+    """
+    rng = random.Random(seed)
+    records = list()
+    for i in range(rows):
+        name = ' '.join(n for n in [
+            rng.choice(GIVEN_NAMES), rng.choice(MIDDLE_NAMES), rng.choice(FAMILY_NAMES)] if len(n) > 0)
+        records.append({
+            '@id': str(i),
+            'name': name,
+            'address': [{
+                '@type': 'PostalAddress',
+                'addressLocality': rng.choice(CITIES),
+                'addressRegion': rng.choice(REGIONS),
+            } for _ in range(rng.randint(1, 4))],
+        })
+    return pd.DataFrame(records).set_index('@id')
+
+
+def legacy_site_record_matches_person(person, site_record):
+    """AbstractCollector._site_record_matches_person as it was before the name variant index."""
+    def _name_perms(_first: str = '', _middle: str = '', _last: str = ''):
+        _names = [
+            f'{_first} {_last}',
+            f'{_last} {_first}',
+            f'{_first} {_middle}',
+            f'{_middle} {_last}',
+            f'{_first} {_middle} {_last}',
+            f'{_first} {_middle}-{_last}',
+            f'{_first}{_middle} {_last}',
+            f'{_first} {_middle}{_last}',
+        ]
+        for i in range(len(_first)):
+            _names.append(f'{_first[:i]} {_last}')
+            _names.append(f'{_last} {_first[:i]}')
+        for i in range(len(_last)):
+            _names.append(f'{_first} {_last[:i]}')
+            _names.append(f'{_last[:i]} {_first}')
+        for i in range(len(_middle)):
+            _names.append(f'{_first} {_middle[:i]}')
+            _names.append(f'{_middle[:i]} {_first}')
+            _names.append(f'{_first} {_middle[:i]} {_last}',)
+        return _names
+
+    site_address = site_record.get('address', dict())
+    if type(site_address) is list:
+        site_address = site_address[0]
+    site_region = site_address.get('addressRegion', '').lower()
+    person_region = person.get('addressRegion', '').lower()
+    same_region = any([
+        site_region == person_region,
+        site_region == STATES.get(person_region.upper(), '').lower(),
+        STATES.get(site_region.upper(), '').lower() == person_region,
+    ])
+    site_locality = site_address.get('addressLocality', '').lower()
+    same_locality = site_locality == person.get('addressLocality', '').lower()
+    person_aka = _name_perms(
+        _first=person['givenName'].lower(), _middle=person['middleName'].lower(), _last=person['familyName'].lower())
+    site_record_name = site_record['name'].lower()
+    _site_record_name = site_record_name.split(' ')
+    site_aka = _name_perms(
+        _first=_site_record_name[0], _middle=''.join(_site_record_name[1:-1]), _last=_site_record_name[-1])
+    if site_record_name not in person_aka:
+        if not any([aka in person_aka for aka in site_aka]):
+            return MISMATCH_NAME
+        return MATCH_AKA
+    if not (same_locality and same_region):
+        return MISMATCH_LOCALITY
+    return MATCH_PERSON
+
+
+def legacy_classify(person, site_records):
+    return pd.Series(
+        [legacy_site_record_matches_person(person, site_record) for _, site_record in site_records.iterrows()],
+        index=site_records.index
+    )
+
+
+def main(rows=10_000):
+    person = TEST_PERSON.copy(deep=True)
+    person['middleName'] = 'Trevor'
+    site_records = synthetic_records(rows)
+
+    legacy_time, legacy_checks = best_of(legacy_classify, person, site_records, repeat=1)
+
+    def _classify():
+        # A new collector each run, so the person's name variants are rebuilt every time, as they would be in a run.
+        return AbstractCollector(person, '', test=True)._classify_records(site_records)['check']
+    indexed_time, indexed_checks = best_of(_classify)
+
+    assert legacy_checks.equals(indexed_checks), 'Classifications differ'
+    print(f'{rows:,} records')
+    print(f'\tper record (iterrows + lists): {legacy_time:8.3f}s')
+    print(f'\tbatched (index + set lookups): {indexed_time:8.3f}s')
+    print(f'\tspeedup                      : {legacy_time / indexed_time:8.1f}x')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
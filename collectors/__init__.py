@@ -1,10 +1,55 @@
-from collectors.abstract import SeleniumCollector, RequestCollector
-from collectors.spokeo import Spokeo
-from collectors.mylife import MyLife
-from collectors.radaris import Radaris
-
-COLLECTORS = (
-    Spokeo,
-    MyLife,
-    Radaris,
-)
+"""
+The Data Broker collectors. Each site's module (and the pandas, bs4 and selenium it needs) is only imported the first
+    time its collector is used, so importing collectors, or any of its infrastructure modules, stays cheap:
+
+    from collectors import Spokeo          # imports collectors.spokeo
+    get_collectors()                       # imports every site, in the order they run
+"""
+from importlib import import_module
+
+# {collector name: module defining it}, in the order the collectors run.
+REGISTRY = {
+    'Spokeo': 'collectors.spokeo',
+    'MyLife': 'collectors.mylife',
+    'Radaris': 'collectors.radaris',
+}
+
+# The base classes the site collectors are built on.
+BASES = {
+    'AbstractCollector': 'collectors.abstract',
+    'RequestCollector': 'collectors.abstract',
+    'SeleniumCollector': 'collectors.abstract',
+}
+
+
+def get_collector(name):
+    """
+    :param name: str, ex: 'Spokeo'
+    :return: the Collector class, importing its module on first use.
+    """
+    try:
+        module = REGISTRY[name]
+    except KeyError:
+        raise KeyError(f'No collector named {name!r}, expected one of {list(REGISTRY)}') from None
+    return getattr(import_module(module), name)
+
+
+def get_collectors(names=None):
+    """
+    :param names: iterable of collector names. Defaults to every collector in REGISTRY.
+    :return: tuple of the Collector classes, in the order given.
+    """
+    return tuple(get_collector(name) for name in (REGISTRY if names is None else names))
+
+
+def __getattr__(name):
+    if name in REGISTRY:
+        value = get_collector(name)
+    elif name in BASES:
+        value = getattr(import_module(BASES[name]), name)
+    elif name == 'COLLECTORS':
+        value = get_collectors()
+    else:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    globals()[name] = value
+    return value
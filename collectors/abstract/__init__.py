@@ -1 +1 @@
-from .main import RequestCollector, SeleniumCollector, AbstractCollector
+from .main import RequestCollector, SeleniumCollector, AbstractCollector, site_base_url, results_key
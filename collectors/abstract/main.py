@@ -1,19 +1,27 @@
-from os import path, makedirs
+from os import path
 import logging
-import json
-from datetime import datetime
+from contextlib import nullcontext
+from copy import deepcopy
+from functools import lru_cache
+from threading import RLock
 
-
-import requests
+import numpy as np
 import pandas as pd
-from selenium.webdriver import Chrome as Driver
-# from selenium.webdriver import Firefox as Driver
 from requests.exceptions import HTTPError
 from bs4 import BeautifulSoup as bs
 
+from collectors.cache import cached_get
+from collectors.downloads import get_downloader
 from collectors.errors import SiteSchemaChange, NoRecords, NoSuchMethod
+from collectors.index import get_record_index, NEW, CHANGED, RELISTED
+from collectors.metrics import get_metrics, timed, FETCH, VALIDATE, HUMAN_WAIT, DOWNLOAD, SAVE
+from collectors.people import PeopleRegistry, load_ignore
+from collectors.proxies import PROXY_KEY, get_proxy_pool
+from collectors.records import Person, SiteRecord, records_frame
+from collectors.review import get_review_queue, RECORD, RELATIVE
+from collectors.store import get_results_store
 
-from definitions import OUTPUT_DIR, STATES, CHROME_DRIVER_DIR as DRIVER_DIR
+from definitions import OUTPUT_DIR, STATES, SETTINGS
 
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s -  %(levelname)s -  %(message)s')
 logging.disable(logging.CRITICAL)
@@ -24,29 +32,131 @@ MISMATCH_LOCALITY = 1
 MATCH_AKA = 2
 MATCH_PERSON = 3
 
+# 'exact' checks the record names against the person's name permutations, 'fuzzy' scores them with
+#   collectors.matching.FuzzyMatcher.
+MATCH_STRATEGY = SETTINGS.get('matching', dict()).get('strategy', 'exact')
+
+# When False, collectors push their questions to the review queue (see collectors.review) instead of asking them.
+INTERACTIVE = SETTINGS.get('review', dict()).get('interactive', True)
+
+# {site: base url} replacing a collector's BASE_URL when set, ex: to point it at a local mock broker
+#   (see benchmarks.broker). An override with a path must end with '/'.
+BASE_URLS = SETTINGS.get('base_urls', dict())
+
+# Collectors may run concurrently (see collectors.scheduler), so any block that prompts the user holds this lock to
+#   keep one person's questions together on the console.
+PROMPT_LOCK = RLock()
+
+
+def site_base_url(site, default, base_url=None):
+    """
+    :param site: str, the collector's class name. ex: 'Spokeo'
+    :param default: str, the collector's BASE_URL.
+    :param base_url: str passed to the collector as base_url=, if any.
+    :return: str, base_url if given, else the site's "base_urls" setting, else the default.
+    """
+    return base_url or BASE_URLS.get(site) or default
+
+
+def results_key(person, test=False):
+    """
+    :param person: Pandas.Series or dict() of a person.
+    :param test: Boolean, True for a test run.
+    :return: str the collectors save the person's records under, ex: 'Smith_John'
+    """
+    return '{test}{family_name}_{given_name}'.format(
+        given_name=person.get('givenName', ''),
+        family_name=person.get('familyName', ''),
+        test='__test__' if test else ''
+    )
+
+
+def same_region(site_region: str, person_region: str):
+    """
+    Check if two Regions (States) are the same, whether either is written out or abbreviated.
+
+    :param site_region: str, lower case.
+    :param person_region: str, lower case.
+    :return: Boolean
+    """
+    return any([
+        site_region == person_region,
+        site_region == STATES.get(person_region.upper(), '').lower(),
+        STATES.get(site_region.upper(), '').lower() == person_region,
+        ])
+
+
+@lru_cache(maxsize=4096)
+def name_perms(first: str = '', middle: str = '', last: str = ''):
+    """
+    Generate the set of possible name variants that the DataBrokers may have.
+    Data Brokers return the same few names over and over, so the results are cached.
+
+    :param first:
+    :param middle:
+    :param last:
+    :return: frozenset() of str()
+    """
+
+    #  All plain combos of first and last name
+    names = {
+        f'{first} {last}',
+        f'{last} {first}',
+        f'{first} {middle}',
+        f'{middle} {last}',
+        f'{first} {middle} {last}',
+        f'{first} {middle}-{last}',
+        f'{first}{middle} {last}',
+        f'{first} {middle}{last}',
+    }
+
+    # All combos with a truncated first name
+    for i in range(len(first)):
+        names.add(f'{first[:i]} {last}')
+        names.add(f'{last} {first[:i]}')
+
+    # All combos with a truncated last name
+    for i in range(len(last)):
+        names.add(f'{first} {last[:i]}')
+        names.add(f'{last[:i]} {first}')
+
+    # All combos with a truncated middle name
+    for i in range(len(middle)):
+        names.add(f'{first} {middle[:i]}')
+        names.add(f'{middle[:i]} {first}')
+        names.add(f'{first} {middle[:i]} {last}')
+
+    return frozenset(names)
+
 
 class AbstractCollector:
     """Base Level Collector Class"""
 
     def __init__(self, person, base_url, **kwargs):
         """
-        :param person: Pandas.Series representing a person
+        :param person: Pandas.Series representing a person, or a collectors.records.Person
         :param base_url: str for the base url for the Data Broker being scraped. ex: www.spokeo.com; www.whitepages.com
         """
         self.site = type(self).__name__
-        self.person = person.copy(deep=True)
+        self.person = Person.from_series(person)
         self.base_url = base_url
         self.url = None
         self.soup = None
-        self.data_from_website = pd.DataFrame()
+        self.site_records = list()
         self.relatives = pd.DataFrame()
+        self._person_aka = None
+        self._proxy_key = None
+        self.match_strategy = MATCH_STRATEGY
+        self.interactive = INTERACTIVE
+        self.review_queue = None
+        self.results_store = None
+        self.record_index = None
+        self.downloader = None
+        self.metrics = None
         self.test = kwargs.get('test', False)
 
-        ignore_people = self.person.get('ignore', '{}')
-        if type(ignore_people) is str:
-            ignore_people = json.loads(ignore_people.replace("'", '"'))
-
-        self.ignore_people = ignore_people
+        # The same person may be handed to several collectors at once, so each collector works on its own copy.
+        self.ignore_people = deepcopy(load_ignore(self.person.get('ignore', '{}')))
 
         for k, v in kwargs.items():
             self.__setattr__(k, v)
@@ -56,43 +166,81 @@ class AbstractCollector:
 
 
 
-        self.save_dir = path.join(OUTPUT_DIR, '{test}{family_name}_{given_name}'.format(
-            given_name=self.person.givenName,
-            family_name=self.person.familyName,
-            test='__test__' if self.test else ''
-        ))
+        self.person_key = results_key(self.person, self.test)
+        self.save_dir = path.join(OUTPUT_DIR, self.person_key)
 
     def __enter__(self):
         print(f'-- {self.site} --')
+        # Pins this person's requests to one egress proxy (see collectors.proxies).
+        get_proxy_pool().hold(self.person_key)
+        self._proxy_key = PROXY_KEY.set(self.person_key)
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        if len(self.data_from_website.index) > 0:
-            self.save_csv()
+        try:
+            if len(self.site_records) > 0:
+                self.save_results()
+            elif exc_type is None:
+                # Nothing found is still a run, so collect_people_data(since=) doesn't search the site again.
+                self._record_index().update(self.site, self.data_from_website, person=self.person_key)
+        finally:
+            if self._proxy_key is not None:
+                PROXY_KEY.reset(self._proxy_key)
+                self._proxy_key = None
+                get_proxy_pool().release(self.person_key)
+
+    @property
+    def site_records(self):
+        """:return: list() of collectors.records.SiteRecord, the site's search records."""
+        return self._site_records
+
+    @site_records.setter
+    def site_records(self, site_records):
+        self._site_records = list(site_records)
+        self._data_from_website = None
+
+    @property
+    def data_from_website(self):
+        """
+        The site records as a DataFrame indexed by '@id', for the results store and the record index. It is built
+            from self.site_records the first time it is used after they change, so it is a view to read: set it, or
+            self.site_records, to change the records.
+
+        :return: Pandas.DataFrame
+        """
+        if self._data_from_website is None:
+            self._data_from_website = records_frame(self._site_records)
+        return self._data_from_website
+
+    @data_from_website.setter
+    def data_from_website(self, data):
+        """:param data: Pandas.DataFrame of site records, indexed by '@id' or with an '@id' column."""
+        self.site_records = SiteRecord.from_frame(data)
 
     def _raise_site_schema_change(self):
         """Raises an error notifying the user that the site schema changed and the source code may need update."""
         raise SiteSchemaChange(f"{self.site} has changed it schema. An update to the source code may be required.")
 
-    def _add_relative(self, relative):
+    def _add_relative(self, relative, relatives):
         """
-        takes a series, prompts user for missing data, and appends to the current Dataframe of known relatives
+        takes a Person, prompts user for missing data, and adds it to the list of known relatives
 
-        :param relative: Pandas.Series
+        :param relative: collectors.records.Person
+        :param relatives: list() of Person the relative is appended to.
         """
         # Check addressRegion (state)
-        if relative.get(key='addressRegion', default='') == '':
-            relative['addressRegion'] = input('\t\tPlease enter State: (optional) ').strip().title()
+        if relative.get('addressRegion', '') == '':
+            relative['addressRegion'] = self._ask('\t\tPlease enter State: (optional) ').strip().title()
 
         # Check addressLocality (city)
-        if relative.get(key='addressLocality', default='') == '':
-            relative['addressLocality'] = input('\t\tPlease enter City: (optional) ').strip().title()
+        if relative.get('addressLocality', '') == '':
+            relative['addressLocality'] = self._ask('\t\tPlease enter City: (optional) ').strip().title()
 
-        if relative.get(key='middleName', default='') == '':
-            relative['middleName'] = input('\t\tPlease enter middle name: (optional) ').strip().title()
+        if relative.get('middleName', '') == '':
+            relative['middleName'] = self._ask('\t\tPlease enter middle name: (optional) ').strip().title()
 
         try:
-            relative['checkRelatives'] = bool(input('\t\tCheck relatives?: (optional) [y/n] ').lower()[0] == 'y')
+            relative['checkRelatives'] = bool(self._ask('\t\tCheck relatives?: (optional) [y/n] ').lower()[0] == 'y')
         except IndexError:
             relative['checkRelatives'] = False
 
@@ -102,11 +250,9 @@ class AbstractCollector:
         relative['addressLocality'] = relative['addressLocality'].strip().title()
         relative['addressRegion'] = relative['addressRegion'].strip().upper()
 
-        relative.drop(inplace=True, columns=[
-            'name',
-        ])
+        del relative['name']
 
-        self.relatives = self.relatives.append(relative, ignore_index=True)
+        relatives.append(relative)
 
     def check_relatives(self, people=None):
         """
@@ -115,69 +261,78 @@ class AbstractCollector:
             * Checks if relative is already int 'people' DataFrame.
             * Adds relative to DataFrame of relatives.
 
-        :param  people : DataFrame of all the people being collected.
+        :param  people : PeopleRegistry or DataFrame of all the people being collected.
         :return: Boolean
         """
         if not self.person.get('checkRelatives', False):
             return False
 
-        possible_relatives = self.data_from_website.get('relatedTo', pd.Series())
-        possible_relatives = [_ for _ in possible_relatives if type(_) is list]
-        possible_relatives = [n for d in possible_relatives for n in d]
-        possible_relatives = pd.DataFrame(possible_relatives)
-        if len(possible_relatives) == 0:
-            return False
-
         non_relatives = self.ignore_people.get('relatives', list())
-        if len(non_relatives) > 0:
-            possible_relatives = possible_relatives[~(possible_relatives.name.isin(pd.DataFrame(non_relatives).name))]
+        non_relative_names = {non_relative.get('name') for non_relative in non_relatives}
+
+        if people is not None and not isinstance(people, PeopleRegistry):
+            people = PeopleRegistry.from_frame(people)
+
+        possible_relatives = list()
+        for site_record in self.site_records:
+            for related in site_record.related_to:
+                name = related.get('name')
+                if type(name) is not str or name in non_relative_names:
+                    continue
+                split_name = name.title().split()
+                if len(split_name) == 0:
+                    continue
+                if people is not None and people.has_name(split_name[0], split_name[-1]):
+                    continue
+                possible_relatives.append(Person(**{
+                    **related,
+                    'givenName': split_name[0],
+                    'familyName': split_name[-1],
+                    'middleName': ' '.join(split_name[1:-1]),
+                }))
 
         if len(possible_relatives) == 0:
             return False
 
-        split_name = possible_relatives['name'].str.title().str.split()
-        possible_relatives['givenName'] = split_name.str[0]
-        possible_relatives['familyName'] = split_name.str[-1]
-        possible_relatives['middleName'] = split_name.str[1:-1].str.join(' ')
-
-        if people is not None:
-            possible_relatives = possible_relatives[
-                ~((possible_relatives['givenName'].isin(people['givenName'])) &
-                  (possible_relatives['familyName'].isin(people['familyName'])))
-            ]
-
-        if len(possible_relatives.index) == 0:
-            return False
-
         starting_count = len(possible_relatives)
+        relatives = list()
+
+        with PROMPT_LOCK if self.interactive else nullcontext():
+            print(f'\t** Check Relatives ({starting_count}) **')
+            orc = len(str(starting_count))
+            for i, possible_relative in enumerate(possible_relatives):
+                given_name = possible_relative.get('givenName', '').strip()
+
+                middle_name = possible_relative.get('middleName', '')
+                if type(middle_name) is list:
+                    middle_name = ' '.join(middle_name)
+                if len(middle_name) > 0:
+                    middle_name = ' ' + middle_name.strip()
+
+                family_name = possible_relative.get('familyName', '').strip()
+
+                msg = f'{i + 1:{orc}d}) Would you like to add {given_name}{middle_name} {family_name}? [y|n] '
+
+                if not self.interactive:
+                    self._review_queue().push(
+                        RELATIVE, self.site, self.person, possible_relative['name'],
+                        f'Would you like to add {given_name}{middle_name} {family_name} as a relative of '
+                        f'{self.person.givenName} {self.person.familyName}? [y|n]',
+                        payload={k: v for k, v in possible_relative.items() if type(v) is str},
+                    )
+                    print(f'\t{msg} (queued for review)')
+                    continue
 
-        print(f'\t** Check Relatives ({starting_count}) **')
-        orc = len(str(starting_count))
-        for i, possible_relative in enumerate(possible_relatives.iterrows()):
-            row_index, possible_relative = possible_relative
-
-            given_name = possible_relative.get('givenName', '').strip()
-
-            middle_name = possible_relative.get('middleName', '')
-            if type(middle_name) is list:
-                middle_name = ' '.join(middle_name)
-            if len(middle_name) > 0:
-                middle_name = ' ' + middle_name.strip()
-
-            family_name = possible_relative.get('familyName', '').strip()
-
-            msg = f'{i + 1:{orc}d}) Would you like to add {given_name}{middle_name} {family_name}? [y|n] '
-
-            try:
-                add_relative = input(f'\t{msg}?\t').lower()[0] == 'y'
-            except IndexError:
-                add_relative = False
+                try:
+                    add_relative = self._ask(f'\t{msg}?\t').lower()[0] == 'y'
+                except IndexError:
+                    add_relative = False
 
-            if add_relative:
-                self._add_relative(possible_relative)
-            else:
-                non_relatives.append({'name': possible_relative['name']})
-                # self.person['nonRelatives'].append({'name': possible_relative['name']})
+                if add_relative:
+                    self._add_relative(possible_relative, relatives)
+                else:
+                    non_relatives.append({'name': possible_relative['name']})
+                    # self.person['nonRelatives'].append({'name': possible_relative['name']})
 
         if len(non_relatives) > 0:
             try:
@@ -187,6 +342,10 @@ class AbstractCollector:
 
             self.person['ignore'] = self.ignore_people
 
+        if len(relatives) > 0:
+            self.relatives = pd.concat(
+                [self.relatives, pd.DataFrame([relative.to_dict() for relative in relatives])], ignore_index=True)
+
         print('\t** {count} relative{s} found **\n'.format(
             count=len(self.relatives),
             s='s' if len(self.relatives) != 1 else '')
@@ -194,15 +353,59 @@ class AbstractCollector:
 
         return self.relatives
 
-    def save_csv(self):
+    def _review_queue(self):
+        """:return: the ReviewQueue given to this collector, or the shared one."""
+        return get_review_queue() if self.review_queue is None else self.review_queue
+
+    def _results_store(self):
+        """:return: the ResultsStore given to this collector, or the shared one."""
+        return get_results_store() if self.results_store is None else self.results_store
+
+    def _record_index(self):
+        """:return: the RecordIndex given to this collector, or the shared one."""
+        return get_record_index() if self.record_index is None else self.record_index
+
+    def _downloader(self):
+        """:return: the Downloader given to this collector, or the shared one."""
+        return get_downloader() if self.downloader is None else self.downloader
+
+    def _metrics(self):
+        """:return: the Metrics given to this collector, or the shared one."""
+        return get_metrics() if self.metrics is None else self.metrics
+
+    def stage(self, name):
+        """
+        Times a block as a stage of this collector's site:
+            with self.stage(FETCH):
+                ...
+
+        :param name: str, one of the stages in collectors.metrics
         """
-        Saves a csv file in directory save_dir. Checks if self.save_dir exists, creates it if it doesn't exist.
+        return self._metrics().stage(self.site, name)
+
+    def _ask(self, prompt):
+        """:return: str of the user's answer to the prompt, timed as HUMAN_WAIT."""
+        with self.stage(HUMAN_WAIT):
+            return input(prompt)
+
+    @timed(SAVE)
+    def save_results(self):
+        """
+        Appends the site records to the results store, under the site, today's date and self.person_key, and updates
+            the record index with them.
+
+        :return: dict() of {record id: status} from RecordIndex.update()
         """
-        if not path.exists(self.save_dir):
-            makedirs(self.save_dir)
-        file_name = f'{self.site}_{datetime.now().strftime("%Y-%m-%d")}.csv'
+        self._results_store().append(self.site, self.data_from_website, person=self.person_key)
+        statuses = self._record_index().update(self.site, self.data_from_website, person=self.person_key)
 
-        self.data_from_website.to_csv(path.join(self.save_dir, file_name))
+        counts = {status: list(statuses.values()).count(status) for status in (NEW, CHANGED, RELISTED)}
+        self._metrics().count(self.site, 'records', len(statuses))
+        for status, count in counts.items():
+            self._metrics().count(self.site, status, count)
+        if sum(counts.values()) > 0:
+            print('\t{new} new, {changed} changed, {relisted} relisted after opt-out'.format(**counts))
+        return statuses
 
     def download_file(self, url, output_file_name):
         """
@@ -212,31 +415,79 @@ class AbstractCollector:
         :param output_file_name: Where the file will be placed within the filesystem.
         :return                : boolean
         """
+        return self.download_files([(url, output_file_name)])[0]
 
+    @timed(DOWNLOAD)
+    def download_files(self, files):
+        """
+        Downloads files to the output directory, several at a time. Each file is stored once by its content (see
+            collectors.downloads) and listed in the manifest.json of the output directory.
+
+        :param files: list() of (url, output file name without extension)
+        :return: list() of boolean, True for each file downloaded, in the same order.
+        """
         output_file_dir = path.join(self.save_dir, self.site)
+        downloaded = self._downloader().download_all(
+            [(url, output_file_dir, output_file_name) for url, output_file_name in files], site=self.site)
+        self._metrics().count(self.site, 'downloads', sum(file is not None for file in downloaded))
+        return [file is not None for file in downloaded]
 
-        # Checks if the output directory exists and creates it if it doesn't.
-        if not path.exists(output_file_dir):
-            makedirs(output_file_dir)
+    @property
+    def person_aka(self):
+        """
+        The set of name variants (see name_perms()) for the searched person. Built once per collector.
 
-        # get info on the file being downloaded
-        try:
-            res = requests.get(url, allow_redirects=True, stream=True)
-            res.raise_for_status()
-        except Exception as e:
-            logging.critical(e)
-            return False
+        :return: frozenset() of str
+        """
+        if self._person_aka is None:
+            self._person_aka = name_perms(
+                self.person['givenName'].lower(),
+                self.person['middleName'].lower(),
+                self.person['familyName'].lower(),
+            )
+        return self._person_aka
 
-        # Generate file name with the correct extension
-        output_file_name += f".{res.headers['content-type'].split('/')[1]}"
+    def _name_check(self, site_record_name):
+        """
+        Check if a site record's name matches the searched person's name.
 
-        # Download as binary
-        with open(path.join(output_file_dir, output_file_name), 'wb') as f:
-            for block in res.iter_content(1024):
-                if not block:
-                    break
-                f.write(block)
-        return True
+        :param site_record_name: str, lower case.
+        :return: Integer. Will be MISMATCH_NAME (0), MATCH_AKA = 2, or MATCH_PERSON (3)
+        """
+        # Check if the Site Record name is in the generate list of the Search Person's A.K.A.s
+        if site_record_name in self.person_aka:
+            return MATCH_PERSON
+
+        # Get the name permutations for the site record's name.
+        _site_record_name = site_record_name.split(' ')
+        site_aka = name_perms(_site_record_name[0], ''.join(_site_record_name[1:-1]), _site_record_name[-1])
+
+        # If none of the possible name variants match
+        if self.person_aka.isdisjoint(site_aka):
+            return MISMATCH_NAME
+        return MATCH_AKA
+
+    def _same_region(self, site_region):
+        """
+        :param site_region: str, lower case.
+        :return: Boolean. True if the site Region (State) is the same as the person's Region.
+        """
+        return same_region(site_region, self.person.get('addressRegion', '').lower())
+
+    @staticmethod
+    def _first_address(site_record):
+        """
+        Get the most recent address on the site. If the DataBroker returns a list of addresses, grab the first.
+
+        :param site_record: collectors.records.SiteRecord, Pandas.Series or dict() representing the site record
+        :return: dict()
+        """
+        site_address = site_record.get('address', dict())
+        if type(site_address) is list:
+            site_address = site_address[0] if len(site_address) > 0 else dict()
+        if type(site_address) is not dict:
+            site_address = dict()
+        return site_address
 
     def _site_record_matches_person(self, site_record):
         """
@@ -249,95 +500,21 @@ class AbstractCollector:
         :param site_record: Pandas.Series representing the site record
         :return: Integer. Will be MISMATCH_NAME (0), MISMATCH_LOCALITY (1), MATCH_AKA = 2, or MATCH_PERSON (3)
         """
-
-        def _name_perms(_first: str = '', _middle: str = '', _last: str = ''):
-            """
-            Generate a list of possible name variants that the DataBrokers may have
-            :param _first:
-            :param _middle:
-            :param _last:
-            :return: list() of str()
-            """
-
-            #  All plain combos of first and last name
-            _names = [
-                f'{_first} {_last}',
-                f'{_last} {_first}',
-                f'{_first} {_middle}',
-                f'{_middle} {_last}',
-                f'{_first} {_middle} {_last}',
-                f'{_first} {_middle}-{_last}',
-                f'{_first}{_middle} {_last}',
-                f'{_first} {_middle}{_last}',
-            ]
-
-            # All combos with a truncated first name
-            for i in range(len(_first)):
-                _names.append(f'{_first[:i]} {_last}')
-                _names.append(f'{_last} {_first[:i]}')
-
-            # All combos with a truncated last name
-            for i in range(len(_last)):
-                _names.append(f'{_first} {_last[:i]}')
-                _names.append(f'{_last[:i]} {_first}')
-
-            # All combos with a truncated middle name
-            for i in range(len(_middle)):
-                _names.append(f'{_first} {_middle[:i]}')
-                _names.append(f'{_middle[:i]} {_first}')
-                _names.append(f'{_first} {_middle[:i]} {_last}',)
-
-            return _names
-
-        # Get the most recent address on the site
-        site_address = site_record.get('address', dict())
-
-        # if the DataBroker returns a list of addresses, grab the first address on the list
-        if type(site_address) is list:
-            site_address = site_address[0]
-
-        # Check the Region (state)
-        site_region = site_address.get('addressRegion', '').lower()
-        person_region = self.person.get('addressRegion', '').lower()
-        same_region = any([
-            site_region == person_region,
-            site_region == STATES.get(person_region.upper(), '').lower(),
-            STATES.get(site_region.upper(), '').lower() == person_region,
-            ])
-
-        # Check the Locality (city)
-        site_locality = site_address.get('addressLocality', '').lower()
-        person_locality = self.person.get('addressLocality', '').lower()
-        same_locality = site_locality == person_locality
-
-        same_region_and_locality = all([same_locality, same_region])
-
-        # Get the name permutations for the search person's name.
-        person_aka = _name_perms(
-            _first=self.person['givenName'].lower(),
-            _middle=self.person['middleName'].lower(),
-            _last=self.person['familyName'].lower()
-        )
-
-        # Get the name permutations for the site record's name.
+        site_address = self._first_address(site_record)
         site_record_name = site_record['name'].lower()
-        _site_record_name = site_record_name.split(' ')
-        site_aka = _name_perms(
-            _first=_site_record_name[0],
-            _middle=''.join(_site_record_name[1:-1]),
-            _last=_site_record_name[-1]
-        )
-
-        # Check if the Site Record name is in the generate list of the Search Person's A.K.A.s
-        if site_record_name not in person_aka:
-            matches_aka = [aka in person_aka for aka in site_aka]
-            if not any(matches_aka):  # If none of the possible name variants match
-                logging.debug(f'MISMATCH_NAME: {site_record_name}')
-                return MISMATCH_NAME
-            else:
-                logging.debug(f'MATCH_AKA: {site_record_name}')
-                return MATCH_AKA
 
+        name_check = self._name_check(site_record_name)
+        if name_check == MISMATCH_NAME:
+            logging.debug(f'MISMATCH_NAME: {site_record_name}')
+            return MISMATCH_NAME
+        if name_check == MATCH_AKA:
+            logging.debug(f'MATCH_AKA: {site_record_name}')
+            return MATCH_AKA
+
+        same_region_and_locality = all([
+            site_address.get('addressLocality', '').lower() == self.person.get('addressLocality', '').lower(),
+            self._same_region(site_address.get('addressRegion', '').lower()),
+        ])
         if not same_region_and_locality:
             logging.debug(f'MISMATCH_LOCALITY: {site_record_name}')
             return MISMATCH_LOCALITY
@@ -345,6 +522,56 @@ class AbstractCollector:
         logging.debug(f'MATCH_PERSON: {site_record_name}')
         return MATCH_PERSON
 
+    def _classify_records(self, site_records):
+        """
+        Classifies every record in one pass, using self.match_strategy:
+            * 'exact' does the same check as self._site_record_matches_person(). Names and regions repeat a lot
+                within a search, so each distinct value is only checked once. The score is 1 for one of the
+                person's name variants, 0.5 for an A.K.A. and 0 for anything else.
+            * 'fuzzy' uses collectors.matching.FuzzyMatcher, and the score is its similarity score.
+
+        :param site_records: list() of collectors.records.SiteRecord, such as self.site_records, or a
+            Pandas.DataFrame of site records, such as self.data_from_website.
+        :return: Pandas.DataFrame indexed by the record ids (or the DataFrame's index), and columns 'check'
+            (MISMATCH_NAME, MISMATCH_LOCALITY, MATCH_AKA or MATCH_PERSON) and 'score' (float between 0 and 1).
+        """
+        if isinstance(site_records, pd.DataFrame):
+            index, site_records = site_records.index, SiteRecord.from_frame(site_records)
+        else:
+            index = pd.Index([site_record.id for site_record in site_records], dtype=object)
+
+        if len(site_records) == 0:
+            return pd.DataFrame({'check': pd.Series(dtype=int), 'score': pd.Series(dtype=float)})
+
+        names = np.array([site_record.name.lower() for site_record in site_records], dtype=object)
+        addresses = [site_record.first_address for site_record in site_records]
+        localities = np.array([a.addressLocality.lower() for a in addresses], dtype=object)
+        regions = np.array([a.addressRegion.lower() for a in addresses], dtype=object)
+
+        unique_regions = pd.unique(regions)
+        same_regions = dict(zip(unique_regions, map(self._same_region, unique_regions)))
+        same_region_ = np.fromiter((same_regions[r] for r in regions), dtype=bool, count=len(regions))
+        same_place = same_region_ & (localities == self.person.get('addressLocality', '').lower())
+
+        if self.match_strategy == 'fuzzy':
+            from collectors.matching import FuzzyMatcher
+            checks, scores = FuzzyMatcher().classify(
+                self.person['givenName'], self.person['middleName'], self.person['familyName'], names, same_place)
+        else:
+            unique_names = pd.unique(names)
+            name_checks = dict(zip(unique_names, map(self._name_check, unique_names)))
+            name_check = np.fromiter((name_checks[n] for n in names), dtype=int, count=len(names))
+
+            checks = np.where(
+                name_check == MATCH_PERSON,
+                np.where(same_place, MATCH_PERSON, MISMATCH_LOCALITY),
+                name_check,
+            )
+            scores = np.select([name_check == MATCH_PERSON, name_check == MATCH_AKA], [1.0, 0.5], default=0.0)
+
+        return pd.DataFrame({'check': checks, 'score': scores}, index=index)
+
+    @timed(VALIDATE)
     def validate_data(self):
         """
         Loops through all website records and checks if the name in the record matches the search criteria.
@@ -354,67 +581,78 @@ class AbstractCollector:
         :return: Boolean
         """
 
-        original_count = len(self.data_from_website.index)
+        original_count = len(self.site_records)
         print(f'\t** Validate Records ({original_count}) **')
         if original_count == 0:
             return self.person
 
-        possible_matches = self.data_from_website.copy(deep=True)
-
         non_matches = self.ignore_people.get('searchResults', dict())
-        if len(non_matches) > 0:
-            possible_matches = possible_matches[~(
-                possible_matches.index.isin(pd.DataFrame(index=non_matches.get(self.site.lower(), list())).index)
-            )]
+        skipped_ids = set(non_matches.get(self.site.lower(), list()))
+        possible_matches = [site_record for site_record in self.site_records if site_record.id not in skipped_ids]
 
         if len(possible_matches) == 0:
             return self.person
 
-        for i, site_record in enumerate(possible_matches.iterrows()):
-            site_id, site_record = site_record
-
-            additional_names = site_record.get('additionalName', [])
-            additional_names = '; '.join(additional_names[:min([len(additional_names), 3])])
-            site_address = site_record.get('address', dict())
-            if type(site_address) is list:
-                site_address = site_address[0]
-
-            site_record_check = self._site_record_matches_person(site_record)
-            msg = {
-                MISMATCH_NAME:     '{:{ocl}d})             skipped {name_} of {city}, {state}.{aka}',
-                MISMATCH_LOCALITY: '{:{ocl}d}) Do you want to keep {name_} of {city}, {state}?{aka} [y|n]',
-                MATCH_AKA:         '{:{ocl}d}) Do you want to keep {name_} of {city}, {state}?{aka} [y|n]',
-                MATCH_PERSON:      '{:{ocl}d})                kept {name_} of {city}, {state}.{aka}',
-            }[site_record_check]
-
-            msg = msg.format(
-                i + 1,
-                ocl=len(str(original_count)),
-                name_=site_record.get('name'),
-                city=site_address.get('addressLocality', 'Unknown City'),
-                state=site_address.get('addressRegion', ""),
-                aka=f' (aka {additional_names})' if len(additional_names) > 0 else ''
-            )
+        site_record_checks = self._classify_records(possible_matches)
+        checks, scores = site_record_checks['check'].to_numpy(), site_record_checks['score'].to_numpy()
+        removed_ids = set()
+
+        with PROMPT_LOCK if self.interactive else nullcontext():
+            print(f'\t** {self.site}: {self.person.givenName} {self.person.familyName} **')
+            for i, site_record in enumerate(possible_matches):
+                site_id = site_record.id
+                site_record_check = checks[i]
+                site_record_score = scores[i]
+
+                additional_names = '; '.join(site_record.additional_names[:3])
+                site_address = self._first_address(site_record)
+
+                msg = {
+                    MISMATCH_NAME:     '{:{ocl}d})             skipped {name_} of {city}, {state}.{aka}',
+                    MISMATCH_LOCALITY: '{:{ocl}d}) Do you want to keep {name_} of {city}, {state}?{aka}{score} [y|n]',
+                    MATCH_AKA:         '{:{ocl}d}) Do you want to keep {name_} of {city}, {state}?{aka}{score} [y|n]',
+                    MATCH_PERSON:      '{:{ocl}d})                kept {name_} of {city}, {state}.{aka}',
+                }[site_record_check]
+
+                msg = msg.format(
+                    i + 1,
+                    ocl=len(str(original_count)),
+                    name_=site_record.get('name'),
+                    city=site_address.get('addressLocality', 'Unknown City'),
+                    state=site_address.get('addressRegion', ""),
+                    aka=f' (aka {additional_names})' if len(additional_names) > 0 else '',
+                    score=f' (score {site_record_score:.2f})' if self.match_strategy == 'fuzzy' else '',
+                )
+
+                # Get the list of matches confirmed by previous user run to not be a true match
+                if (site_record_check == MISMATCH_LOCALITY or site_record_check == MATCH_AKA) and not self.interactive:
+                    # Keep the record for now; the review writes the answer back to the saved records.
+                    self._review_queue().push(RECORD, self.site, self.person, site_id, msg.split(') ', 1)[1],
+                                              saved_as=self.person_key)
+                    print(f'\t{msg} (queued for review)')
+                    remove_site_id = False
+                elif site_record_check == MISMATCH_LOCALITY or site_record_check == MATCH_AKA:
+                    try:
+                        remove_site_id = self._ask(f'\t{msg}\t').lower()[0] != 'y'
+                    except IndexError:
+                        remove_site_id = True
+                else:
+                    print(f'\t{msg}')
+                    remove_site_id = (site_record_check == MISMATCH_NAME)
 
-            # Get the list of matches confirmed by previous user run to not be a true match
-            if site_record_check == MISMATCH_LOCALITY or site_record_check == MATCH_AKA:
-                try:
-                    remove_site_id = input(f'\t{msg}\t').lower()[0] != 'y'
-                except IndexError:
-                    remove_site_id = True
-            else:
-                print(f'\t{msg}')
-                remove_site_id = (site_record_check == MISMATCH_NAME)
+                if remove_site_id:
+                    try:
+                        non_matches[self.site.lower()].append(site_id)
+                        # self.person['nonMatch'][self.site.lower()].append(site_id)
+                    except KeyError:
+                        non_matches[self.site.lower()] = [site_id]
+                        # self.person['nonMatch'][self.site.lower()] = [site_id]
 
-            if remove_site_id:
-                try:
-                    non_matches[self.site.lower()].append(site_id)
-                    # self.person['nonMatch'][self.site.lower()].append(site_id)
-                except KeyError:
-                    non_matches[self.site.lower()] = [site_id]
-                    # self.person['nonMatch'][self.site.lower()] = [site_id]
+                    removed_ids.add(site_id)
 
-                self.data_from_website.drop(index=site_id, inplace=True)
+        if len(removed_ids) > 0:
+            self.site_records = [
+                site_record for site_record in self.site_records if site_record.id not in removed_ids]
 
         if len(non_matches) > 0:
             try:
@@ -425,8 +663,8 @@ class AbstractCollector:
             self.person['ignore'] = self.ignore_people
 
         print('\t** {count} record{s} found **\n'.format(
-            count=len(self.data_from_website.index),
-            s='s' if len(self.data_from_website.index) != 1 else ''))
+            count=len(self.site_records),
+            s='s' if len(self.site_records) != 1 else ''))
         return self.person
 
     def get_data(self):
@@ -435,25 +673,42 @@ class AbstractCollector:
 
 
 class RequestCollector(AbstractCollector):
-    """AbstractCollector SubClass that uses Request and BeautifySoup to collect data from site."""
+    """
+    AbstractCollector SubClass that uses Request and BeautifySoup to collect data from site.
+
+    The raw page is kept in self.content. Most sites only need the JSON scripts on the page, which
+        collectors.extract pulls straight out of self.content, so the BeautifySoup tree in self.soup is only built
+        the first time it is used.
+    """
     def __init__(self, person, base_url, **kwargs):
         super(RequestCollector, self).__init__(person, base_url, **kwargs)
-        self.soup = None
+        self.content = None
 
     def __enter__(self):
         super(RequestCollector, self).__enter__()
-        self.soup = self.get_soup()
+        self.content = self.get_content()
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         super(RequestCollector, self).__exit__(exc_type, exc_val, exc_tb)
 
-    def get_soup(self):
+    @property
+    def soup(self):
+        """:return: BeautifySoup of self.content, or None before the page is loaded."""
+        if self._soup is None and self.content is not None:
+            self._soup = bs(self.content, 'html.parser')
+        return self._soup
+
+    @soup.setter
+    def soup(self, soup):
+        self._soup = soup
+
+    def get_content(self):
         """
-        Use the request module to get the site code and then runs it through BeautifySoup html parser.
+        Use the request module to get the site code.
 
-        :return: BeautifySoup
+        :return: bytes of the page source.
         """
-        with requests.get(self.url, headers={'User-Agent': 'Mozilla/5.0'}) as request:
+        with self.stage(FETCH), cached_get(self.url, headers={'User-Agent': 'Mozilla/5.0'}) as request:
             try:
                 request.raise_for_status()
             except HTTPError as e:
@@ -461,29 +716,51 @@ class RequestCollector(AbstractCollector):
                     raise NoRecords(e.args[0])
                 else:
                     raise e
-            return bs(request.text, 'html.parser')
+            self._metrics().add_bytes(self.site, len(request.content))
+            return request.content
+
+    def get_soup(self):
+        """
+        Use the request module to get the site code and then runs it through BeautifySoup html parser.
+
+        :return: BeautifySoup
+        """
+        return bs(self.get_content(), 'html.parser')
 
 
 class SeleniumCollector(AbstractCollector):
     """
     Collector Class for DataBrokers that use Javascript, or don't use JSON.
     IF the Site uses Javascript to load data after the page has loaded then the 'request' module will not work to pull
-        the data off the site. This class will use a browser (Firefox or Chrome). The browser choice is selected in
-        the header data of this module.
+        the data off the site. This class will use a browser (Firefox or Chrome), borrowed from the shared
+        collectors.browsers.BrowserPool. The browser choice is selected in the header data of that module.
     """
 
-    DRIVER_DIR = DRIVER_DIR
-
     def __init__(self, person, base_url, **kwargs):
         """
         :param person: Pandas.Series representing a person
         :param base_url: str for the base url for the Data Broker being scraped. ex: www.spokeo.com; www.whitepages.com
+        :param browser_pool: (optional) BrowserPool to borrow browsers from instead of the shared pool.
         """
         super(SeleniumCollector, self).__init__(person, base_url, **kwargs)
-        self.driver = Driver
+        self.browser_pool = kwargs.get('browser_pool')
 
     def __enter__(self):
         super(SeleniumCollector, self).__enter__()
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         super(SeleniumCollector, self).__exit__(exc_type, exc_val, exc_tb)
+
+    def browser(self):
+        """
+        Borrows a browser for the length of a with block:
+            with self.browser() as driver:
+                driver.get(self.url)
+
+        :return: context manager giving a PooledBrowser
+        """
+        if self.browser_pool is None:
+            # Imported here so collectors that never open a browser don't import selenium.
+            from collectors.browsers import get_browser_pool
+            return get_browser_pool().browser()
+        return self.browser_pool.browser()
@@ -0,0 +1,247 @@
+import atexit
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+from threading import Condition, Lock
+
+from selenium.webdriver import Chrome as Driver, ChromeOptions as DriverOptions
+# from selenium.webdriver import Firefox as Driver, FirefoxOptions as DriverOptions
+from selenium.common.exceptions import WebDriverException
+
+from collectors.errors import NoBrowser, Throttled
+from collectors.proxies import get_proxy_pool
+from collectors.throttle import browser_get
+from definitions import SETTINGS, CHROME_DRIVER_DIR as DRIVER_DIR
+
+BROWSER_SETTINGS = SETTINGS.get('browsers', dict())
+
+POOL_SIZE = BROWSER_SETTINGS.get('pool_size', 2)  # number of browsers kept open
+MAX_PAGES = BROWSER_SETTINGS.get('max_pages', 50)  # number of pages a browser loads before it is replaced
+HEADLESS = BROWSER_SETTINGS.get('headless', True)
+WINDOW_SIZE = BROWSER_SETTINGS.get('window_size', '1920,1080')
+CHECKOUT_TIMEOUT = BROWSER_SETTINGS.get('checkout_timeout', 300)  # seconds to wait for a free browser
+
+_pool = None
+_pool_lock = Lock()
+
+
+def new_driver(proxy=None):
+    """
+    Starts a new browser.
+
+    The CSS for some pages (ex: MyLife) hides options when the window is too narrow, so headless browsers are given a
+        full size window.
+
+    :param proxy: str of the egress proxy url the browser goes through, ex: 'socks5://10.0.0.3:1080'. Chrome
+        ignores credentials in the url, so the proxy has to accept the browser without them.
+    :return: selenium WebDriver
+    """
+    options = DriverOptions()
+    if HEADLESS:
+        options.add_argument('--headless')
+    options.add_argument(f'--window-size={WINDOW_SIZE}')
+    if proxy is not None:
+        options.add_argument(f'--proxy-server={proxy}')
+    return Driver(executable_path=DRIVER_DIR, options=options)
+
+
+class PooledBrowser:
+    """
+    A browser borrowed from a BrowserPool. Behaves like the selenium WebDriver it wraps, and counts the pages it loads
+        so the pool knows when to replace it. Pages are loaded at the pace of collectors.throttle, and a browser whose
+        proxy gets blocked rests the proxy and is replaced.
+    """
+
+    def __init__(self, driver, rate_limiter=None, proxy=None, proxy_key=None, proxy_pool=None):
+        """
+        :param driver: selenium WebDriver
+        :param rate_limiter: RateLimiter pacing the pages loaded. Defaults to the shared one.
+        :param proxy: str of the egress proxy url the browser goes through, if any.
+        :param proxy_key: str the proxy is pinned to in proxy_pool.
+        :param proxy_pool: ProxyPool the proxy came from.
+        """
+        self.driver = driver
+        self.rate_limiter = rate_limiter
+        self.proxy = proxy
+        self.proxy_key = proxy_key
+        self.proxy_pool = proxy_pool
+        self.proxy_blocked = False
+        self.pages = 0
+
+    def __getattr__(self, item):
+        return getattr(self.driver, item)
+
+    def get(self, url):
+        self.pages += 1
+        try:
+            return browser_get(self.driver, url, self.rate_limiter, self.proxy)
+        except Throttled:
+            if self.proxy is not None:
+                self.proxy_pool.blocked(self.proxy)
+                self.proxy_blocked = True
+            raise
+
+    def healthy(self):
+        """:return: Boolean. False if the browser has crashed, stopped responding, or its proxy was blocked."""
+        if self.proxy_blocked:
+            return False
+        try:
+            self.driver.current_url
+            return True
+        except WebDriverException:
+            return False
+
+    def reset(self):
+        """Clears the cookies and storage left by the last person searched, so nothing carries over to the next."""
+        try:
+            self.driver.execute_cdp_cmd('Network.clearBrowserCookies', dict())
+        except (AttributeError, WebDriverException):
+            self.driver.delete_all_cookies()
+        self.driver.execute_script('window.localStorage.clear(); window.sessionStorage.clear();')
+        self.driver.get('about:blank')
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except WebDriverException as e:
+            logging.warning(f'Browser did not quit cleanly: {e}')
+
+
+class BrowserPool:
+    """
+    Keeps a few browsers open for the life of the process and lends them out to SeleniumCollectors, instead of every
+        search starting (and closing) its own browser.
+
+    A browser is replaced when it fails its health check or after it has loaded max_pages pages, and its cookies and
+        storage are cleared whenever it comes back to the pool.
+    """
+
+    def __init__(self, size=POOL_SIZE, max_pages=MAX_PAGES, factory=new_driver, rate_limiter=None, proxy_pool=None):
+        """
+        :param size: int for the most browsers open at once.
+        :param max_pages: int for the number of pages a browser loads before it is replaced.
+        :param factory: callable that starts a new selenium WebDriver. It is given proxy= when proxies are configured.
+        :param rate_limiter: RateLimiter pacing the pages loaded. Defaults to the shared one.
+        :param proxy_pool: ProxyPool giving each new browser its egress proxy. Defaults to the shared one.
+        """
+        self.size = size
+        self.max_pages = max_pages
+        self.factory = factory
+        self.rate_limiter = rate_limiter
+        self.proxy_pool = get_proxy_pool() if proxy_pool is None else proxy_pool
+        self._started = 0
+        self._idle = deque()
+        self._open = 0
+        # Woken whenever a browser is returned or discarded, so a borrower waiting on a full pool can take its place.
+        self._available = Condition(Lock())
+
+    def checkout(self, timeout=CHECKOUT_TIMEOUT):
+        """
+        Borrows a browser, starting a new one if none are idle and the pool isn't full.
+
+        :param timeout: seconds to wait for a browser to be returned when the pool is full.
+        :return: PooledBrowser
+        :raises NoBrowser: if no browser was free before the timeout.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._available:
+                while len(self._idle) == 0 and self._open >= self.size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise NoBrowser(f'No browser was free after {timeout}s, {self._open} of {self.size} in use')
+                    self._available.wait(remaining)
+
+                browser = self._idle.popleft() if len(self._idle) > 0 else None
+                if browser is None:
+                    self._open += 1
+                    self._started += 1
+                    proxy_key = f'browser-{self._started}'
+
+            if browser is None:
+                try:
+                    return self._start(proxy_key)
+                except Exception:
+                    with self._available:
+                        self._open -= 1
+                        self._available.notify()
+                    raise
+
+            if browser.healthy():
+                return browser
+            self._discard(browser)
+
+    def _start(self, proxy_key):
+        """:return: PooledBrowser of a new browser, going through the proxy pinned to proxy_key if there are any."""
+        proxy = self.proxy_pool.assign(proxy_key)
+        if proxy is None:
+            return PooledBrowser(self.factory(), self.rate_limiter)
+        try:
+            driver = self.factory(proxy=proxy)
+        except Exception:
+            self.proxy_pool.release(proxy_key)
+            raise
+        return PooledBrowser(driver, self.rate_limiter, proxy, proxy_key, self.proxy_pool)
+
+    def checkin(self, browser):
+        """
+        Returns a browser to the pool, replacing it if it is worn out or broken.
+
+        :param browser: PooledBrowser
+        """
+        if browser.pages >= self.max_pages or not browser.healthy():
+            self._discard(browser)
+            return
+
+        try:
+            browser.reset()
+        except WebDriverException:
+            self._discard(browser)
+            return
+        with self._available:
+            self._idle.append(browser)
+            self._available.notify()
+
+    def _discard(self, browser):
+        browser.quit()
+        if browser.proxy_key is not None:
+            self.proxy_pool.release(browser.proxy_key)
+        with self._available:
+            self._open -= 1
+            self._available.notify()
+
+    @contextmanager
+    def browser(self):
+        """
+        with pool.browser() as driver:
+            driver.get(url)
+        """
+        browser = self.checkout()
+        try:
+            yield browser
+        finally:
+            self.checkin(browser)
+
+    def close(self):
+        """Quits every idle browser."""
+        while True:
+            with self._available:
+                if len(self._idle) == 0:
+                    return
+                browser = self._idle.popleft()
+            self._discard(browser)
+
+
+def get_browser_pool():
+    """
+    Gets the process wide BrowserPool, creating it on first use. Its browsers are closed when the process exits.
+
+    :return: BrowserPool
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool()
+            atexit.register(_pool.close)
+        return _pool
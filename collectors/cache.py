@@ -0,0 +1,268 @@
+import hashlib
+import json
+import logging
+import time
+from os import path, makedirs, remove, replace, scandir, utime
+from tempfile import NamedTemporaryFile
+from threading import Lock
+
+from requests import Response
+from requests.structures import CaseInsensitiveDict
+
+from collectors.errors import CacheMiss
+from collectors.session import get_session
+from collectors.throttle import get_rate_limiter
+from definitions import SETTINGS, CACHE_DIR
+
+CACHE_SETTINGS = SETTINGS.get('cache', dict())
+
+# 'off'    : never use the cache.
+# 'normal' : serve fresh responses from the cache, revalidate stale ones, and store new ones.
+# 'replay' : only serve from the cache (fresh or not) and never touch the network.
+MODES = ('off', 'normal', 'replay')
+MODE = CACHE_SETTINGS.get('mode', 'normal')
+TTL = CACHE_SETTINGS.get('ttl', 24 * 60 * 60)  # seconds
+MAX_BYTES = CACHE_SETTINGS.get('max_bytes', 256 * 1024 * 1024)
+CACHEABLE_STATUS_CODES = (200, 404)  # a block page (see RateLimiter.blocked) is never cached, whatever its status
+
+_cache = None
+_cache_lock = Lock()
+
+
+def _write_atomic(file, data):
+    """
+    Writes to a temporary file next to file, then moves it into place, so a reader never sees half a file. Each
+        writer has its own temporary file, so threads storing the same entry don't race on it.
+
+    :param file: str
+    :param data: bytes or str
+    """
+    with NamedTemporaryFile('wb' if type(data) is bytes else 'w', dir=path.dirname(file),
+                            prefix=path.basename(file), suffix='.tmp', delete=False) as f:
+        f.write(data)
+    try:
+        replace(f.name, file)
+    except OSError:
+        remove(f.name)
+        raise
+
+
+class ResponseCache:
+    """
+    On-disk cache of HTTP responses, keyed by the URL and the request headers.
+
+    Each entry is a pair of files: '{key}.body' holding the raw content and '{key}.json' holding the status, headers
+        and the time the entry was stored. The modified time of the '.json' file is bumped on every hit, and once the
+        cache grows past max_bytes the least recently used entries are removed.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, mode=MODE, ttl=TTL, max_bytes=MAX_BYTES):
+        """
+        :param cache_dir: str of the directory holding the cache.
+        :param mode: str, one of MODES.
+        :param ttl: number of seconds a response is served without revalidating it.
+        :param max_bytes: int for the size of all the cached bodies before old entries are evicted.
+        """
+        if mode not in MODES:
+            raise ValueError(f'Cache mode must be one of {MODES}, not {mode!r}')
+
+        self.cache_dir = cache_dir
+        self.mode = mode
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._size = None
+        self._lock = Lock()
+
+    @staticmethod
+    def key(url, headers=None):
+        """
+        :param url: str
+        :param headers: dict() of the request headers.
+        :return: str, the hex digest identifying the request.
+        """
+        headers = sorted((k.lower(), v) for k, v in (headers or dict()).items())
+        return hashlib.sha256(json.dumps([url, headers]).encode()).hexdigest()
+
+    def _paths(self, key):
+        entry_dir = path.join(self.cache_dir, key[:2])
+        return path.join(entry_dir, f'{key}.json'), path.join(entry_dir, f'{key}.body')
+
+    def _entries(self):
+        """:return: list() of (last used time, size, key) for every entry in the cache."""
+        entries = list()
+        if not path.exists(self.cache_dir):
+            return entries
+        for entry_dir in scandir(self.cache_dir):
+            if not entry_dir.is_dir():
+                continue
+            for entry in scandir(entry_dir.path):
+                if entry.name.endswith('.body'):
+                    key = entry.name[:-len('.body')]
+                    meta_file, _ = self._paths(key)
+                    try:
+                        entries.append((path.getmtime(meta_file), entry.stat().st_size, key))
+                    except FileNotFoundError:
+                        continue
+        return entries
+
+    def size(self):
+        """:return: int for the size in bytes of all the cached bodies."""
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            return self._size
+
+    def get(self, key):
+        """
+        :param key: str returned by self.key()
+        :return: dict() of the stored entry with the body under 'content', or None if not cached.
+        """
+        meta_file, body_file = self._paths(key)
+        try:
+            with open(meta_file) as f:
+                meta = json.load(f)
+            with open(body_file, 'rb') as f:
+                meta['content'] = f.read()
+            utime(meta_file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return meta
+
+    def put(self, key, response):
+        """
+        Stores a response, then evicts the least recently used entries if the cache is over its size.
+
+        :param key: str returned by self.key()
+        :param response: requests.Response
+        """
+        meta_file, body_file = self._paths(key)
+        makedirs(path.dirname(meta_file), exist_ok=True)
+
+        old_size = path.getsize(body_file) if path.exists(body_file) else 0
+        meta = {
+            'url': response.url,
+            'status_code': response.status_code,
+            'headers': dict(response.headers),
+            'encoding': response.encoding,
+            'stored': time.time(),
+        }
+
+        _write_atomic(body_file, response.content)
+        _write_atomic(meta_file, json.dumps(meta))
+
+        size = self.size()
+        with self._lock:
+            self._size = size + len(response.content) - old_size
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def touch(self, key):
+        """Marks an entry as freshly validated."""
+        meta_file, _ = self._paths(key)
+        with open(meta_file) as f:
+            meta = json.load(f)
+        meta['stored'] = time.time()
+        _write_atomic(meta_file, json.dumps(meta))
+
+    def evict(self):
+        """Removes the least recently used entries until the cache is within max_bytes."""
+        with self._lock:
+            entries = sorted(self._entries())
+            self._size = sum(size for _, size, _ in entries)
+            for _, size, key in entries:
+                if self._size <= self.max_bytes:
+                    break
+                for file in self._paths(key):
+                    try:
+                        remove(file)
+                    except FileNotFoundError:
+                        pass
+                self._size -= size
+                logging.debug(f'Evicted {key} from the cache')
+
+    @staticmethod
+    def _response(entry):
+        """Rebuilds a requests.Response out of a cache entry."""
+        response = Response()
+        response.url = entry['url']
+        response.status_code = entry['status_code']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.encoding = entry['encoding']
+        response._content = entry['content']
+        response.from_cache = True
+        return response
+
+    @staticmethod
+    def _blocked(response, session):
+        """
+        :return: Boolean, True if the response is a block or captcha page, which must not be replayed for the TTL.
+        """
+        limiter = getattr(session, 'rate_limiter', None) or get_rate_limiter()
+        return len(limiter.block_markers) > 0 and limiter.blocked(response.text)
+
+    def fetch(self, url, headers=None, session=None):
+        """
+        Gets a url, going through the cache according to self.mode.
+
+        :param url: str
+        :param headers: dict() of request headers. Part of the cache key.
+        :param session: requests.Session used on a cache miss. Defaults to the shared CollectorSession.
+        :return: requests.Response
+        """
+        session = get_session() if session is None else session
+        if self.mode == 'off':
+            return session.get(url, headers=headers)
+
+        key = self.key(url, headers)
+        entry = self.get(key)
+
+        if self.mode == 'replay':
+            if entry is None:
+                raise CacheMiss(f'{url} is not in the cache.')
+            return self._response(entry)
+
+        if entry is not None and time.time() - entry['stored'] < self.ttl:
+            return self._response(entry)
+
+        request_headers = dict(headers or dict())
+        if entry is not None:
+            entry_headers = CaseInsensitiveDict(entry['headers'])
+            if 'ETag' in entry_headers:
+                request_headers['If-None-Match'] = entry_headers['ETag']
+            if 'Last-Modified' in entry_headers:
+                request_headers['If-Modified-Since'] = entry_headers['Last-Modified']
+
+        response = session.get(url, headers=request_headers)
+        if response.status_code == 304 and entry is not None:
+            response.close()
+            self.touch(key)
+            return self._response(entry)
+
+        if response.status_code in CACHEABLE_STATUS_CODES and not self._blocked(response, session):
+            self.put(key, response)
+        response.from_cache = False
+        return response
+
+
+def get_cache():
+    """
+    Gets the process wide ResponseCache, creating it on first use.
+
+    :return: ResponseCache
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
+
+
+def cached_get(url, headers=None):
+    """
+    Gets a url through the shared ResponseCache and CollectorSession.
+
+    :param url: str
+    :param headers: dict() of request headers.
+    :return: requests.Response
+    """
+    return get_cache().fetch(url, headers=headers)
@@ -0,0 +1,209 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from os import path, makedirs, remove, replace, symlink
+from threading import Lock
+from uuid import uuid4
+
+from collectors.metrics import get_metrics
+from collectors.session import get_session
+from definitions import SETTINGS, PHOTOS_DIR
+
+DOWNLOAD_SETTINGS = SETTINGS.get('downloads', dict())
+
+WORKERS = DOWNLOAD_SETTINGS.get('workers', 4)  # files downloaded at once
+CHUNK_SIZE = DOWNLOAD_SETTINGS.get('chunk_size', 1024 * 1024)  # bytes read and written at a time
+REVALIDATE_AFTER = DOWNLOAD_SETTINGS.get('revalidate_after', 7 * 24 * 60 * 60)  # seconds a known url is trusted
+LINKS = DOWNLOAD_SETTINGS.get('links', True)  # also link each file into the person's directory
+
+MANIFEST = 'manifest.json'
+
+_downloader = None
+_downloader_lock = Lock()
+
+
+class Downloader:
+    """
+    Downloads files (ex: profile pictures) once, however many records, people and runs they turn up in.
+
+    Every file is stored under the SHA-256 of its content:
+        {root}/blobs/ab/ab12...ef.jpeg
+    and a person's directory only gets a manifest.json mapping their file names to those blobs, plus a symlink for
+        each file where the file system allows it. An index of the urls already downloaded, with their ETag and
+        Last-Modified headers, lets a known url be skipped outright, or revalidated with a conditional request once it
+        is older than revalidate_after.
+    """
+
+    def __init__(self, root=PHOTOS_DIR, workers=WORKERS, chunk_size=CHUNK_SIZE, revalidate_after=REVALIDATE_AFTER,
+                 links=LINKS, session=None):
+        """
+        :param root: str of the directory holding the blobs and the url index.
+        :param workers: int for the number of files downloaded at once by download_all().
+        :param chunk_size: int for the number of bytes read and written at a time.
+        :param revalidate_after: seconds before a known url is checked again with a conditional request.
+        :param links: Boolean, True to symlink the files into the person's directory next to the manifest.
+        :param session: requests.Session. Defaults to the shared CollectorSession.
+        """
+        self.root = root
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.revalidate_after = revalidate_after
+        self.links = links
+        self.session = session
+
+        makedirs(path.join(root, 'blobs'), exist_ok=True)
+        self._lock = Lock()
+        self._manifest_lock = Lock()
+        self._connection = sqlite3.connect(path.join(root, 'index.sqlite'), check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        with self._lock, self._connection:
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS urls (
+                    url TEXT PRIMARY KEY,
+                    blob TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    checked REAL NOT NULL
+                )""")
+
+    def _known(self, url):
+        with self._lock:
+            row = self._connection.execute('SELECT * FROM urls WHERE url = ?', (url, )).fetchone()
+        if row is None or not path.exists(path.join(self.root, row['blob'])):
+            return None
+        return dict(row)
+
+    def _remember(self, url, blob, headers=None):
+        headers = headers or dict()
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO urls (url, blob, etag, last_modified, checked) VALUES (?, ?, ?, ?, ?)',
+                (url, blob, headers.get('ETag'), headers.get('Last-Modified'), time.time()))
+
+    def _fetch(self, url, known=None, site=None):
+        """
+        Gets a url, conditionally if it is known, and stores the content under its hash.
+
+        :param site: str the bytes downloaded are counted for in collectors.metrics, if any.
+        :return: str of the blob's path relative to self.root
+        """
+        headers = dict()
+        if known is not None:
+            if known['etag']:
+                headers['If-None-Match'] = known['etag']
+            if known['last_modified']:
+                headers['If-Modified-Since'] = known['last_modified']
+
+        session = get_session() if self.session is None else self.session
+        with session.get(url, headers=headers, allow_redirects=True, stream=True) as res:
+            if res.status_code == 304 and known is not None:
+                self._remember(url, known['blob'], {'ETag': known['etag'], 'Last-Modified': known['last_modified']})
+                return known['blob']
+            res.raise_for_status()
+
+            extension = res.headers.get('content-type', 'application/octet-stream').split('/')[-1].split(';')[0]
+            tmp_file = path.join(self.root, 'blobs', f'{uuid4().hex}.tmp')
+            digest, size = hashlib.sha256(), 0
+            try:
+                with open(tmp_file, 'wb', buffering=self.chunk_size) as f:
+                    for block in res.iter_content(self.chunk_size):
+                        digest.update(block)
+                        f.write(block)
+                        size += len(block)
+
+                digest = digest.hexdigest()
+                blob = path.join('blobs', digest[:2], f'{digest}.{extension}')
+                makedirs(path.join(self.root, 'blobs', digest[:2]), exist_ok=True)
+                if path.exists(path.join(self.root, blob)):
+                    remove(tmp_file)
+                else:
+                    replace(tmp_file, path.join(self.root, blob))
+            except BaseException:
+                if path.exists(tmp_file):
+                    remove(tmp_file)
+                raise
+
+            self._remember(url, blob, res.headers)
+            if site is not None:
+                get_metrics().add_bytes(site, size)
+            return blob
+
+    def _link(self, blob, output_dir, output_file_name):
+        """Adds the file to the manifest of output_dir, and symlinks it there if the file system allows."""
+        file_name = f'{output_file_name}.{blob.rsplit(".", 1)[-1]}'
+        makedirs(output_dir, exist_ok=True)
+
+        with self._manifest_lock:
+            manifest_file = path.join(output_dir, MANIFEST)
+            try:
+                with open(manifest_file) as f:
+                    manifest = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                manifest = dict()
+            manifest[file_name] = path.join(self.root, blob)
+            with open(f'{manifest_file}.tmp', 'w') as f:
+                json.dump(manifest, f, indent=2, sort_keys=True)
+            replace(f'{manifest_file}.tmp', manifest_file)
+
+        link = path.join(output_dir, file_name)
+        if self.links and not path.lexists(link):
+            try:
+                symlink(path.join(self.root, blob), link)
+            except OSError:
+                # ex: Windows without the privilege to make symlinks. The manifest still has the file.
+                pass
+        return link
+
+    def download(self, url, output_dir, output_file_name, site=None):
+        """
+        Downloads a file into a person's directory, unless it is already stored.
+
+        :param url: str
+        :param output_dir: str of the directory getting the manifest (and link) of the file.
+        :param output_file_name: str of the file name, without its extension.
+        :param site: str the bytes downloaded are counted for in collectors.metrics, if any.
+        :return: str of the file's path in output_dir.
+        """
+        known = self._known(url)
+        if known is not None and time.time() - known['checked'] < self.revalidate_after:
+            blob = known['blob']
+        else:
+            blob = self._fetch(url, known, site)
+        return self._link(blob, output_dir, output_file_name)
+
+    def download_all(self, downloads, site=None):
+        """
+        Downloads several files at once, self.workers at a time. A file that fails is logged and left out.
+
+        :param downloads: list() of (url, output_dir, output_file_name)
+        :param site: str the bytes downloaded are counted for in collectors.metrics, if any.
+        :return: list() of the file's path in output_dir, or None for the files that failed, in the same order.
+        """
+        def _download(download):
+            try:
+                return self.download(*download, site=site)
+            except Exception as e:
+                logging.critical(f'Could not download {download[0]}: {e!r}')
+                return None
+
+        # Each download runs in a copy of the caller's context, so it goes through the caller's proxy.
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as executor:
+            futures = [executor.submit(copy_context().run, _download, download) for download in downloads]
+            return [future.result() for future in futures]
+
+
+def get_downloader():
+    """
+    Gets the process wide Downloader, creating it on first use.
+
+    :return: Downloader
+    """
+    global _downloader
+    with _downloader_lock:
+        if _downloader is None:
+            _downloader = Downloader()
+        return _downloader
@@ -16,3 +16,25 @@ class NoSuchMethod(CollectorErrors):
 class SiteSchemaChange(CollectorErrors):
     """Site has changed their Schema model."""
     pass
+
+
+class CacheMiss(CollectorErrors):
+    """The response isn't in the cache, and the cache isn't allowed to use the network."""
+    pass
+
+
+class NoBrowser(CollectorErrors):
+    """Every browser in the pool stayed in use for the whole checkout timeout."""
+    pass
+
+
+class Throttled(CollectorErrors):
+    """Site is refusing requests for now (ex: 429 Too Many Requests), and kept refusing them after backing off."""
+
+    def __init__(self, message='', retry_after=None):
+        """
+        :param message: str
+        :param retry_after: float of the seconds the site asked to wait, if it said.
+        """
+        super(Throttled, self).__init__(message)
+        self.retry_after = retry_after
@@ -0,0 +1,120 @@
+import json
+import logging
+import re
+
+from bs4 import BeautifulSoup as bs, SoupStrainer
+
+from definitions import SETTINGS
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+EXTRACT_SETTINGS = SETTINGS.get('extract', dict())
+
+# 'regex'    : scans the raw page bytes for the script tags, without parsing the page at all.
+# 'strainer' : BeautifulSoup, but only <script> tags are kept in the tree.
+# 'lxml'     : lxml's C HTML parser and an XPath query. Needs lxml installed.
+BACKENDS = ('regex', 'strainer', 'lxml')
+BACKEND = EXTRACT_SETTINGS.get('backend', 'regex')
+
+LD_JSON_TYPE = 'application/ld+json'
+PRELOADED_STATE = '__PRELOADED_STATE__'
+
+RE_LD_JSON = re.compile(
+    rb'<script[^>]*\stype\s*=\s*["\']?application/ld\+json["\']?[^>]*>(.*?)</script\s*>', re.DOTALL | re.IGNORECASE)
+RE_SCRIPT = re.compile(rb'<script[^>]*>(.*?)</script\s*>', re.DOTALL | re.IGNORECASE)
+
+
+def loads(data):
+    """
+    Decodes JSON with orjson when it is installed, and the standard library otherwise.
+
+    Some sites leave raw control characters (ex: new lines) inside their JSON strings, which strict decoders refuse,
+        so those payloads are decoded again without strict checks.
+
+    :param data: str or bytes
+    :return: the decoded JSON
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data, strict=False)
+
+
+def _as_bytes(page):
+    return page.encode('utf-8') if isinstance(page, str) else page
+
+
+def _backend(backend):
+    backend = BACKEND if backend is None else backend
+    if backend not in BACKENDS:
+        raise ValueError(f'Extract backend must be one of {BACKENDS}, not {backend!r}')
+    if backend == 'lxml' and lxml is None:
+        logging.warning('lxml is not installed, extracting with the strainer backend instead')
+        return 'strainer'
+    return backend
+
+
+def _scripts(page, backend, ld_json):
+    """
+    :param page: bytes of the page source.
+    :param backend: str, one of BACKENDS
+    :param ld_json: Boolean, True for only the ld+json scripts.
+    :return: list() of the text of each script, as str or bytes.
+    """
+    if backend == 'regex':
+        return (RE_LD_JSON if ld_json else RE_SCRIPT).findall(page)
+
+    if backend == 'lxml':
+        if len(page.strip()) == 0:
+            return list()
+        tree = lxml.html.fromstring(page)
+        query = f'//script[@type="{LD_JSON_TYPE}"]' if ld_json else '//script'
+        return [script.text or '' for script in tree.xpath(query)]
+
+    strainer = SoupStrainer('script', type=LD_JSON_TYPE) if ld_json else SoupStrainer('script')
+    return [script.string or '' for script in bs(page, 'html.parser', parse_only=strainer).find_all('script')]
+
+
+def ld_json(page, backend=None):
+    """
+    Pulls the payload of every <script type="application/ld+json"> tag out of a page, without building a full tree
+        of the page.
+
+    :param page: str or bytes of the page source.
+    :param backend: str, one of BACKENDS. Defaults to the "backend" of the "extract" settings.
+    :return: list() of the decoded payloads, in the order they are on the page.
+    """
+    payloads = list()
+    for script in _scripts(_as_bytes(page), _backend(backend), ld_json=True):
+        if len(script.strip()) > 0:
+            payloads.append(loads(script))
+    return payloads
+
+
+def preloaded_state(page, name=PRELOADED_STATE, backend=None):
+    """
+    Pulls the state a page hands to its javascript in a script like:
+        <script>var __PRELOADED_STATE__ = {...}</script>
+
+    :param page: str or bytes of the page source.
+    :param name: str of the javascript variable holding the state.
+    :param backend: str, one of BACKENDS. Defaults to the "backend" of the "extract" settings.
+    :return: the decoded state, or None if the page doesn't have it.
+    """
+    assignment = re.compile(rb'^\s*(?:var|let|const|window\.)?\s*' + re.escape(name.encode()) + rb'\s*=\s*')
+    for script in _scripts(_as_bytes(page), _backend(backend), ld_json=False):
+        script = _as_bytes(script)
+        match = assignment.match(script)
+        if match is not None:
+            return loads(script[match.end():].strip().rstrip(b';'))
+    return None
@@ -0,0 +1,232 @@
+import hashlib
+import json
+import sqlite3
+from datetime import datetime
+from os import path, makedirs
+from threading import Lock
+
+import pandas as pd
+
+from definitions import INDEX_DIR
+
+# Status of a record in a run, returned by RecordIndex.update()
+NEW = 'new'
+CHANGED = 'changed'
+UNCHANGED = 'unchanged'
+RELISTED = 'relisted'  # seen again after it was opted out
+
+BATCH_SIZE = 500  # record ids per SELECT, under SQLite's limit on query parameters
+
+_index = None
+_index_lock = Lock()
+
+
+def content_hash(record):
+    """
+    :param record: dict() of a site record.
+    :return: str, the hex digest of the record's content. Equal records give the same hash, whatever their key order.
+    """
+    return hashlib.sha1(json.dumps(record, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class RecordIndex:
+    """
+    Persistent index of every site record seen by the collectors, keyed by (site, @id).
+
+    Each record keeps a hash of its content, the runs it was first seen, last seen and last changed in, and whether
+        it has been opted out. The index is updated from each collector's data_from_website, so questions like "what
+        is new since the last run" or "what came back after an opt-out" are answered by a query on the index instead
+        of reading back every saved result.
+    """
+
+    def __init__(self, db_file=INDEX_DIR):
+        """
+        :param db_file: str of the SQLite file holding the index.
+        """
+        if path.dirname(db_file) != '':
+            makedirs(path.dirname(db_file), exist_ok=True)
+        self._lock = Lock()
+        self._connection = sqlite3.connect(db_file, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        with self._lock, self._connection:
+            self._connection.executescript("""
+                CREATE TABLE IF NOT EXISTS runs (
+                    id INTEGER PRIMARY KEY,
+                    site TEXT NOT NULL,
+                    person TEXT NOT NULL,
+                    started TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS runs_site_person ON runs (site, person);
+
+                CREATE TABLE IF NOT EXISTS records (
+                    site TEXT NOT NULL,
+                    record_id TEXT NOT NULL,
+                    person TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    first_seen TEXT NOT NULL,
+                    last_seen TEXT NOT NULL,
+                    first_run INTEGER NOT NULL,
+                    last_run INTEGER NOT NULL,
+                    changed_run INTEGER NOT NULL,
+                    opted_out INTEGER NOT NULL DEFAULT 0,
+                    opted_out_at TEXT,
+                    PRIMARY KEY (site, record_id)
+                );
+                CREATE INDEX IF NOT EXISTS records_first_run ON records (first_run);
+                CREATE INDEX IF NOT EXISTS records_opted_out ON records (opted_out);
+            """)
+
+    def _known(self, site, record_ids):
+        """:return: dict() of {record id: sqlite3.Row} for the record ids already in the index."""
+        known = dict()
+        for i in range(0, len(record_ids), BATCH_SIZE):
+            batch = record_ids[i:i + BATCH_SIZE]
+            rows = self._connection.execute(
+                f'SELECT * FROM records WHERE site = ? AND record_id IN ({", ".join("?" * len(batch))})',
+                [site, *batch])
+            known.update({row['record_id']: row for row in rows})
+        return known
+
+    def update(self, site, data, person=''):
+        """
+        Records a run of a collector: adds the records not seen before and updates the ones that were.
+
+        :param site: str, ex: 'Spokeo'
+        :param data: Pandas.DataFrame of site records indexed by '@id', such as AbstractCollector.data_from_website.
+        :param person: str naming the person the records were collected for.
+        :return: dict() of {record id: NEW, CHANGED, UNCHANGED or RELISTED}
+        """
+        now = datetime.now().isoformat()
+        records = data.astype(object).where(data.notna(), None).to_dict('index')
+        hashes = {str(record_id): content_hash(record) for record_id, record in records.items()}
+
+        statuses = dict()
+        with self._lock, self._connection:
+            run = self._connection.execute(
+                'INSERT INTO runs (site, person, started) VALUES (?, ?, ?)', (site, person, now)).lastrowid
+            known = self._known(site, list(hashes))
+
+            rows = list()
+            for record_id, record_hash in hashes.items():
+                row = known.get(record_id)
+                if row is None:
+                    statuses[record_id] = NEW
+                elif row['opted_out'] and now > row['opted_out_at']:
+                    statuses[record_id] = RELISTED
+                elif row['content_hash'] != record_hash:
+                    statuses[record_id] = CHANGED
+                else:
+                    statuses[record_id] = UNCHANGED
+                rows.append((site, record_id, person, record_hash, now, now, run, run, run))
+
+            self._connection.executemany("""
+                INSERT INTO records
+                    (site, record_id, person, content_hash, first_seen, last_seen, first_run, last_run, changed_run)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (site, record_id) DO UPDATE SET
+                    person = excluded.person,
+                    content_hash = excluded.content_hash,
+                    last_seen = excluded.last_seen,
+                    last_run = excluded.last_run,
+                    changed_run = CASE WHEN records.content_hash != excluded.content_hash
+                        THEN excluded.last_run ELSE records.changed_run END
+            """, rows)
+        return statuses
+
+    def mark_opted_out(self, site, record_ids, when=None):
+        """
+        :param site: str
+        :param record_ids: list() of str
+        :param when: datetime of the opt out. Defaults to now.
+        """
+        when = (datetime.now() if when is None else when).isoformat()
+        with self._lock, self._connection:
+            self._connection.executemany(
+                'UPDATE records SET opted_out = 1, opted_out_at = ? WHERE site = ? AND record_id = ?',
+                [(when, site, str(record_id)) for record_id in record_ids])
+
+    def _select(self, where, params, site=None, person=None):
+        if site is not None:
+            where, params = f'{where} AND records.site = ?', [*params, site]
+        if person is not None:
+            where, params = f'{where} AND records.person = ?', [*params, person]
+        with self._lock:
+            rows = self._connection.execute(
+                f'SELECT * FROM records WHERE {where} ORDER BY site, person, record_id', params).fetchall()
+        return pd.DataFrame([dict(row) for row in rows], columns=[
+            'site', 'record_id', 'person', 'content_hash', 'first_seen', 'last_seen', 'first_run', 'last_run',
+            'changed_run', 'opted_out', 'opted_out_at'])
+
+    def new(self, site=None, person=None, since=None):
+        """
+        The records seen for the first time in the last run of their site and person, or since a given time.
+
+        :param site: str, only this site's records.
+        :param person: str, only this person's records.
+        :param since: datetime or str 'YYYY-MM-DD'. Defaults to the last run.
+        :return: Pandas.DataFrame
+        """
+        if since is not None:
+            since = since.isoformat() if hasattr(since, 'isoformat') else str(since)
+            return self._select('first_seen >= ?', [since], site, person)
+        return self._select("""first_run = (
+            SELECT MAX(runs.id) FROM runs WHERE runs.site = records.site AND runs.person = records.person)""",
+                            list(), site, person)
+
+    def changed(self, site=None, person=None):
+        """
+        The records whose content changed in the last run of their site and person.
+
+        :return: Pandas.DataFrame
+        """
+        return self._select("""changed_run != first_run AND changed_run = (
+            SELECT MAX(runs.id) FROM runs WHERE runs.site = records.site AND runs.person = records.person)""",
+                            list(), site, person)
+
+    def relisted(self, site=None, person=None):
+        """
+        The records seen again after they were opted out.
+
+        :return: Pandas.DataFrame
+        """
+        return self._select('opted_out = 1 AND last_seen > opted_out_at', list(), site, person)
+
+    def last_run(self, site, person):
+        """
+        :param site: str, ex: 'Spokeo'
+        :param person: str naming the person the records were collected for.
+        :return: str of the ISO time of the last run of the site for the person, or None if it never ran.
+        """
+        with self._lock:
+            return self._connection.execute(
+                'SELECT MAX(started) FROM runs WHERE site = ? AND person = ?', (site, person)).fetchone()[0]
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute('SELECT COUNT(*) FROM records').fetchone()[0]
+
+
+def get_record_index():
+    """
+    Gets the process wide RecordIndex, creating it on first use.
+
+    :return: RecordIndex
+    """
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = RecordIndex()
+        return _index
+
+
+def report(index=None):
+    """Prints the records that are new since the last run, and the ones that came back after an opt-out."""
+    index = get_record_index() if index is None else index
+    for title, records in [('New', index.new()), ('Relisted after opt-out', index.relisted())]:
+        print(f'** {title} ({len(records.index)}) **')
+        for _, record in records.iterrows():
+            print(f'\t{record["site"]}\t{record["person"]}\t{record["record_id"]}')
+
+
+if __name__ == '__main__':
+    report()
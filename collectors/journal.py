@@ -0,0 +1,132 @@
+import json
+import logging
+from datetime import datetime
+from os import path, makedirs, remove, fsync
+from threading import Lock
+
+from collectors.people import PeopleRegistry, load_ignore
+from definitions import SETTINGS, JOURNAL_DIR
+
+JOURNAL_SETTINGS = SETTINGS.get('journal', dict())
+
+FSYNC = JOURNAL_SETTINGS.get('fsync', False)  # also flush every entry to disk, not only to the OS
+
+
+def person_key(person):
+    """
+    :param person: Pandas.Series or dict() of a person.
+    :return: str identifying the person in the journal, ex: 'john|allen|smith|ca'
+    """
+    return '|'.join(PeopleRegistry.key(person))
+
+
+class Journal:
+    """
+    Write-ahead journal of a collect_people_data batch.
+
+    One JSON line is appended for each (person, site) job as it is committed: the job's 'ignore' decisions and the
+        relatives it added. If the batch stops part way (a crash, a SiteSchemaChange, Ctrl-C) the journal still holds
+        every finished job, so a resumed batch replays those decisions into the people table and only runs the jobs
+        that are left.
+    """
+
+    def __init__(self, journal_file=JOURNAL_DIR, fsync_entries=FSYNC):
+        """
+        :param journal_file: str of the JSON lines file holding the journal.
+        :param fsync_entries: Boolean, True to wait for every entry to reach the disk.
+        """
+        self.journal_file = journal_file
+        self.fsync_entries = fsync_entries
+        self._file = None
+        self._lock = Lock()
+
+    def entries(self):
+        """:return: list() of dict(), every entry in the journal. A half written last line is ignored."""
+        if not path.exists(self.journal_file):
+            return list()
+
+        entries = list()
+        with open(self.journal_file, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logging.warning(f'Skipping an unreadable line in {self.journal_file}')
+        return entries
+
+    def completed(self):
+        """:return: set() of (person key, site) for every job in the journal."""
+        return {(entry['person'], entry['site']) for entry in self.entries()}
+
+    def record(self, person, site, ignore, relatives=None):
+        """
+        Appends a finished job to the journal.
+
+        :param person: Pandas.Series of the person.
+        :param site: str, ex: 'Spokeo'
+        :param ignore: dict() of the job's 'ignore' data.
+        :param relatives: Pandas.DataFrame of the relatives the job added to the people table.
+        """
+        if relatives is not None and len(relatives.index) > 0:
+            relatives = relatives.astype(object).where(relatives.notna(), None).to_dict('records')
+        else:
+            relatives = list()
+
+        line = json.dumps({
+            'time': datetime.now().isoformat(),
+            'person': person_key(person),
+            'site': site,
+            'ignore': ignore or dict(),
+            'relatives': relatives,
+        }, default=str)
+
+        with self._lock:
+            if self._file is None:
+                if path.dirname(self.journal_file) != '':
+                    makedirs(path.dirname(self.journal_file), exist_ok=True)
+                self._file = open(self.journal_file, 'a', encoding='utf-8')
+            self._file.write(f'{line}\n')
+            self._file.flush()
+            if self.fsync_entries:
+                fsync(self._file.fileno())
+
+    def replay(self, people):
+        """
+        Applies the journal to the people table, the way CollectionScheduler applied the jobs the first time.
+
+        :param people: Pandas.DataFrame of the people the batch started with.
+        :return: PeopleRegistry
+        """
+        from collectors.scheduler import merge_ignore
+
+        people = PeopleRegistry.from_frame(people.reset_index(drop=True))
+        entries = self.entries()
+        for entry in entries:
+            for relative in entry['relatives']:
+                people.add(relative)
+
+            person_index = people.position(entry['person'].split('|'))
+            if person_index is None:
+                logging.warning(f'{entry["person"]} is in the journal but not in the people being collected')
+                continue
+
+            ignore = load_ignore(people.get(person_index, 'ignore'))
+            ignore = merge_ignore(ignore, entry['ignore'])
+            if len(ignore) > 0:
+                people.update(person_index, ignore=ignore)
+
+        if len(entries) > 0:
+            print(f'** Resuming after {len(entries)} finished job{"s" if len(entries) != 1 else ""} **')
+        return people
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def clear(self):
+        """Removes the journal, once its batch has been saved."""
+        self.close()
+        if path.exists(self.journal_file):
+            remove(self.journal_file)
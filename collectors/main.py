@@ -1,27 +1,164 @@
+import argparse
+import json
+from datetime import date
+from os import path, remove, replace
 
 import pandas as pd
 
-from collectors import COLLECTORS
-from definitions import PEOPLE, NAMES_DIR
+from collectors import REGISTRY, get_collectors
+from collectors.journal import Journal
+from collectors.metrics import get_metrics
+from collectors.people import PeopleRegistry
+from collectors.scheduler import CollectionScheduler
+from collectors.session import preconnect
+from definitions import NAMES_DIR, SETTINGS
 
+BATCH_SETTINGS = SETTINGS.get('batch', dict())
 
-def collect_people_data(people: pd.DataFrame):
-    people = people.copy(deep=True).reset_index(drop=True)
-    i = 0
-    while True:
-        person, people = collect_person_data(people.iloc[i], people)
-        i += 1
-        if i == len(people.index):
-            break
+CHUNK_SIZE = BATCH_SETTINGS.get('chunk_size', 1000)  # people read from the input file, and collected, at a time
+# Columns of the output file, after any other columns of the input file.
+PEOPLE_COLUMNS = ['givenName', 'middleName', 'familyName', 'addressLocality', 'addressRegion', 'checkRelatives',
+                  'ignore']
+
+
+def collect_people_data(people: pd.DataFrame, workers: int = None, site_limits: dict = None,
+                        interactive: bool = None, resume: bool = False, journal: Journal = None):
+    """
+    Runs every Collector for every person, adding any relatives that are found to the end of the people DataFrame.
+
+    Every finished (person, site) job is written to a journal as it is committed. With resume, the journal left by a
+        batch that didn't finish is replayed into the people DataFrame and only the jobs it doesn't hold are run.
+
+    :param people: Pandas.DataFrame of all the people being collected.
+    :param workers: int for the number of collectors that may run at the same time. Defaults to the settings.
+    :param site_limits: dict() of {site: int} capping the collectors that may run at the same time for each site.
+    :param interactive: bool. When False questions go to the review queue (python -m collectors.review) instead of
+        being asked during the run. Defaults to the settings.
+    :param resume: bool. True to pick up from the journal of the last batch instead of starting over.
+    :param journal: Journal of the batch. Defaults to files/journal.jsonl
+    :return: Pandas.DataFrame
+
+    The timings, bytes and record counts of the run are saved to files/metrics.json (see collectors.metrics).
+    """
+    kwargs = dict() if interactive is None else {'interactive': interactive}
+    journal = Journal() if journal is None else journal
+
+    if resume:
+        people = journal.replay(people)
+    else:
+        journal.clear()
+
+    preconnect()
+    try:
+        people = CollectionScheduler(
+            people, workers=workers, site_limits=site_limits, journal=journal, **kwargs).run()
+    finally:
+        journal.close()
+        print(f'** Metrics saved to {get_metrics().write()} **')
 
     people.to_csv(NAMES_DIR)
+    journal.clear()
 
     return people
 
 
-def collect_person_data(person: pd.Series, people: pd.DataFrame = None):
+def _checkpoint(checkpoint_file, input_rows=0, output_rows=0, output_bytes=0):
+    """Saves how far a collect_names_file run got, replacing the last checkpoint in one step."""
+    with open(f'{checkpoint_file}.tmp', 'w') as f:
+        json.dump({'input_rows': input_rows, 'output_rows': output_rows, 'output_bytes': output_bytes}, f)
+    replace(f'{checkpoint_file}.tmp', checkpoint_file)
+
+
+def collect_names_file(input_file=NAMES_DIR, output_file=None, sites=None, workers=None, since=None,
+                       interactive=None, resume=False, chunk_size=CHUNK_SIZE, journal=None):
+    """
+    Runs the Collectors for everyone in a csv file of people (see templates/persons_template.csv), reading and
+        collecting chunk_size people at a time so a file of any size is collected in the same memory.
+
+    Each chunk, with the relatives found for it, is appended to the output file as soon as it is done, and a checkpoint
+        ('{output}.checkpoint') records how far the run got. Within a chunk every finished job is in the journal, so
+        with resume the run picks up from the first unfinished job. Relatives are only checked against the people of
+        their own chunk.
+
+    :param input_file: str of the csv file of people.
+    :param output_file: str of the csv file the people are written to. Defaults to the input file, which is replaced
+        once every chunk is done.
+    :param sites: list() of collector names (see collectors.REGISTRY). Defaults to every collector.
+    :param workers: int for the number of collectors that may run at the same time. Defaults to the settings.
+    :param since: date or str 'YYYY-MM-DD'. Skips the sites that already collected a person since then.
+    :param interactive: bool. When False questions go to the review queue instead of being asked during the run.
+        Defaults to the settings.
+    :param resume: bool. True to pick up where the last run of the same output file stopped.
+    :param chunk_size: int for the number of people collected at a time.
+    :param journal: Journal of the chunks. Defaults to files/journal.jsonl
+    :return: int for the number of people written, including relatives.
+    """
+    in_place = output_file is None or path.abspath(output_file) == path.abspath(input_file)
+    partial_file = f'{input_file}.partial' if in_place else output_file
+    checkpoint_file = f'{partial_file}.checkpoint'
+    journal = Journal() if journal is None else journal
+    collectors = get_collectors(sites)
+    kwargs = dict() if interactive is None else {'interactive': interactive}
+
+    progress = {'input_rows': 0, 'output_rows': 0, 'output_bytes': 0}
+    if resume and path.exists(checkpoint_file):
+        with open(checkpoint_file) as f:
+            progress = json.load(f)
+    elif not resume:
+        journal.clear()
+    if path.exists(partial_file):
+        # Drops anything written after the checkpoint, it is collected again from the journal.
+        with open(partial_file, 'ab') as f:
+            f.truncate(progress['output_bytes'])
+    columns = None
+
+    preconnect()
+    try:
+        with pd.read_csv(input_file, index_col=0, chunksize=chunk_size,
+                         skiprows=range(1, progress['input_rows'] + 1)) as chunks:
+            for chunk in chunks:
+                chunk = chunk.fillna('')
+                columns = columns or [*chunk.columns, *[c for c in PEOPLE_COLUMNS if c not in chunk.columns]]
+                people = journal.replay(chunk) if resume else chunk
+                people = CollectionScheduler(
+                    people, collectors=collectors, workers=workers, journal=journal, since=since, **kwargs).run()
+
+                people = people.reindex(columns=columns).fillna('')
+                people.index = range(progress['output_rows'], progress['output_rows'] + len(people.index))
+                people.to_csv(partial_file, mode='a' if progress['output_bytes'] > 0 else 'w',
+                              header=progress['output_bytes'] == 0)
+
+                progress = {
+                    'input_rows': progress['input_rows'] + len(chunk.index),
+                    'output_rows': progress['output_rows'] + len(people.index),
+                    'output_bytes': path.getsize(partial_file),
+                }
+                _checkpoint(checkpoint_file, **progress)
+                journal.clear()
+                resume = False
+                print(f'** {progress["input_rows"]} people collected, {progress["output_rows"]} written **')
+    finally:
+        journal.close()
+        print(f'** Metrics saved to {get_metrics().write()} **')
+
+    if in_place and path.exists(partial_file):
+        replace(partial_file, input_file)
+    if path.exists(checkpoint_file):
+        remove(checkpoint_file)
+    return progress['output_rows']
+
+
+def collect_person_data(person: pd.Series, people: PeopleRegistry = None):
+    """
+    Runs every Collector for a single person, one after the other.
+
+    :param person: Pandas.Series of the person.
+    :param people: PeopleRegistry (or Pandas.DataFrame) of all the people being collected. Any relatives found are
+        added to it.
+    :return: tuple of (the updated person, PeopleRegistry)
+    """
     if people is None:
-        people = pd.DataFrame({}, columns=[
+        people = PeopleRegistry(columns=[
             'givenName',
             'middleName',
             'familyName',
@@ -30,21 +167,24 @@ def collect_person_data(person: pd.Series, people: pd.DataFrame = None):
             'checkRelatives',
             'none_relatives',
         ])
+    elif not isinstance(people, PeopleRegistry):
+        people = PeopleRegistry.from_frame(people)
 
     print(f'== {person.get("givenName", "___")} {person.get("familyName", "___")} ==')
 
-    for collector in COLLECTORS:
-        with collector(person) as c:
+    person_name = f'{person.get("givenName", "")} {person.get("familyName", "")}'
+    for collector in get_collectors():
+        with get_metrics().profile(collector.__name__, person_name), collector(person) as c:
             c.validate_data()
-            person = c.person.copy(deep=True)
+            person = c.person.to_series()
             relatives = c.check_relatives(people)
             if relatives is False:
                 continue
-            people = people.append(relatives, ignore_index=True)
+            for relative in relatives.to_dict('records'):
+                people.add(relative)
 
-    if person.get('name', '') in people.index:
-        people = people.drop(person.name).append(person, ignore_index=False).sort_index()
-        # people.loc[person.name] = person
+    if type(person.name) is int and person.name < len(people):
+        people.update(person.name, **person.to_dict())
 
     return person, people
 
@@ -103,8 +243,33 @@ def run_check(**kwargs):
     return True
 
 
-def main():
-    collect_people_data(PEOPLE)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Collects the Data Broker records of everyone in a csv file of people')
+    parser.add_argument('--input', default=NAMES_DIR, help='csv file of people (default: files/names.csv)')
+    parser.add_argument('--output', help='csv file the people, and the relatives found, are written to as they are '
+                                         'done (default: replace the input file at the end)')
+    parser.add_argument('--sites', nargs='+', choices=list(REGISTRY), help='collectors to run (default: all)')
+    parser.add_argument('--workers', type=int, help='collectors running at the same time (default: the settings)')
+    parser.add_argument('--since', type=date.fromisoformat, metavar='YYYY-MM-DD',
+                        help='skip the sites that already collected a person since this date')
+    parser.add_argument('--non-interactive', action='store_true',
+                        help='queue questions for python -m collectors.review instead of asking them')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='people collected at a time')
+    parser.add_argument('--resume', action='store_true',
+                        help='pick up where the last batch stopped instead of starting over')
+    parser.add_argument('--profile-site', action='append', default=list(), metavar='SITE',
+                        help='profile the runs of a collector with cProfile (\'*\' for every collector)')
+    parser.add_argument('--profile-person', action='append', default=list(), metavar='NAME',
+                        help='profile the runs for a person, ex: "John Smith"')
+    args = parser.parse_args(argv)
+
+    metrics = get_metrics()
+    metrics.profile_sites.update(args.profile_site)
+    metrics.profile_people.update(' '.join(name.lower().split()) for name in args.profile_person)
+
+    collect_names_file(args.input, args.output, sites=args.sites, workers=args.workers, since=args.since,
+                       interactive=False if args.non_interactive else None, resume=args.resume,
+                       chunk_size=args.chunk_size)
 
 
 if __name__ == '__main__':
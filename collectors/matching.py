@@ -0,0 +1,332 @@
+from collections import defaultdict
+from functools import lru_cache
+
+import numpy as np
+
+from collectors.abstract.main import MISMATCH_NAME, MISMATCH_LOCALITY, MATCH_AKA, MATCH_PERSON
+from definitions import SETTINGS
+
+MATCHING_SETTINGS = SETTINGS.get('matching', dict())
+
+MATCH_THRESHOLD = MATCHING_SETTINGS.get('match_threshold', 0.9)
+AKA_THRESHOLD = MATCHING_SETTINGS.get('aka_threshold', 0.65)
+WEIGHTS = MATCHING_SETTINGS.get('weights', {'edit': 0.4, 'phonetic': 0.4, 'tokens': 0.2})
+
+SOUNDEX_CODES = {
+    **dict.fromkeys('BFPV', '1'),
+    **dict.fromkeys('CGJKQSXZ', '2'),
+    **dict.fromkeys('DT', '3'),
+    'L': '4',
+    **dict.fromkeys('MN', '5'),
+    'R': '6',
+}
+VOWELS = 'AEIOU'
+
+
+@lru_cache(maxsize=65536)
+def soundex(name: str):
+    """
+    American Soundex code of a name, ex: Robert -> R163
+
+    :param name: str
+    :return: str of a letter and 3 digits, or '' for a name with no letters.
+    """
+    name = ''.join(c for c in name.upper() if 'A' <= c <= 'Z')
+    if len(name) == 0:
+        return ''
+
+    code = name[0]
+    last = SOUNDEX_CODES.get(name[0], '')
+    for c in name[1:]:
+        digit = SOUNDEX_CODES.get(c, '')
+        if digit != '' and digit != last:
+            code += digit
+        # H and W don't separate letters with the same code, vowels do.
+        if c not in 'HW':
+            last = digit
+    return (code + '000')[:4]
+
+
+@lru_cache(maxsize=65536)
+def metaphone(name: str, length: int = 6):
+    """
+    Metaphone style phonetic key of a name, ex: Smith -> SM0, Catherine -> K0RN.
+        Covers the common English rules, not every exception of the original algorithm.
+
+    :param name: str
+    :param length: int for the longest key returned.
+    :return: str
+    """
+    word = ''.join(c for c in name.upper() if 'A' <= c <= 'Z')
+    if len(word) == 0:
+        return ''
+
+    if word[:2] in ('AE', 'GN', 'KN', 'PN', 'WR'):
+        word = word[1:]
+    elif word[0] == 'X':
+        word = 'S' + word[1:]
+    elif word[:2] == 'WH':
+        word = 'W' + word[2:]
+
+    code = list()
+    i = 0
+    while i < len(word) and len(code) < length:
+        c = word[i]
+        prev = word[i - 1] if i > 0 else ''
+        nxt = word[i + 1] if i + 1 < len(word) else ''
+        nxt2 = word[i + 2] if i + 2 < len(word) else ''
+        skip = 0
+
+        if c == prev and c != 'C':
+            pass
+        elif c in VOWELS:
+            if i == 0:
+                code.append(c)
+        elif c == 'B':
+            if not (prev == 'M' and i == len(word) - 1):
+                code.append('B')
+        elif c == 'C':
+            if nxt == 'H' or (nxt == 'I' and nxt2 == 'A'):
+                code.append('K' if prev == 'S' else 'X')
+                skip = 1 if nxt == 'H' else 0
+            elif nxt in ('I', 'E', 'Y'):
+                if prev != 'S':
+                    code.append('S')
+            else:
+                code.append('K')
+        elif c == 'D':
+            if nxt == 'G' and nxt2 in ('E', 'I', 'Y'):
+                code.append('J')
+                skip = 1
+            else:
+                code.append('T')
+        elif c == 'G':
+            if nxt == 'H' and nxt2 != '' and nxt2 not in VOWELS:
+                pass
+            elif nxt == 'N' and (nxt2 == '' or word[i + 1:] == 'NED'):
+                pass
+            elif nxt in ('I', 'E', 'Y') and prev != 'G':
+                code.append('J')
+            else:
+                code.append('K')
+        elif c == 'H':
+            if nxt in VOWELS and prev not in ('C', 'G', 'P', 'S', 'T'):
+                code.append('H')
+        elif c == 'K':
+            if prev != 'C':
+                code.append('K')
+        elif c == 'P':
+            code.append('F' if nxt == 'H' else 'P')
+        elif c == 'Q':
+            code.append('K')
+        elif c == 'S':
+            if nxt == 'H' or (nxt == 'I' and nxt2 in ('O', 'A')):
+                code.append('X')
+                skip = 1 if nxt == 'H' else 0
+            else:
+                code.append('S')
+        elif c == 'T':
+            if nxt == 'I' and nxt2 in ('O', 'A'):
+                code.append('X')
+            elif nxt == 'H':
+                code.append('0')
+                skip = 1
+            elif not (nxt == 'C' and nxt2 == 'H'):
+                code.append('T')
+        elif c == 'V':
+            code.append('F')
+        elif c in ('W', 'Y'):
+            if nxt in VOWELS:
+                code.append(c)
+        elif c == 'X':
+            code.extend(['K', 'S'])
+        elif c == 'Z':
+            code.append('S')
+        else:
+            code.append(c)
+        i += 1 + skip
+
+    return ''.join(code[:length])
+
+
+def levenshtein(word, candidates):
+    """
+    Edit distance between one word and every word of an array of candidates, computed one character of word at a
+        time across all the candidates at once.
+
+    :param word: str
+    :param candidates: list-like of str
+    :return: numpy.ndarray of int, one distance per candidate.
+    """
+    candidates = list(candidates)
+    if len(candidates) == 0:
+        return np.zeros(0, dtype=int)
+
+    lengths = np.fromiter((len(c) for c in candidates), dtype=int, count=len(candidates))
+    width = int(lengths.max()) if len(lengths) > 0 else 0
+    chars = np.zeros((len(candidates), width), dtype=np.int64)
+    for row, candidate in enumerate(candidates):
+        chars[row, :len(candidate)] = [ord(c) for c in candidate]
+
+    # Costs beyond the end of a shorter candidate are never read back, so the zero padding is harmless.
+    columns = np.arange(width + 1)
+    previous = np.tile(columns, (len(candidates), 1))
+    for i, c in enumerate(word, 1):
+        substitution = previous[:, :-1] + (chars != ord(c))
+        deletion = previous[:, 1:] + 1
+        current = np.empty_like(previous)
+        current[:, 0] = i
+        current[:, 1:] = np.minimum(substitution, deletion)
+        # Insertions chain along the row: current[j] = min over k <= j of current[k] + (j - k)
+        current = np.minimum.accumulate(current - columns, axis=1) + columns
+        previous = current
+
+    return previous[np.arange(len(candidates)), lengths]
+
+
+def edit_similarity(word, candidates):
+    """
+    :param word: str
+    :param candidates: list-like of str
+    :return: numpy.ndarray of float between 0 (nothing in common) and 1 (the same).
+    """
+    candidates = list(candidates)
+    longest = np.maximum(
+        np.fromiter((len(c) for c in candidates), dtype=int, count=len(candidates)),
+        len(word),
+    )
+    return 1 - levenshtein(word, candidates) / np.maximum(longest, 1)
+
+
+def token_set_similarity(tokens, candidates):
+    """
+    Jaccard similarity between a set of tokens and the tokens of each candidate.
+
+    :param tokens: set() of str
+    :param candidates: list-like of list() of str
+    :return: numpy.ndarray of float between 0 and 1.
+    """
+    tokens = set(tokens)
+    return np.fromiter(
+        (len(tokens & set(c)) / max(len(tokens | set(c)), 1) for c in candidates),
+        dtype=float,
+    )
+
+
+def _phonetic_similarity(name, candidates):
+    """
+    For each candidate: 1 if the Metaphone keys match, 0.75 if only the Soundex codes match or the candidate is the
+        name's initial, else 0.
+    """
+    name_metaphone, name_soundex = metaphone(name), soundex(name)
+    return np.fromiter(
+        (1.0 if metaphone(c) == name_metaphone else
+         0.75 if soundex(c) == name_soundex or (len(c) == 1 and c == name[:1]) else
+         0.0 for c in candidates),
+        dtype=float,
+    )
+
+
+class BlockingIndex:
+    """
+    Groups site records by the Soundex code of each word of their name, so a person is only scored against the
+        records that share the phonetic code of their family name instead of against every record (see
+        FuzzyMatcher.classify).
+    """
+
+    def __init__(self, names):
+        """
+        :param names: list-like of str, the name of each site record.
+        """
+        self._blocks = defaultdict(list)
+        for position, name in enumerate(names):
+            for key in {soundex(token) for token in str(name).split() if len(token) > 1}:
+                self._blocks[key].append(position)
+
+    @staticmethod
+    def key(family_name):
+        return soundex(family_name)
+
+    def candidates(self, family_name):
+        """
+        :param family_name: str
+        :return: list() of the positions of the records that could belong to someone with that family name.
+        """
+        return self._blocks.get(self.key(family_name), list())
+
+
+class FuzzyMatcher:
+    """
+    Scores how close site record names are to a person's name, combining edit distance, phonetic codes and the
+        overlap of the words in the names, then turns the scores into the MATCH_/MISMATCH_ constants used by
+        AbstractCollector.validate_data.
+    """
+
+    def __init__(self, match_threshold=MATCH_THRESHOLD, aka_threshold=AKA_THRESHOLD, weights=None):
+        """
+        :param match_threshold: float score from which a record is taken to be the person.
+        :param aka_threshold: float score from which a record is asked about as a possible A.K.A.
+        :param weights: dict() of {'edit': float, 'phonetic': float, 'tokens': float}
+        """
+        self.match_threshold = match_threshold
+        self.aka_threshold = aka_threshold
+        self.weights = {**WEIGHTS, **(weights or dict())}
+
+    def score(self, given_name, middle_name, family_name, candidate_names):
+        """
+        :param given_name: str
+        :param middle_name: str
+        :param family_name: str
+        :param candidate_names: list-like of str, the site record names.
+        :return: numpy.ndarray of float between 0 and 1, one per candidate.
+        """
+        given_name, middle_name, family_name = given_name.lower(), middle_name.lower(), family_name.lower()
+        candidates = [str(name).lower().split() or [''] for name in candidate_names]
+        firsts = [c[0] for c in candidates]
+        lasts = [c[-1] for c in candidates]
+        shorts = [f'{first} {last}' for first, last in zip(firsts, lasts)]
+
+        # Data Brokers sometimes flip the given and family names, so score both ways and keep the best.
+        edit = np.maximum(
+            edit_similarity(f'{given_name} {family_name}', shorts),
+            edit_similarity(f'{family_name} {given_name}', shorts),
+        )
+        phonetic = np.maximum(
+            (_phonetic_similarity(given_name, firsts) + _phonetic_similarity(family_name, lasts)) / 2,
+            (_phonetic_similarity(family_name, firsts) + _phonetic_similarity(given_name, lasts)) / 2,
+        )
+        tokens = token_set_similarity({given_name, family_name, *middle_name.split()}, candidates)
+
+        return (
+            self.weights['edit'] * edit +
+            self.weights['phonetic'] * phonetic +
+            self.weights['tokens'] * tokens
+        ) / sum(self.weights.values())
+
+    def classify(self, given_name, middle_name, family_name, candidate_names, same_place):
+        """
+        :param given_name: str
+        :param middle_name: str
+        :param family_name: str
+        :param candidate_names: list-like of str, the site record names.
+        :param same_place: numpy.ndarray of bool, True where the record has the person's Locality and Region.
+        :return: tuple of (numpy.ndarray of MATCH_/MISMATCH_ constants, numpy.ndarray of float scores)
+
+        Only the records in the family name's block of a BlockingIndex are scored. The others score 0, so they are
+            MISMATCH_NAME.
+        """
+        candidate_names = np.asarray(candidate_names, dtype=object)
+        scores = np.zeros(len(candidate_names))
+        if BlockingIndex.key(family_name) == '':
+            positions = np.arange(len(candidate_names))
+        else:
+            positions = np.array(BlockingIndex(candidate_names).candidates(family_name), dtype=int)
+        if len(positions) > 0:
+            scores[positions] = self.score(given_name, middle_name, family_name, candidate_names[positions])
+
+        checks = np.select(
+            [scores >= self.match_threshold, scores >= self.aka_threshold],
+            [np.where(same_place, MATCH_PERSON, MISMATCH_LOCALITY), MATCH_AKA],
+            default=MISMATCH_NAME,
+        )
+        return checks, scores
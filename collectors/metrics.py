@@ -0,0 +1,240 @@
+import cProfile
+import json
+import logging
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+from os import path, makedirs
+from threading import Lock
+
+from definitions import SETTINGS, METRICS_DIR, PROFILES_DIR
+
+METRICS_SETTINGS = SETTINGS.get('metrics', dict())
+
+# Upper bounds, in seconds, of the latency histogram buckets. A last bucket catches everything slower.
+BUCKETS = METRICS_SETTINGS.get('buckets', [0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300])
+PROFILE_SITES = METRICS_SETTINGS.get('profile_sites', list())  # ex: ["MyLife"], or ["*"] for every site
+PROFILE_PEOPLE = METRICS_SETTINGS.get('profile_people', list())  # ex: ["John Smith"]
+
+# Stages of a collector's run. Stages may nest: validate includes any human-wait within it.
+FETCH = 'fetch'
+PARSE = 'parse'
+NORMALIZE = 'normalize'
+VALIDATE = 'validate'
+HUMAN_WAIT = 'human-wait'
+DEEP_FETCH = 'deep-fetch'
+DOWNLOAD = 'download'
+SAVE = 'save'
+
+_metrics = None
+_metrics_lock = Lock()
+
+
+class Histogram:
+    """Latencies of one stage of one site, counted in fixed buckets."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, seconds):
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+    def quantile(self, q):
+        """:return: float, the upper bound of the bucket holding the q quantile (the max for the last bucket)."""
+        if self.count == 0:
+            return None
+        rank, seen = q * self.count, 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count > 0:
+                return self.buckets[i] if i < len(self.buckets) else self.max
+        return self.max
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'total': round(self.total, 6),
+            'mean': round(self.total / self.count, 6) if self.count > 0 else None,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'buckets': {
+                **{str(bound): count for bound, count in zip(self.buckets, self.counts)},
+                '+Inf': self.counts[-1],
+            },
+        }
+
+
+class Metrics:
+    """
+    Timings, bytes and record counts of the collectors, by site.
+
+    Collectors time their stages (FETCH, PARSE, ..., SAVE) with stage(), and add the bytes they transfer and the
+        records they find. summary() gives all of it as a dict(), and write() saves it as JSON at the end of a run.
+
+    profile() runs cProfile over a block when its site or person is in profile_sites or profile_people, and saves the
+        stats for pstats (or snakeviz) to read.
+    """
+
+    def __init__(self, buckets=BUCKETS, profile_sites=PROFILE_SITES, profile_people=PROFILE_PEOPLE,
+                 profiles_dir=PROFILES_DIR):
+        """
+        :param buckets: list() of the upper bounds, in seconds, of the latency histogram buckets.
+        :param profile_sites: list() of the sites to profile. '*' profiles every site.
+        :param profile_people: list() of the names ('Given Family') of the people to profile.
+        :param profiles_dir: str of the directory the profiles are saved in.
+        """
+        self.buckets = buckets
+        self.profile_sites = set(profile_sites)
+        self.profile_people = {' '.join(name.lower().split()) for name in profile_people}
+        self.profiles_dir = profiles_dir
+        self._lock = Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = datetime.now()
+            self._stages = dict()  # {site: {stage: Histogram}}
+            self._bytes = dict()  # {site: int}
+            self._counts = dict()  # {site: {name: int}}
+
+    def observe(self, site, stage, seconds):
+        with self._lock:
+            histogram = self._stages.setdefault(site, dict()).get(stage)
+            if histogram is None:
+                histogram = self._stages[site][stage] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    @contextmanager
+    def stage(self, site, stage):
+        """
+        Times a block as a stage of a site:
+            with metrics.stage('Spokeo', FETCH):
+                ...
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(site, stage, time.perf_counter() - start)
+
+    def add_bytes(self, site, size):
+        with self._lock:
+            self._bytes[site] = self._bytes.get(site, 0) + size
+
+    def count(self, site, name, n=1):
+        """Adds n to a count of a site, ex: count('Spokeo', 'records', 12)"""
+        with self._lock:
+            counts = self._counts.setdefault(site, dict())
+            counts[name] = counts.get(name, 0) + n
+
+    def summary(self):
+        """:return: dict() of the run so far, ready for json.dump"""
+        with self._lock:
+            sites = sorted(set(self._stages) | set(self._bytes) | set(self._counts))
+            return {
+                'started': self.started.isoformat(),
+                'finished': datetime.now().isoformat(),
+                'elapsed': round((datetime.now() - self.started).total_seconds(), 3),
+                'sites': {
+                    site: {
+                        'stages': {
+                            stage: histogram.to_dict() for stage, histogram in self._stages.get(site, dict()).items()
+                        },
+                        'bytes': self._bytes.get(site, 0),
+                        'counts': dict(self._counts.get(site, dict())),
+                    } for site in sites
+                },
+            }
+
+    def write(self, summary_file=METRICS_DIR):
+        """
+        Saves summary() as JSON.
+
+        :param summary_file: str
+        :return: str of the file written.
+        """
+        if path.dirname(summary_file) != '':
+            makedirs(path.dirname(summary_file), exist_ok=True)
+        with open(summary_file, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+        return summary_file
+
+    def profiling(self, site, person_name=''):
+        """:return: Boolean, True if runs of this site or person are profiled."""
+        return any([
+            '*' in self.profile_sites,
+            site in self.profile_sites,
+            ' '.join(person_name.lower().split()) in self.profile_people,
+        ])
+
+    @contextmanager
+    def profile(self, site, person_name=''):
+        """
+        Profiles a block with cProfile if profiling() is True for the site or person, and saves the stats to
+            {profiles_dir}/{site}_{person}_{time}.prof
+        """
+        if not self.profiling(site, person_name):
+            yield
+            return
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as e:
+            # Only one profiler may run at a time (ex: two profiled jobs on different threads).
+            logging.warning(f'Not profiling {site} for {person_name}: {e}')
+            profiler = None
+
+        try:
+            yield
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                makedirs(self.profiles_dir, exist_ok=True)
+                profile_file = path.join(self.profiles_dir, '{site}_{person}_{time}.prof'.format(
+                    site=site,
+                    person='_'.join(person_name.split()) or 'all',
+                    time=datetime.now().strftime('%Y%m%d%H%M%S')))
+                profiler.dump_stats(profile_file)
+                print(f'** Profile saved to {profile_file} **')
+
+
+def get_metrics():
+    """
+    Gets the process wide Metrics, creating it on first use.
+
+    :return: Metrics
+    """
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = Metrics()
+        return _metrics
+
+
+def timed(stage):
+    """
+    Decorates a collector method to time it as a stage of the collector's site (see AbstractCollector.stage).
+
+    :param stage: str, ex: VALIDATE
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.stage(stage):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -1,21 +1,41 @@
 import logging
-import time
-import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import urljoin
 
 from bs4 import BeautifulSoup as bs
-from selenium.common.exceptions import StaleElementReferenceException
-import pandas as pd
+from requests.exceptions import RequestException
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as ec
+from selenium.webdriver.support.ui import WebDriverWait
 
-from definitions import STATES, SCROLL_PAUSE_TIME
+from definitions import STATES, SETTINGS
 from collectors import SeleniumCollector
-from collectors.errors import NoRecords
+from collectors.abstract import site_base_url
+from collectors.errors import NoRecords, SiteSchemaChange
+from collectors.extract import ld_json
+from collectors.metrics import timed, FETCH, DEEP_FETCH
+from collectors.records import SiteRecord
+from collectors.session import get_session
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 # logging.disable(logging.CRITICAL)
 
 BASE_URL = 'https://www.mylife.com/'
 
+MYLIFE_SETTINGS = SETTINGS.get('mylife', dict())
+DEEP_WORKERS = MYLIFE_SETTINGS.get('deep_workers', 2)  # record pages loaded at once, also capped by the browser pool
+WAIT_TIMEOUT = MYLIFE_SETTINGS.get('wait_timeout', 10)  # seconds to wait for a page to show what we're waiting on
+SCROLL_TIMEOUT = MYLIFE_SETTINGS.get('scroll_timeout', 3)  # seconds without new hits before the list is done
+POLL_INTERVAL = MYLIFE_SETTINGS.get('poll_interval', 0.1)  # seconds between checks while waiting
+
+# A JSON search backend for the search page. Off by default: the search goes through the browser unless a "url" is
+#   set. The request and response shape (X-Algolia headers, facetFilters, hits and nbPages) is an assumption, modelled
+#   on an Algolia InstantSearch query API, not something MyLife is known to serve. Check it against the site first.
+SEARCH_API = MYLIFE_SETTINGS.get('search_api', dict())
+
+SEARCH_HIT_FIELDS = ('url', 'name', 'location')  # fields every hit from the search backend must have
+
 STATES = {STATE: ABBRIVIATION for ABBRIVIATION, STATE in STATES.items()}
 
 
@@ -30,11 +50,12 @@ class MyLife(SeleniumCollector):
             structure will be required.
     """
 
-    def __init__(self, person, **kwargs):
+    def __init__(self, person, base_url=None, **kwargs):
         """
         :param person: Pandas.Series representing an individual
+        :param base_url: str replacing BASE_URL, ex: a local mock broker. Defaults to the "base_urls" setting.
         """
-        super(MyLife, self).__init__(person, BASE_URL, **kwargs)
+        super(MyLife, self).__init__(person, site_base_url('MyLife', BASE_URL, base_url), **kwargs)
         self.url = urljoin(
             self.base_url,
             "pub-multisearch.pubview?search={first}+{last}".format(
@@ -43,6 +64,11 @@ class MyLife(SeleniumCollector):
         )
 
         self.auto_scroll = kwargs.get('auto_scroll', True)
+        self.deep_workers = kwargs.get('deep_workers', DEEP_WORKERS)
+        self.wait_timeout = kwargs.get('wait_timeout', WAIT_TIMEOUT)
+        self.scroll_timeout = kwargs.get('scroll_timeout', SCROLL_TIMEOUT)
+        self.search_api = {**SEARCH_API, **kwargs.get('search_api', dict())}
+        self.deep_data_errors = dict()
 
     def __enter__(self):
         try:
@@ -56,87 +82,206 @@ class MyLife(SeleniumCollector):
     def __exit__(self, exc_type, exc_val, exc_tb):
         super(MyLife, self).__exit__(exc_type, exc_val, exc_tb)
 
+    def _wait(self, driver, timeout=None):
+        """
+        Polls the page every POLL_INTERVAL seconds until a condition is met or the timeout runs out:
+            self._wait(driver).until(condition)
+
+        :param driver: selenium WebDriver
+        :param timeout: seconds. Defaults to self.wait_timeout
+        :return: WebDriverWait
+        """
+        return WebDriverWait(driver, self.wait_timeout if timeout is None else timeout, poll_frequency=POLL_INTERVAL)
+
+    @staticmethod
+    def _search_record(hit_url, name, current_city, past_addresses, work, high_school):
+        """
+        Builds a search result record, matching the desired schema, out of the fields shown for a search hit.
+
+        :param hit_url: str of the url to the record's page.
+        :param name: str of the name, ex: 'JOHN A SMITH, 42'
+        :param current_city: str, ex: 'SEATTLE, WA'
+        :param past_addresses: list() of str, ex: ['TACOMA, WA']
+        :param work: str of the work place, or None.
+        :param high_school: str of the high school, or None.
+        :return Dictionary: A dictionary with the cleaned data
+        """
+        hit_id = hit_url.split('/')[-1]
+        name = name.split(',')[0].title().split()
+
+        current_city = current_city.upper()
+
+        # Find all Addresses for search result.
+        address = list({a.upper().replace('.', '') for a in past_addresses})
+
+        # find the address that is most likely the current main address.
+        try:
+            address.insert(0, address.pop(address.index(current_city)))
+        except ValueError:
+            address.insert(0, current_city)
+
+        address = [
+            {
+                '@type': 'PostalAddress',
+                'addressLocality': locality.title(),
+                'addressRegion': region
+            } for locality, region in [a.split(', ') for a in address]]
+
+        work_location = {'@type': 'Place', 'name': work.title() if work is not None else ''}
+
+        alumni_of = {'@type': 'EducationalOrganization'}
+        if high_school is not None:
+            alumni_of['name'] = high_school.title()
+
+        return {
+            '@id': hit_id,
+            '@type': 'Person',
+            'name': ' '.join(name),
+            'givenName': name[0],
+            'middleName': ' '.join(name[1:-1]),
+            'familyName': name[-1],
+            'url': hit_url,
+            'address': address,
+            'workLocation': work_location,
+            'alumniOf': alumni_of,
+        }
+
+    def _search_refinements(self):
+        """:return: tuple of the (State abbreviation, City) to narrow the search down to."""
+        address_region = self.person.get('addressRegion', '')
+        address_region = STATES.get(address_region.upper(), address_region.upper())
+        return address_region, self.person.get('addressLocality').title()
+
+    @timed(FETCH)
     def get_data(self):
         """
         Takes self.url (for a general MyLife search), scrapes the site data, and adds
-            it to the self.data_from_website DataFrame.
+            it to self.site_records.
+
+        The search hits are read from a JSON search backend when the "search_api" of the "mylife" settings has a
+            "url" (off by default, see SEARCH_API), and from the search page in a browser otherwise. If the backend
+            can't be reached or doesn't answer in the expected shape, the fallback to the browser is logged.
 
         MyLife keeps its full data set on the page for the specific record, so self._gather_deep_data() can be used
             to pull that deeper data.
         :return: Boolean
         """
+        if self.search_api.get('url'):
+            try:
+                return self._get_api_data()
+            except (RequestException, SiteSchemaChange) as e:
+                logging.warning(f'{self.site} search backend failed, searching in the browser instead: {e!r}')
+
+        return self._get_browser_data()
+
+    def _get_api_data(self):
+        """
+        Queries the JSON search backend for the person's name, filtered by the State and City facets, and follows the
+            pages of hits. The backend is assumed to take and answer Algolia style queries (see SEARCH_API).
+
+        :return: Boolean
+        :raise SiteSchemaChange: if a response isn't JSON, or its hits aren't in the expected shape.
+        """
         def _clean_search_hit(search_hit):
             """
-            Takes in a search result hit as a BeautifySoup tag and pulls out all the data to match the desired schema.
+            Takes in a search result hit from the search backend and pulls out all the data to match the desired
+                schema.
 
-            :param search_hit:
+            :param search_hit: dict()
             :return Dictionary: A dictionary with the cleaned data
             """
+            expected = type(search_hit) is dict and all(type(search_hit.get(k)) is str for k in SEARCH_HIT_FIELDS)
+            if not expected or ', ' not in search_hit['location']:
+                raise SiteSchemaChange(f'{self.site} search backend sent a hit in an unexpected shape: {search_hit!r}')
+            return self._search_record(
+                hit_url=urljoin(self.base_url, search_hit['url']),
+                name=search_hit['name'],
+                current_city=search_hit['location'],
+                past_addresses=search_hit.get('pastAddresses') or list(),
+                work=search_hit.get('work') or None,
+                high_school=search_hit.get('highSchool') or None,
+            )
 
-            hit_name = search_hit.find(class_='hit-name')
-            hit_url = hit_name.get('href')
-            hit_id = hit_url.split('/')[-1]
-            name = hit_name.get_text().split(',')[0].title().split()
+        address_region, address_locality = self._search_refinements()
+        headers = {
+            header: self.search_api[setting] for header, setting in (
+                ('X-Algolia-Application-Id', 'app_id'),
+                ('X-Algolia-API-Key', 'api_key'),
+            ) if self.search_api.get(setting)
+        }
+        query = {
+            'query': '{first} {last}'.format(
+                first=self.person.get('givenName', ''),
+                last=self.person.get('familyName', '')),
+            'facetFilters': [
+                f'{self.search_api.get("state_facet", "STATE")}:{address_region}',
+                f'{self.search_api.get("city_facet", "CITY")}:{address_locality}',
+            ],
+            'hitsPerPage': self.search_api.get('hits_per_page', 100),
+        }
+
+        search_results, page, pages = list(), 0, 1
+        while page < min(pages, self.search_api.get('max_pages', 10)):
+            res = get_session().post(self.search_api['url'], json={**query, 'page': page}, headers=headers)
+            with res:
+                res.raise_for_status()
+                self._metrics().add_bytes(self.site, len(res.content))
+                try:
+                    results = res.json()
+                except ValueError:
+                    self._raise_site_schema_change()
 
-            current_city = search_hit.find(class_='hit-location').get_text().upper()
+            if type(results) is not dict or type(results.get('hits')) is not list:
+                self._raise_site_schema_change()
+            search_results.extend(_clean_search_hit(hit) for hit in results['hits'])
+            pages = results.get('nbPages', 1)
+            page += 1
 
-            # Find all Addresses for search result.
-            try:
-                address = search_hit.find(class_='hit-pastAddresses').find_all(class_='hit-values')
-                address = list({a.text.upper().replace('.', '') for a in address})
-            except AttributeError:
-                address = list()
+        if len(search_results) == 0:
+            return False
 
-            # find the address that is most likely the current main address.
-            try:
-                address.insert(0, address.pop(address.index(current_city)))
-            except ValueError:
-                address.insert(0, current_city)
-
-            address = [
-                {
-                    '@type': 'PostalAddress',
-                    'addressLocality': locality.title(),
-                    'addressRegion': region
-                } for locality, region in [a.split(', ') for a in address]]
-
-            work_location = {'@type': 'Place'}
-            try:
-                work_location['name'] = search_hit\
-                    .find(class_='hit-work')\
-                    .find(class_='hit-values')\
-                    .get_text()\
-                    .title()
-            except AttributeError:
-                work_location['name'] = ''
+        self.site_records = [SiteRecord.from_dict(search_result) for search_result in search_results]
+        return True
 
-            alumni_of = {'@type': 'EducationalOrganization'}
-            try:
-                alumni_of['name'] = search_hit\
-                    .find(class_='hit-high-school')\
-                    .find(class_='hit-values')\
-                    .get_text().title()
-            except AttributeError:
-                pass
+    def _get_browser_data(self):
+        """
+        Searches on the search page in a browser, narrowing the search down with the State and City options and
+            scrolling until every hit is on the page.
 
-            return {
-                '@id': hit_id,
-                '@type': 'Person',
-                'name': ' '.join(name),
-                'givenName': name[0],
-                'middleName': ' '.join(name[1:-1]),
-                'familyName': name[-1],
-                'url': hit_url,
-                'address': address,
-                'workLocation': work_location,
-                'alumniOf': alumni_of,
-            }
+        :return: Boolean
+        """
+        def _clean_search_hit(search_hit):
+            """
+            Takes in a search result hit as a BeautifySoup tag and pulls out all the data to match the desired schema.
 
-        def _refine_search(search_str, options):
+            :param search_hit:
+            :return Dictionary: A dictionary with the cleaned data
+            """
+            def _values(class_):
+                try:
+                    return search_hit.find(class_=class_).find_all(class_='hit-values')
+                except AttributeError:
+                    return list()
+
+            hit_name = search_hit.find(class_='hit-name')
+            work = _values('hit-work')
+            high_school = _values('hit-high-school')
+
+            return self._search_record(
+                hit_url=hit_name.get('href'),
+                name=hit_name.get_text(),
+                current_city=search_hit.find(class_='hit-location').get_text(),
+                past_addresses=[a.text for a in _values('hit-pastAddresses')],
+                work=work[0].get_text() if len(work) > 0 else None,
+                high_school=high_school[0].get_text() if len(high_school) > 0 else None,
+            )
+
+        def _refine_search(driver, search_str, options):
             """
             Takes a list of WebElements and a search string, looks for string in the text of each WebElement, and
                 press the option if found. Returns Boolean for found status
 
+            :param driver: the selenium WebDriver showing the search.
             :param search_str: str of the desired option.
             :param options: list of WebElements from Beautify Soup that represents all of the available options.
             :return:
@@ -149,7 +294,11 @@ class MyLife(SeleniumCollector):
                     logging.info(f'Option Checked: {option_text}')
                     if search_str in option_text:
                         option.click()
-                        time.sleep(2)
+                        # The refinement lists are re-rendered once the refined hits are in.
+                        try:
+                            self._wait(driver).until(ec.staleness_of(option))
+                        except TimeoutException:
+                            logging.info('Refinement list was not re-rendered')
                         logging.info(f'Option Selected: {option_text}')
                         return True
                 else:
@@ -159,7 +308,7 @@ class MyLife(SeleniumCollector):
             except StaleElementReferenceException as e:
                 ChromeCrash(e)
 
-        with self.driver(executable_path=self.DRIVER_DIR) as driver:
+        with self.browser() as driver:
             driver.get(self.url)
 
             """
@@ -168,44 +317,45 @@ class MyLife(SeleniumCollector):
             """
             driver.fullscreen_window()
 
+            address_region, address_locality = self._search_refinements()
+
             # Refine the search by State
-            address_region = self.person.get('addressRegion', '')
-            address_region = STATES.get(address_region.upper(), address_region.upper())
             region_options = driver\
                 .find_element_by_class_name("STATE")\
                 .find_elements_by_class_name("refinementList-text")
 
-            if not _refine_search(address_region, region_options):
+            if not _refine_search(driver, address_region, region_options):
                 return False
 
             # Narrow the search by pressing a City option
-            address_locality = self.person.get('addressLocality').title()
             locality_options = driver\
                 .find_element_by_class_name("CITY")\
                 .find_elements_by_class_name("refinementList-text")
 
-            if not _refine_search(address_locality, locality_options):
+            if not _refine_search(driver, address_locality, locality_options):
                 return False
 
             """
-            The Page Loads dynamically, so we need to scroll down the page to show all the search results. It needs to
-                be done in steps with a pause between movements to allow for loading. 
-            Here it will first get the current location on the page, attempt to move down the page, and then check to
-                see if the location changed.
+            The Page Loads dynamically, so we need to scroll down the page to show all the search results. Each scroll
+                to the bottom of the page loads another set of hits, so after each scroll wait for the number of hits
+                to go up. Once no new hits show up within self.scroll_timeout all the results are on the page.
             """
 
-            if self.auto_scroll and len(driver.find_elements_by_class_name("ais-InfiniteHits-item")) > 15:
-                current_height, new_height = 0, driver.execute_script("return document.body.scrollHeight")
+            def _hit_count(driver_):
+                return len(driver_.find_elements_by_class_name("ais-InfiniteHits-item"))
 
-                while new_height != current_height:
+            hit_count = _hit_count(driver)
+            if self.auto_scroll and hit_count > 15:
+                while True:
                     # Scroll down to the bottom of the page
                     driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
 
-                    # Wait to load page
-                    time.sleep(SCROLL_PAUSE_TIME)
-
-                    # Calculate new scroll height and compare with last scroll height
-                    current_height, new_height = new_height, driver.execute_script("return document.body.scrollHeight")
+                    # Wait for more hits to load
+                    try:
+                        hit_count = self._wait(driver, self.scroll_timeout).until(
+                            lambda driver_: _hit_count(driver_) > hit_count and _hit_count(driver_))
+                    except TimeoutException:
+                        break
 
             page_source = driver.page_source
         page_soup = bs(page_source, 'html.parser')
@@ -213,8 +363,7 @@ class MyLife(SeleniumCollector):
         for i, search_result in enumerate(search_results):
             search_results[i] = _clean_search_hit(search_result)
 
-        self.data_from_website = pd.DataFrame(search_results)
-        self.data_from_website.set_index('@id', inplace=True)
+        self.site_records = [SiteRecord.from_dict(search_result) for search_result in search_results]
         return True
 
     def _deep_data(self, url):
@@ -224,6 +373,35 @@ class MyLife(SeleniumCollector):
         :param url: url for which a deeper set of data is to be gathered.
         :return:
         """
+        return self._parse_deep_page(self._deep_page(url))
+
+    def _deep_page(self, url):
+        """
+        Loads the page for a specific MyLife record in a browser from the pool.
+
+        :param url: url for which a deeper set of data is to be gathered.
+        :return: str of the page source
+        """
+        with self.browser() as driver:
+            driver.get(url)
+            driver.fullscreen_window()
+            try:
+                self._wait(driver).until(
+                    ec.presence_of_element_located((By.CSS_SELECTOR, 'script[type="application/ld+json"]')))
+            except TimeoutException:
+                # Left to self._parse_deep_page to report the missing data.
+                pass
+            page_source = driver.page_source
+        self._metrics().add_bytes(self.site, len(page_source))
+        return page_source
+
+    def _parse_deep_page(self, txt):
+        """
+        Scrapes the JSON data, and the data only shown in the HTML, from the page for a specific MyLife record.
+
+        :param txt: str of the page source, from self._deep_page(url)
+        :return: dict()
+        """
         def _nested_persons(persons):
             _persons = list()
             for person_ in persons:
@@ -240,19 +418,12 @@ class MyLife(SeleniumCollector):
                 _persons.append(person)
             return _persons
 
-        with self.driver(self.DRIVER_DIR) as driver:
-            driver.get(url)
-            driver.fullscreen_window()
-            time.sleep(2)
-            txt = driver.page_source
-
         soup = bs(txt, 'html.parser')
 
-        profile_data = soup.find(type="application/ld+json")
-        if profile_data is None:
+        try:
+            profile_data = ld_json(txt)[0]
+        except IndexError:
             self._raise_site_schema_change()
-        profile_data = profile_data.string
-        profile_data = json.loads(profile_data, strict=False)
         profile_data['@id'] = profile_data.pop('@id').split('/')[-1]
 
         try:
@@ -382,32 +553,53 @@ class MyLife(SeleniumCollector):
         profile_data['pictures'] = list({photo['src'] for photo in soup.find_all(class_='profile-picture-holder')})
         return profile_data
 
+    @timed(DEEP_FETCH)
     def _gather_deep_data(self):
         """
-        Gathers the data that is deeper within the website by calling self._deep_data(url) for each record found
-            during the general search in self.get_data()
-        """
+        Gathers the data that is deeper within the website for each record found during the general search in
+            self.get_data(). Up to self.deep_workers record pages are loaded at once, each page is parsed as soon as
+            it arrives, and the records keep the order of the search.
 
-        cleaned_data_from_website = list()
+        A record whose page can't be loaded or read is left out, and its error is kept in self.deep_data_errors
+            ({record id: Exception}) rather than stopping the other records.
+        """
+        self.deep_data_errors = dict()
+        record_ids = [site_record.id for site_record in self.site_records]
+        cleaned_data_from_website = [None] * len(record_ids)
+
+        with ThreadPoolExecutor(max_workers=max(1, self.deep_workers)) as executor:
+            pages = {
+                executor.submit(self._deep_page, site_record.get('url')): i
+                for i, site_record in enumerate(self.site_records)
+            }
+            for page in as_completed(pages):
+                i = pages[page]
+                try:
+                    cleaned_data_from_website[i] = self._parse_deep_page(page.result())
+                except Exception as e:
+                    logging.error(f'{self.site} record {record_ids[i]} could not be read: {e!r}')
+                    self.deep_data_errors[record_ids[i]] = e
 
-        for i, search_result in self.data_from_website.iterrows():
-            cleaned_data_from_website.append(self._deep_data(search_result.url))
+        if len(self.deep_data_errors) > 0:
+            print('\t** {count} record{s} could not be read **'.format(
+                count=len(self.deep_data_errors),
+                s='s' if len(self.deep_data_errors) != 1 else ''))
 
-        cleaned_data_from_website = pd.DataFrame(cleaned_data_from_website)
-        if len(cleaned_data_from_website) == 0:
-            cleaned_data_from_website['@id'] = '0'
-        cleaned_data_from_website.set_index('@id', inplace=True)
-        self.data_from_website = cleaned_data_from_website
+        self.site_records = [SiteRecord.from_dict(r) for r in cleaned_data_from_website if r is not None]
 
     def validate_data(self):
         self.person = super(MyLife, self).validate_data()
-        if len(self.data_from_website) > 0:
+        if len(self.site_records) > 0:
             self._gather_deep_data()
 
-        for record_id, record in self.data_from_website.iterrows():
-            for i, picture in enumerate(record.get('pictures', list())):
+        pictures = list()
+        for record in self.site_records:
+            record_pictures = record.get('pictures', list())
+            for i, picture in enumerate(record_pictures if type(record_pictures) is list else list()):
                 if not 'profile-placeholder' in picture:
-                    self.download_file(picture, f'{i}_{record_id}')
+                    pictures.append((picture, f'{i}_{record.id}'))
+        if len(pictures) > 0:
+            self.download_files(pictures)
 
         return self.person
 
@@ -0,0 +1,153 @@
+import ast
+import json
+
+import pandas as pd
+
+from definitions import STATES
+
+STATE_ABBREVIATIONS = {state: abbreviation for abbreviation, state in STATES.items()}
+
+
+def load_ignore(ignore):
+    """
+    Reads a person's 'ignore' cell. The review writes it as JSON. A people file saved straight from a DataFrame holds
+        the repr() of the dict instead, which is read as a Python literal, so names such as O'Brien survive either way.
+
+    :param ignore: dict(), str, or a missing value (None, NaN, '').
+    :return: dict()
+    """
+    if type(ignore) is dict:
+        return ignore
+    if type(ignore) is not str or ignore.strip() == '':
+        return dict()
+    try:
+        return json.loads(ignore)
+    except json.JSONDecodeError:
+        return ast.literal_eval(ignore)
+
+
+def _normalize(value):
+    """:return: str, lower case with single spaces. Missing values (None, NaN) give ''."""
+    if type(value) is not str:
+        return ''
+    return ' '.join(value.lower().split())
+
+
+def _normalize_region(region):
+    """:return: str of the State abbreviation, ex: 'California' -> 'ca'"""
+    region = ' '.join(region.upper().split()) if type(region) is str else ''
+    return STATE_ABBREVIATIONS.get(region, region).lower()
+
+
+class PeopleRegistry:
+    """
+    The people being collected, kept as a list of rows with a dict index on their names.
+
+    A pandas DataFrame copies itself on every append, which makes growing the people table one relative at a time
+        quadratic over a batch. The registry appends in amortized constant time, updates rows in place, and finds a
+        person by name in constant time. It is turned into a DataFrame with to_frame() when it is saved.
+    """
+
+    def __init__(self, columns=None):
+        """
+        :param columns: list() of str, the columns to start with.
+        """
+        self.columns = list(columns) if columns is not None else list()
+        self._rows = list()
+        self._keys = dict()  # {key(): row position}
+        self._names = dict()  # {(given name, family name): row position}
+
+    @classmethod
+    def from_frame(cls, people):
+        """
+        :param people: Pandas.DataFrame of people.
+        :return: PeopleRegistry, with the people in the order of the DataFrame.
+        """
+        registry = cls(people.columns)
+        for person in people.to_dict('records'):
+            registry.add(person)
+        return registry
+
+    @staticmethod
+    def key(person):
+        """
+        :param person: Pandas.Series or dict() of a person.
+        :return: tuple of the normalized (givenName, middleName, familyName, addressRegion)
+        """
+        return (
+            _normalize(person.get('givenName')),
+            _normalize(person.get('middleName')),
+            _normalize(person.get('familyName')),
+            _normalize_region(person.get('addressRegion')),
+        )
+
+    def _index(self, position):
+        person = self._rows[position]
+        self._keys.setdefault(self.key(person), position)
+        self._names.setdefault((_normalize(person.get('givenName')), _normalize(person.get('familyName'))), position)
+
+    def add(self, person):
+        """
+        Appends a person.
+
+        :param person: Pandas.Series or dict() of a person.
+        :return: int of the person's position.
+        """
+        person = dict(person)
+        for column in person:
+            if column not in self.columns:
+                self.columns.append(column)
+        self._rows.append(person)
+        self._index(len(self._rows) - 1)
+        return len(self._rows) - 1
+
+    def update(self, position, **fields):
+        """
+        Changes fields of a person in place.
+
+        :param position: int of the person's position.
+        :param fields: the fields to set, ex: ignore={...}
+        """
+        for column in fields:
+            if column not in self.columns:
+                self.columns.append(column)
+        self._rows[position].update(fields)
+        if {'givenName', 'middleName', 'familyName', 'addressRegion'} & set(fields):
+            self._index(position)
+
+    def find(self, person):
+        """
+        :param person: Pandas.Series or dict() with the name and addressRegion to look for.
+        :return: int of the position of the first person with the same key(), or None.
+        """
+        return self.position(self.key(person))
+
+    def position(self, key):
+        """
+        :param key: tuple returned by key()
+        :return: int of the position of the first person with that key, or None.
+        """
+        return self._keys.get(tuple(key))
+
+    def has_name(self, given_name, family_name):
+        """:return: Boolean, True if anyone has this given and family name."""
+        return (_normalize(given_name), _normalize(family_name)) in self._names
+
+    def get(self, position, column, default=None):
+        return self._rows[position].get(column, default)
+
+    def row(self, position):
+        """
+        :param position: int
+        :return: Pandas.Series of the person, with every column, named by its position like DataFrame.iloc
+        """
+        person = self._rows[position]
+        return pd.Series(
+            {column: person.get(column, float('nan')) for column in self.columns}, name=position, dtype=object)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def to_frame(self):
+        """:return: Pandas.DataFrame of everyone, in the order they were added."""
+        return pd.DataFrame(self._rows, columns=self.columns)
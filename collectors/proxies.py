@@ -0,0 +1,155 @@
+import logging
+import time
+from contextvars import ContextVar
+from threading import Lock
+
+from definitions import SETTINGS
+
+PROXY_SETTINGS = SETTINGS.get('proxies', dict())
+
+# ex: ["http://10.0.0.2:3128", "socks5://10.0.0.3:1080"]. SOCKS proxies need requests[socks] (PySocks) installed.
+URLS = PROXY_SETTINGS.get('urls', list())
+COOLDOWN = PROXY_SETTINGS.get('cooldown', 600)  # seconds a proxy is rested after a site blocks it
+MAX_FAILURES = PROXY_SETTINGS.get('max_failures', 3)  # connection failures in a row before a proxy is rested
+
+# The key requests are pinned to a proxy by, usually the person being collected (see AbstractCollector.__enter__).
+#   Requests made without a key go through the least busy proxy.
+PROXY_KEY = ContextVar('proxy_key', default=None)
+
+_pool = None
+_pool_lock = Lock()
+
+
+class Proxy:
+    """An egress proxy and its health."""
+
+    def __init__(self, url):
+        self.url = url
+        self.failures = 0  # connection failures in a row
+        self.rested_until = 0.0
+        self.assigned = 0  # keys pinned to this proxy
+
+    def healthy(self, now=None):
+        return (time.monotonic() if now is None else now) >= self.rested_until
+
+
+class ProxyPool:
+    """
+    Spreads requests across a pool of HTTP or SOCKS egress proxies.
+
+    Each key (ex: a person, or a browser) is pinned to one proxy, so a Data Broker sees a person's searches come from
+        a single address, and new keys go to the healthy proxy with the fewest keys. A proxy is rested for `cooldown`
+        seconds when a site blocks it, or after max_failures connection failures in a row, and the keys pinned to it
+        move to another proxy. collectors.throttle paces every proxy separately, so adding proxies adds throughput.
+        With no proxies configured every request goes out directly.
+    """
+
+    def __init__(self, urls=None, cooldown=COOLDOWN, max_failures=MAX_FAILURES):
+        """
+        :param urls: list() of str, the proxy urls. Defaults to the "urls" setting.
+        :param cooldown: seconds a proxy is rested after it is blocked or keeps failing.
+        :param max_failures: int for the connection failures in a row before a proxy is rested.
+        """
+        self.cooldown = cooldown
+        self.max_failures = max_failures
+        self._proxies = {url: Proxy(url) for url in (URLS if urls is None else urls)}
+        self._keys = dict()  # {key: proxy url}
+        self._holders = dict()  # {key: number of holders still using it}, see hold()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._proxies)
+
+    def assign(self, key=None, exclude=()):
+        """
+        :param key: str the proxy is pinned to. None to pick a proxy for a single request.
+        :param exclude: proxy urls not to use, ex: ones that just failed. The key is moved off them.
+        :return: str of the proxy url, or None if the pool is empty.
+        """
+        if len(self._proxies) == 0:
+            return None
+
+        with self._lock:
+            now = time.monotonic()
+            proxy = self._proxies.get(self._keys.get(key))
+            if proxy is not None and proxy.healthy(now) and proxy.url not in exclude:
+                return proxy.url
+            if proxy is not None:
+                proxy.assigned -= 1
+                del self._keys[key]
+
+            candidates = [p for p in self._proxies.values() if p.url not in exclude] or list(self._proxies.values())
+            healthy = [p for p in candidates if p.healthy(now)]
+            if len(healthy) > 0:
+                proxy = min(healthy, key=lambda p: p.assigned)
+            else:
+                proxy = min(candidates, key=lambda p: p.rested_until)
+                logging.warning(f'Every proxy is resting, using {proxy.url} early')
+
+            if key is not None:
+                self._keys[key] = proxy.url
+                proxy.assigned += 1
+            return proxy.url
+
+    def hold(self, key):
+        """
+        Marks a key as in use until a matching release(), ex: by each collector of a person. Several collectors may
+            collect the same person at once, and the key stays pinned until the last of them releases it.
+        """
+        with self._lock:
+            self._holders[key] = self._holders.get(key, 0) + 1
+
+    def release(self, key):
+        """Unpins a key, ex: once its person has been collected, unless other holders still use it."""
+        with self._lock:
+            holders = self._holders.pop(key, 0) - 1
+            if holders > 0:
+                self._holders[key] = holders
+                return
+            url = self._keys.pop(key, None)
+            if url is not None:
+                self._proxies[url].assigned -= 1
+
+    def succeeded(self, url):
+        with self._lock:
+            if url in self._proxies:
+                self._proxies[url].failures = 0
+
+    def failed(self, url):
+        """Counts a connection failure through the proxy, resting it after max_failures in a row."""
+        with self._lock:
+            proxy = self._proxies.get(url)
+            if proxy is None:
+                return
+            proxy.failures += 1
+            if proxy.failures < self.max_failures:
+                return
+            proxy.failures = 0
+        self.blocked(url)
+
+    def blocked(self, url):
+        """Rests a proxy that a site has blocked or throttled."""
+        with self._lock:
+            proxy = self._proxies.get(url)
+            if proxy is None:
+                return
+            proxy.rested_until = time.monotonic() + self.cooldown
+        logging.warning(f'Resting proxy {url} for {self.cooldown} seconds')
+
+    @staticmethod
+    def requests_proxies(url):
+        """:return: dict() for the proxies argument of requests."""
+        return {'http': url, 'https': url}
+
+
+def get_proxy_pool():
+    """
+    Gets the process wide ProxyPool, creating it on first use.
+
+    :return: ProxyPool
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProxyPool()
+        return _pool
@@ -1,12 +1,11 @@
 from urllib.parse import urljoin, urlsplit
 import logging
-import json
-
-import requests
-from bs4 import BeautifulSoup as bs
-import pandas as pd
 
 from collectors import RequestCollector
+from collectors.abstract import site_base_url
+from collectors.extract import ld_json
+from collectors.metrics import PARSE
+from collectors.records import SiteRecord
 
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s -  %(levelname)s -  %(message)s')
 # logging.disable(logging.CRITICAL)
@@ -20,11 +19,12 @@ class Radaris(RequestCollector):
         Radaris follows the content recommendations from http://schema.org, so minimal modifications to the data
             structure will be required.
     """
-    def __init__(self, person, **kwargs):
+    def __init__(self, person, base_url=None, **kwargs):
         """
         :param person: Pandas.Series representing an individual
+        :param base_url: str replacing BASE_URL, ex: a local mock broker. Defaults to the "base_urls" setting.
         """
-        super(Radaris, self).__init__(person, BASE_URL, **kwargs)
+        super(Radaris, self).__init__(person, site_base_url('Radaris', BASE_URL, base_url), **kwargs)
         self.url = urljoin(self.base_url, 'ng/search?{}'.format(
             '&'.join(
                 [s for s in ['{}'.format(f'ff={self.person.get("givenName", "").replace(" ", "+")}'),
@@ -45,7 +45,7 @@ class Radaris(RequestCollector):
     def get_data(self):
         """
         Takes self.url (for a general Radaris search), scrapes the site data, and adds
-            it to the self.data_from_website DataFrame
+            it to self.site_records
         :return: Boolean
         """
         def _clean_search_hit(search_hit):
@@ -63,19 +63,14 @@ class Radaris(RequestCollector):
             return search_hit
 
         logging.debug(self.url)
-        res = requests.get(self.url)
-        res.raise_for_status()
-        soup = bs(res.content, 'html.parser')
-
-        search_results = soup.find_all(
-            lambda tag: tag.name == 'script' and tag.get('type') == 'application/ld+json'
-        )[0].contents[0]
-
-        search_results = json.loads(search_results)
-
-        search_results = [_clean_search_hit(result) for result in search_results]
-        self.data_from_website = pd.DataFrame(search_results)
-        self.data_from_website.set_index('@id', inplace=True)
+        with self.stage(PARSE):
+            try:
+                search_results = ld_json(self.content)[0]
+            except IndexError:
+                self._raise_site_schema_change()
+
+            search_results = [_clean_search_hit(result) for result in search_results]
+            self.site_records = [SiteRecord.from_dict(result) for result in search_results]
         return True
 
     def validate_data(self):
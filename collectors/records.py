@@ -0,0 +1,222 @@
+"""
+Compact records for the per-record work of the collectors: matching, relative extraction and address ranking.
+
+A Pandas.Series costs a few kilobytes and tens of microseconds to build, and DataFrame.iterrows() builds one for every
+    row. These classes use __slots__, so a record is a handful of attributes and a dict of its site data. The
+    collectors keep their search results as a list() of SiteRecord and only turn them into a DataFrame at the storage
+    and export boundary (see AbstractCollector.data_from_website and records_frame()).
+"""
+
+# The person fields every collector reads, kept as attributes. Any other column of the people table goes in extra.
+PERSON_FIELDS = (
+    'givenName',
+    'middleName',
+    'familyName',
+    'addressLocality',
+    'addressRegion',
+    'checkRelatives',
+    'ignore',
+)
+
+
+def _text(value):
+    """:return: value if it is a str, else '' (for missing values such as None or NaN)."""
+    return value if type(value) is str else ''
+
+
+class PostalAddress:
+    """A schema.org PostalAddress, the parts the collectors match on."""
+    __slots__ = ('streetAddress', 'addressLocality', 'addressRegion', 'postalCode')
+
+    def __init__(self, streetAddress='', addressLocality='', addressRegion='', postalCode=''):
+        self.streetAddress = _text(streetAddress)
+        self.addressLocality = _text(addressLocality)
+        self.addressRegion = _text(addressRegion)
+        self.postalCode = _text(postalCode)
+
+    @classmethod
+    def from_dict(cls, address):
+        """
+        :param address: dict() of a schema.org PostalAddress. Anything else gives an empty address.
+        :return: PostalAddress
+        """
+        if type(address) is not dict:
+            return cls()
+        return cls(**{k: address.get(k, '') for k in cls.__slots__})
+
+    def to_dict(self):
+        """:return: dict() of the address parts that are set."""
+        return {k: getattr(self, k) for k in self.__slots__ if getattr(self, k) != ''}
+
+    def __repr__(self):
+        return f'PostalAddress({self.addressLocality!r}, {self.addressRegion!r})'
+
+
+class SiteRecord:
+    """
+    One search record from a Data Broker. The fields the collectors work on are parsed once into attributes, and the
+        full record, as the site gave it, is kept in data for the results store.
+    """
+    __slots__ = ('id', 'name', 'addresses', 'related_to', 'additional_names', 'data')
+
+    def __init__(self, record_id, data):
+        """
+        :param record_id: the site's id for the record, its '@id'.
+        :param data: dict() of the record's fields, without '@id'.
+        """
+        self.id = record_id
+        self.data = data
+        self.name = _text(data.get('name'))
+
+        addresses = data.get('address')
+        if type(addresses) is dict:
+            addresses = [addresses]
+        self.addresses = tuple(PostalAddress.from_dict(a) for a in addresses) if type(addresses) is list else ()
+
+        related_to = data.get('relatedTo')
+        self.related_to = tuple(r for r in related_to if type(r) is dict) if type(related_to) is list else ()
+
+        additional_names = data.get('additionalName')
+        self.additional_names = tuple(additional_names) if type(additional_names) is list else ()
+
+    @classmethod
+    def from_dict(cls, record, record_id=None):
+        """
+        :param record: dict() of a site record, with its '@id' unless record_id is given.
+        :param record_id: the record's id, when it isn't in the record.
+        :return: SiteRecord
+        """
+        data = {k: v for k, v in record.items() if k != '@id'}
+        return cls(record.get('@id') if record_id is None else record_id, data)
+
+    @classmethod
+    def from_frame(cls, frame):
+        """
+        :param frame: Pandas.DataFrame of site records, indexed by '@id' or with an '@id' column.
+        :return: list() of SiteRecord, in the order of the rows.
+        """
+        if '@id' in frame.columns:
+            frame = frame.set_index('@id')
+        return [cls(record_id, data) for record_id, data in zip(frame.index, frame.to_dict('records'))]
+
+    @property
+    def first_address(self):
+        """:return: PostalAddress, the most recent address on the site, or an empty one."""
+        return self.addresses[0] if len(self.addresses) > 0 else PostalAddress()
+
+    def get(self, key, default=None):
+        """:return: the field of the record as the site gave it, like dict.get()."""
+        return self.id if key == '@id' else self.data.get(key, default)
+
+    def to_dict(self):
+        """:return: dict() of the record as the site gave it, with its '@id'."""
+        return {'@id': self.id, **self.data}
+
+    def __repr__(self):
+        return f'SiteRecord({self.id!r}, {self.name!r})'
+
+
+def records_frame(records):
+    """
+    :param records: iterable of SiteRecord
+    :return: Pandas.DataFrame of the records' data indexed by '@id', the shape of AbstractCollector.data_from_website.
+    """
+    import pandas as pd  # only needed at the storage boundary
+
+    records = list(records)
+    return pd.DataFrame(
+        [record.data for record in records],
+        index=pd.Index([record.id for record in records], name='@id', dtype=object))
+
+
+class Person:
+    """
+    A person being collected, in place of a row of the people table. The PERSON_FIELDS are attributes, left unset when
+        the row doesn't have them, and any other column is kept in extra. It reads like the Pandas.Series it replaces:
+        person.givenName, person['givenName'], person.get('ignore', '{}') and person.keys() all work.
+    """
+    __slots__ = (*PERSON_FIELDS, 'extra', 'label')
+
+    def __init__(self, label=None, **fields):
+        """
+        :param label: the row's label in the people table, the Series name.
+        :param fields: the person's columns.
+        """
+        self.extra = dict()
+        self.label = label
+        for k, v in fields.items():
+            self[k] = v
+
+    @classmethod
+    def from_series(cls, person):
+        """
+        :param person: Pandas.Series, dict() or Person.
+        :return: Person, a copy that can be changed without changing person.
+        """
+        if isinstance(person, Person):
+            return person.copy()
+        return cls(label=getattr(person, 'name', None), **dict(person.items()))
+
+    def __getattr__(self, key):
+        # Only reached for an unset field or an extra column.
+        if key in Person.__slots__:
+            raise AttributeError(key)
+        try:
+            return self.extra[key]
+        except KeyError:
+            raise AttributeError(key) from None
+
+    def __getitem__(self, key):
+        if key in PERSON_FIELDS:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        return self.extra[key]
+
+    def __setitem__(self, key, value):
+        if key in PERSON_FIELDS:
+            setattr(self, key, value)
+        else:
+            self.extra[key] = value
+
+    def __delitem__(self, key):
+        if key in PERSON_FIELDS:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        else:
+            del self.extra[key]
+
+    def __contains__(self, key):
+        return key in self.keys()
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        """:return: list() of the columns the person has."""
+        return [k for k in PERSON_FIELDS if hasattr(self, k)] + list(self.extra)
+
+    def items(self):
+        return [(k, self[k]) for k in self.keys()]
+
+    def copy(self):
+        """:return: Person with the same columns and label."""
+        return Person(label=self.label, **self.to_dict())
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def to_series(self):
+        """:return: Pandas.Series of the person, named by its label, for the people table."""
+        import pandas as pd  # only needed at the storage boundary
+
+        return pd.Series(self.to_dict(), name=self.label)
+
+    def __repr__(self):
+        return f'Person({self.to_dict()!r})'
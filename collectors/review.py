@@ -0,0 +1,293 @@
+import argparse
+import json
+import logging
+import sqlite3
+from datetime import datetime
+from os import path, makedirs
+from threading import Lock
+
+import pandas as pd
+
+from collectors.people import load_ignore
+from collectors.store import get_results_store
+from definitions import REVIEW_DIR, NAMES_DIR
+
+# Kinds of items in the queue
+RECORD = 'record'  # a site record that may or may not be the person (MATCH_AKA or MISMATCH_LOCALITY)
+RELATIVE = 'relative'  # a name from a record's 'relatedTo' that may be added to the people being collected
+
+# Decisions
+KEEP = 'keep'
+DROP = 'drop'
+
+_queue = None
+_queue_lock = Lock()
+
+
+class ReviewQueue:
+    """
+    Persistent queue of the questions a collector would otherwise ask with input().
+
+    Collectors that are not interactive push their ambiguous records and possible relatives here and carry on. The
+        questions are answered later in bulk by review(), which writes the answers back to the people file and to
+        the saved site records.
+    """
+
+    def __init__(self, db_file=REVIEW_DIR):
+        """
+        :param db_file: str of the SQLite file holding the queue.
+        """
+        if path.dirname(db_file) != '':
+            makedirs(path.dirname(db_file), exist_ok=True)
+        self._lock = Lock()
+        self._connection = sqlite3.connect(db_file, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        with self._lock, self._connection:
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS items (
+                    id INTEGER PRIMARY KEY,
+                    created TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    site TEXT NOT NULL,
+                    given_name TEXT NOT NULL,
+                    middle_name TEXT NOT NULL,
+                    family_name TEXT NOT NULL,
+                    record_id TEXT NOT NULL,
+                    message TEXT NOT NULL,
+                    payload TEXT,
+                    saved_as TEXT,
+                    decision TEXT,
+                    decided TEXT,
+                    applied INTEGER NOT NULL DEFAULT 0,
+                    UNIQUE (kind, site, given_name, middle_name, family_name, record_id)
+                )""")
+            # Queues made before the results store kept the csv file of the record instead.
+            columns = [row['name'] for row in self._connection.execute('PRAGMA table_info(items)')]
+            if 'saved_as' not in columns:
+                self._connection.execute('ALTER TABLE items ADD COLUMN saved_as TEXT')
+
+    def push(self, kind, site, person, record_id, message, payload=None, saved_as=None):
+        """
+        Adds a question to the queue. Asking the same question for the same person twice does nothing.
+
+        :param kind: RECORD or RELATIVE
+        :param site: str of the site the question came from. Ignored for relatives, which aren't kept per site.
+        :param person: Pandas.Series of the person being collected.
+        :param record_id: str, the site record id for a RECORD or the relative's name for a RELATIVE.
+        :param message: str shown to the user during the review.
+        :param payload: dict() of extra data, ex: the relative's details.
+        :param saved_as: str of the person the site record is saved under in the results store.
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                """INSERT OR IGNORE INTO items
+                    (created, kind, site, given_name, middle_name, family_name, record_id, message, payload, saved_as)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    datetime.now().isoformat(),
+                    kind,
+                    site if kind == RECORD else '',
+                    person.get('givenName', ''),
+                    person.get('middleName', ''),
+                    person.get('familyName', ''),
+                    str(record_id),
+                    message,
+                    json.dumps(payload or dict()),
+                    saved_as,
+                ))
+
+    def _select(self, where):
+        with self._lock:
+            rows = self._connection.execute(
+                f'SELECT * FROM items WHERE {where} ORDER BY family_name, given_name, middle_name, id').fetchall()
+        items = [dict(row) for row in rows]
+        for item in items:
+            item['payload'] = json.loads(item['payload'] or '{}')
+        return items
+
+    def undecided(self):
+        """:return: list() of dict(), the items still waiting for an answer."""
+        return self._select('decision IS NULL')
+
+    def unapplied(self):
+        """:return: list() of dict(), the answered items not yet written back."""
+        return self._select('decision IS NOT NULL AND applied = 0')
+
+    def decide(self, item_id, decision, payload=None):
+        """
+        :param item_id: int
+        :param decision: KEEP or DROP
+        :param payload: dict() replacing the item's payload, ex: a relative's details completed during the review.
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                'UPDATE items SET decision = ?, decided = ?, payload = COALESCE(?, payload) WHERE id = ?',
+                (decision, datetime.now().isoformat(), None if payload is None else json.dumps(payload), item_id))
+
+    def mark_applied(self, item_ids):
+        """:param item_ids: list() of int"""
+        with self._lock, self._connection:
+            self._connection.executemany('UPDATE items SET applied = 1 WHERE id = ?', [(i, ) for i in item_ids])
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute('SELECT COUNT(*) FROM items WHERE decision IS NULL').fetchone()[0]
+
+
+def get_review_queue():
+    """
+    Gets the process wide ReviewQueue, creating it on first use.
+
+    :return: ReviewQueue
+    """
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = ReviewQueue()
+        return _queue
+
+
+def _ask(msg):
+    """:return: Boolean, True when the answer starts with 'y'."""
+    try:
+        return input(f'\t{msg}\t').lower()[0] == 'y'
+    except IndexError:
+        return False
+
+
+def _complete_relative(relative):
+    """
+    Prompts the user for the details of a relative that the site didn't have, like AbstractCollector._add_relative.
+
+    :param relative: dict()
+    :return: dict()
+    """
+    if relative.get('addressRegion', '') == '':
+        relative['addressRegion'] = input('\t\tPlease enter State: (optional) ').strip()
+    if relative.get('addressLocality', '') == '':
+        relative['addressLocality'] = input('\t\tPlease enter City: (optional) ').strip()
+    if relative.get('middleName', '') == '':
+        relative['middleName'] = input('\t\tPlease enter middle name: (optional) ').strip()
+    relative['checkRelatives'] = _ask('\tCheck relatives?: (optional) [y/n] ')
+
+    return {
+        'givenName': relative.get('givenName', '').strip().title(),
+        'middleName': relative.get('middleName', '').strip().title(),
+        'familyName': relative.get('familyName', '').strip().title(),
+        'addressLocality': relative.get('addressLocality', '').strip().title(),
+        'addressRegion': relative.get('addressRegion', '').strip().upper(),
+        'checkRelatives': relative['checkRelatives'],
+    }
+
+
+def _find_person(people, item):
+    """:return: the index of the person in the people DataFrame that the item belongs to, or None."""
+    found = people[
+        (people['givenName'] == item['given_name']) &
+        (people.get('middleName', '') == item['middle_name']) &
+        (people['familyName'] == item['family_name'])
+    ]
+    if len(found.index) == 0:
+        return None
+    return found.index[0]
+
+
+def apply_decisions(queue=None, people_file=NAMES_DIR, store=None):
+    """
+    Writes every answered question back:
+        * Dropped records are added to the person's 'ignore' data and removed from the results store.
+        * Dropped relatives are added to the person's 'ignore' data.
+        * Kept relatives are added to the people file.
+
+    :param queue: ReviewQueue. Defaults to the shared queue.
+    :param people_file: str of the people csv file.
+    :param store: ResultsStore holding the saved site records. Defaults to the shared store.
+    :return: Pandas.DataFrame of the updated people.
+    """
+    queue = get_review_queue() if queue is None else queue
+    store = get_results_store() if store is None else store
+    people = pd.read_csv(people_file, index_col=0).fillna('')
+    if 'ignore' not in people.columns:
+        people['ignore'] = ''
+
+    applied, dropped_records, new_people = list(), dict(), list()
+    for item in queue.unapplied():
+        person_index = _find_person(people, item)
+        if person_index is None:
+            logging.warning(f'{item["given_name"]} {item["family_name"]} is not in {people_file}')
+            continue
+
+        ignore = load_ignore(people.at[person_index, 'ignore'])
+
+        if item['kind'] == RECORD and item['decision'] == DROP:
+            site_ids = ignore.setdefault('searchResults', dict()).setdefault(item['site'].lower(), list())
+            if item['record_id'] not in site_ids:
+                site_ids.append(item['record_id'])
+            dropped_records.setdefault((item['site'], item['saved_as']), list()).append(item['record_id'])
+        elif item['kind'] == RELATIVE and item['decision'] == DROP:
+            ignore.setdefault('relatives', list()).append({'name': item['record_id']})
+        elif item['kind'] == RELATIVE and item['decision'] == KEEP:
+            new_people.append(item['payload'])
+
+        people.at[person_index, 'ignore'] = json.dumps(ignore) if len(ignore) > 0 else ''
+        applied.append(item['id'])
+
+    for (site, saved_as), record_ids in dropped_records.items():
+        if saved_as is not None:
+            store.drop(site, record_ids, person=saved_as)
+
+    new_people = [
+        relative for relative in new_people if not (
+            (people['givenName'] == relative['givenName']) & (people['familyName'] == relative['familyName'])
+        ).any()
+    ]
+    if len(new_people) > 0:
+        people = pd.concat([people, pd.DataFrame(new_people)], ignore_index=True).fillna('')
+
+    people.to_csv(people_file)
+    queue.mark_applied(applied)
+    return people
+
+
+def review(queue=None, people_file=NAMES_DIR, store=None):
+    """
+    Works through every unanswered question in the queue, then applies the answers.
+
+    :param queue: ReviewQueue. Defaults to the shared queue.
+    :param people_file: str of the people csv file.
+    :param store: ResultsStore holding the saved site records. Defaults to the shared store.
+    :return: Pandas.DataFrame of the updated people.
+    """
+    queue = get_review_queue() if queue is None else queue
+    items = queue.undecided()
+    print(f'** Review ({len(items)}) **')
+
+    person = None
+    for i, item in enumerate(items):
+        if person != (item['given_name'], item['middle_name'], item['family_name']):
+            person = (item['given_name'], item['middle_name'], item['family_name'])
+            print(f'== {item["given_name"]} {item["family_name"]} ==')
+
+        payload = None
+        if item['kind'] == RECORD:
+            decision = KEEP if _ask(f'{i + 1}) {item["site"]}: {item["message"]}') else DROP
+        else:
+            decision = KEEP if _ask(f'{i + 1}) {item["message"]}') else DROP
+            if decision == KEEP:
+                payload = _complete_relative(item['payload'])
+        queue.decide(item['id'], decision, payload)
+
+    return apply_decisions(queue, people_file, store)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Answers the questions queued by non interactive collectors')
+    parser.add_argument('--people', default=NAMES_DIR,
+                        help='csv file of people the answers are written to (default: files/names.csv)')
+    args = parser.parse_args(argv)
+
+    review(people_file=args.people)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import pandas as pd
+
+from collectors import get_collectors
+from collectors.abstract import results_key
+from collectors.index import get_record_index
+from collectors.journal import person_key
+from collectors.metrics import get_metrics
+from collectors.people import PeopleRegistry, load_ignore
+from definitions import SETTINGS
+
+SCHEDULER_SETTINGS = SETTINGS.get('scheduler', dict())
+
+WORKERS = SCHEDULER_SETTINGS.get('workers', 4)
+SITE_LIMIT = SCHEDULER_SETTINGS.get('site_limit', 2)
+SITE_LIMITS = SCHEDULER_SETTINGS.get('site_limits', dict())
+
+SKIPPED = None  # result of a job that finished in an earlier run of the batch
+
+
+def merge_ignore(*ignores):
+    """
+    Merges several 'ignore' dictionaries (as built by AbstractCollector.validate_data and check_relatives) into one.
+        Order is kept, so merging the same dictionaries in the same order always gives the same result.
+
+    :param ignores: dict() with optional 'searchResults' {site: [record ids]} and 'relatives' [{'name': str}] keys.
+    :return: dict()
+    """
+    merged = dict()
+    for ignore in ignores:
+        if not ignore:
+            continue
+
+        for site, site_ids in ignore.get('searchResults', dict()).items():
+            search_results = merged.setdefault('searchResults', dict()).setdefault(site, list())
+            search_results += [site_id for site_id in site_ids if site_id not in search_results]
+
+        if 'relatives' in ignore:
+            relatives = merged.setdefault('relatives', list())
+            known_relatives = {relative.get('name') for relative in relatives}
+            for relative in ignore['relatives']:
+                if relative.get('name') not in known_relatives:
+                    relatives.append(relative)
+                    known_relatives.add(relative.get('name'))
+
+    return merged
+
+
+class CollectionScheduler:
+    """
+    Runs the collection of a people DataFrame as a matrix of (person, collector) jobs.
+
+    Jobs are handed to a pool of worker threads, never running more than the site limit for any one collector at a
+        time. The results are committed back into the people DataFrame strictly in job order (person by person,
+        collector by collector), so the final DataFrame does not depend on which job happened to finish first.
+
+    With a Journal, every committed job is written to it, and the jobs it already holds are skipped.
+
+    With since, the jobs of a site that already collected a person since then (see RecordIndex.last_run) are skipped.
+    """
+
+    def __init__(self, people, collectors=None, workers=None, site_limits=None, journal=None, since=None,
+                 record_index=None, **kwargs):
+        """
+        :param people: Pandas.DataFrame or PeopleRegistry of all the people being collected.
+        :param collectors: iterable of Collector classes. Defaults to every collector in collectors.REGISTRY.
+        :param workers: int for the number of jobs that may run at the same time.
+        :param site_limits: dict() of {site: int} for the number of jobs that may run at the same time for a site.
+        :param journal: Journal to record finished jobs in, and to skip the jobs it already holds.
+        :param since: datetime, date or str 'YYYY-MM-DD'. Skips the jobs that already ran since then.
+        :param record_index: RecordIndex the runs are looked up in for since. Defaults to the shared one.
+        :param kwargs: passed on to every Collector.
+        """
+        if not isinstance(people, PeopleRegistry):
+            people = PeopleRegistry.from_frame(people.reset_index(drop=True))
+        self.people = people
+        self.collectors = tuple(collectors or get_collectors())
+        self.workers = max(1, workers or WORKERS)
+        self.site_limits = {**SITE_LIMITS, **(site_limits or dict())}
+        self.collector_kwargs = kwargs
+        self.journal = journal
+        self._completed = set() if journal is None else journal.completed()
+        self.since = since.isoformat() if hasattr(since, 'isoformat') else since
+        self.record_index = record_index
+
+        self._pending = deque()
+        self._results = dict()
+        self._running = dict()
+        self._site_running = {self._site(collector): 0 for collector in self.collectors}
+        self._scheduled_people = 0
+        self._commit_person = 0
+        self._person_results = list()
+
+    @staticmethod
+    def _site(collector):
+        return collector.__name__
+
+    def _collected_since(self, person, site):
+        """:return: Boolean, True if the site collected the person on or after self.since."""
+        if self.since is None:
+            return False
+        record_index = get_record_index() if self.record_index is None else self.record_index
+        last_run = record_index.last_run(site, results_key(person, self.collector_kwargs.get('test', False)))
+        return last_run is not None and last_run >= self.since
+
+    def _site_limit(self, site):
+        return max(1, self.site_limits.get(site, SITE_LIMIT))
+
+    def _schedule_new_people(self):
+        """Queues a job for every collector for each person that has been added since the last call."""
+        while self._scheduled_people < len(self.people):
+            person = self.people.row(self._scheduled_people)
+            key = person_key(person)
+            for collector_index, collector in enumerate(self.collectors):
+                job = (self._scheduled_people, collector_index)
+                site = self._site(collector)
+                if (key, site) in self._completed or self._collected_since(person, site):
+                    self._results[job] = SKIPPED
+                else:
+                    self._pending.append(job)
+            self._scheduled_people += 1
+
+    def _next_job(self):
+        """
+        Finds the first pending job whose site is below its limit.
+
+        :return: tuple of (person index, collector index), or None if no job can be started.
+        """
+        for job in self._pending:
+            site = self._site(self.collectors[job[1]])
+            if self._site_running[site] < self._site_limit(site):
+                self._pending.remove(job)
+                return job
+        return None
+
+    def _run_job(self, person, collector, people):
+        """
+        Runs a single collector for a single person. Runs within a worker thread.
+
+        :return: tuple of (ignore dict, DataFrame of relatives or False)
+        """
+        person_name = f'{person.get("givenName", "")} {person.get("familyName", "")}'
+        with get_metrics().profile(collector.__name__, person_name):
+            with collector(person, **self.collector_kwargs) as c:
+                c.validate_data()
+                relatives = c.check_relatives(people)
+                return c.ignore_people, relatives
+
+    def _dispatch(self, executor):
+        while len(self._running) < self.workers:
+            job = self._next_job()
+            if job is None:
+                return
+            person_index, collector_index = job
+            collector = self.collectors[collector_index]
+            self._site_running[self._site(collector)] += 1
+            future = executor.submit(self._run_job, self.people.row(person_index), collector, self.people)
+            self._running[future] = job
+
+    def _commit(self, job, result):
+        """
+        Merges the result of a job into the people DataFrame. Must be called in job order.
+
+        :param job: tuple of (person index, collector index)
+        :param result: tuple returned by self._run_job
+        """
+        person_index, collector_index = job
+        ignore, relatives = (dict(), False) if result is SKIPPED else result
+        self._person_results.append(ignore)
+
+        if relatives is not False and len(relatives.index) > 0:
+            # check_relatives ran while other jobs were still adding people, so check again.
+            added = list()
+            for relative in relatives.to_dict('records'):
+                if not self.people.has_name(relative.get('givenName'), relative.get('familyName')):
+                    self.people.add(relative)
+                    added.append(relative)
+            relatives = pd.DataFrame(added, columns=relatives.columns)
+
+        if self.journal is not None and result is not SKIPPED:
+            self.journal.record(
+                self.people.row(person_index), self._site(self.collectors[collector_index]), ignore,
+                relatives if relatives is not False else None)
+
+        if collector_index == len(self.collectors) - 1:
+            ignore = load_ignore(self.people.get(person_index, 'ignore'))
+            ignore = merge_ignore(ignore, *self._person_results)
+            if len(ignore) > 0:
+                self.people.update(person_index, ignore=ignore)
+            self._person_results = list()
+
+    def _commit_ready(self):
+        """Commits every finished job that is next in line."""
+        while True:
+            job = (self._commit_person, len(self._person_results))
+            if job not in self._results:
+                return
+            self._commit(job, self._results.pop(job))
+            if len(self._person_results) == 0:
+                self._commit_person += 1
+                self._schedule_new_people()
+
+    def run(self):
+        """
+        Runs every job and waits for them to finish.
+
+        :return: Pandas.DataFrame of all the people, including any relatives that were added.
+        """
+        self._schedule_new_people()
+        # Commit the jobs the journal says are already done, up to the first one that still has to run.
+        self._commit_ready()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            self._dispatch(executor)
+            while len(self._running) > 0:
+                done, _ = wait(self._running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = self._running.pop(future)
+                    self._site_running[self._site(self.collectors[job[1]])] -= 1
+                    try:
+                        self._results[job] = future.result()
+                    except Exception:
+                        # Stop handing out work, but let the jobs that already started finish before raising.
+                        self._pending.clear()
+                        logging.critical(f'{self.collectors[job[1]].__name__} failed for person {job[0]}')
+                        wait(self._running)
+                        raise
+                self._commit_ready()
+                self._dispatch(executor)
+
+        return self.people.to_frame()
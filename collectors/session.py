@@ -0,0 +1,164 @@
+import logging
+from threading import Lock, Thread
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.exceptions import RequestException, ConnectionError
+
+from collectors.errors import Throttled
+from collectors.proxies import get_proxy_pool, PROXY_KEY
+from collectors.throttle import get_rate_limiter, parse_retry_after
+from definitions import SETTINGS
+
+HTTP_SETTINGS = SETTINGS.get('http', dict())
+
+POOL_CONNECTIONS = HTTP_SETTINGS.get('pool_connections', 10)  # number of hosts to keep a pool of connections for.
+POOL_MAXSIZE = HTTP_SETTINGS.get('pool_maxsize', 10)  # number of connections kept alive for each host.
+MAX_RETRIES = HTTP_SETTINGS.get('max_retries', 0)
+TIMEOUT = tuple(HTTP_SETTINGS.get('timeout', (5, 30)))  # seconds: (connect, read)
+PRECONNECT = HTTP_SETTINGS.get('preconnect', list())
+HOSTS = HTTP_SETTINGS.get('hosts', dict())  # per host overrides of pool_maxsize, ex: {"radaris.com": {...}}
+TEXT_TYPES = ('text', 'json', 'xml')  # Content-Types checked for block pages, so downloads aren't decoded
+
+_session = None
+_session_lock = Lock()
+
+
+def _blocked(limiter, response):
+    """
+    :param limiter: RateLimiter
+    :param response: requests.Response
+    :return: Boolean, True if the response is one of the host's block or captcha pages, whatever its status code.
+    """
+    content_type = response.headers.get('Content-Type', '')
+    if len(limiter.block_markers) == 0 or (content_type and not any(t in content_type for t in TEXT_TYPES)):
+        return False
+    return limiter.blocked(response.text)
+
+
+class CollectorSession(requests.Session):
+    """
+    requests.Session that keeps a pool of open (keep-alive) connections for each host and applies a default timeout.
+
+    One session is shared by every collector in the process (see get_session()), so repeated searches and downloads
+        from the same Data Broker reuse connections instead of paying for a new TCP and TLS handshake each time.
+        Requests are paced by the collectors.throttle.RateLimiter, and retried when a Data Broker throttles them, with
+        a throttling status code or a block page (see RateLimiter.block_markers). When egress proxies are configured
+        (see collectors.proxies) each request goes through the proxy pinned to the current PROXY_KEY, and is retried
+        through another proxy if that one is blocked or can't be reached.
+    """
+
+    def __init__(self, pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=MAX_RETRIES,
+                 timeout=TIMEOUT, hosts=None, rate_limiter=None, proxy_pool=None):
+        """
+        :param pool_connections: int for the number of hosts to keep a pool of connections for.
+        :param pool_maxsize: int for the number of connections kept alive for each host.
+        :param max_retries: int for the number of times a failed connection is retried.
+        :param timeout: float or tuple of (connect, read) seconds used when a request doesn't set its own timeout.
+        :param hosts: dict() of {host: {'pool_maxsize': int, 'max_retries': int}} to size the pool of a single host.
+        :param rate_limiter: RateLimiter pacing the requests. Defaults to the shared one.
+        :param proxy_pool: ProxyPool spreading the requests across egress proxies. Defaults to the shared one.
+        """
+        super(CollectorSession, self).__init__()
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self.proxy_pool = proxy_pool
+
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=max_retries)
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+
+        for host, host_settings in (HOSTS if hosts is None else hosts).items():
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=host_settings.get('pool_maxsize', pool_maxsize),
+                max_retries=host_settings.get('max_retries', max_retries),
+            )
+            self.mount(f'https://{host}/', adapter)
+            self.mount(f'http://{host}/', adapter)
+
+    def _limited_request(self, method, url, proxy=None, max_retries=None, **kwargs):
+        limiter = get_rate_limiter() if self.rate_limiter is None else self.rate_limiter
+        return limiter.request(
+            url,
+            lambda: super(CollectorSession, self).request(method, url, **kwargs),
+            lambda response: response.status_code in limiter.status_codes or _blocked(limiter, response),
+            lambda response: parse_retry_after(response.headers.get('Retry-After')),
+            lambda response: response.close(),
+            proxy=proxy,
+            max_retries=max_retries,
+        )
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        pool = get_proxy_pool() if self.proxy_pool is None else self.proxy_pool
+        if len(pool) == 0 or 'proxies' in kwargs:
+            return self._limited_request(method, url, **kwargs)
+
+        tried = list()
+        while True:
+            proxy = pool.assign(PROXY_KEY.get(), exclude=tried)
+            tried.append(proxy)
+            last = len(tried) >= len(pool)
+            try:
+                # With other proxies left, a throttled request moves on to one of them instead of waiting.
+                response = self._limited_request(method, url, proxy, None if last else 0,
+                                                 proxies=pool.requests_proxies(proxy), **kwargs)
+            except Throttled:
+                pool.blocked(proxy)
+                if last:
+                    raise
+                continue
+            except ConnectionError:
+                pool.failed(proxy)
+                if last:
+                    raise
+                continue
+            pool.succeeded(proxy)
+            return response
+
+    def preconnect(self, urls):
+        """
+        Opens a connection to each of the urls ahead of time, so the first real request to those hosts doesn't pay
+            for the handshake. Failures are logged and otherwise ignored.
+
+        :param urls: list() of str
+        """
+        def _preconnect(url):
+            split_url = urlsplit(url)
+            try:
+                self.head(f'{split_url.scheme}://{split_url.netloc}/', allow_redirects=False).close()
+            except RequestException as e:
+                logging.warning(f'Could not preconnect to {url}: {e}')
+
+        threads = [Thread(target=_preconnect, args=(url, ), daemon=True) for url in urls]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+
+def get_session():
+    """
+    Gets the process wide CollectorSession, creating it on first use.
+
+    :return: CollectorSession
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = CollectorSession()
+        return _session
+
+
+def preconnect(urls=None):
+    """
+    Warms the shared session's connection pool. Does nothing unless urls are given or "preconnect" is set in the
+        "http" section of settings/config.json.
+
+    :param urls: list() of str. Defaults to the "preconnect" setting.
+    """
+    urls = PRECONNECT if urls is None else urls
+    if len(urls) > 0:
+        get_session().preconnect(urls)
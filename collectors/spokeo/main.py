@@ -1,14 +1,16 @@
-import json
-import re
 from urllib.parse import urljoin
 import logging
 
+import numpy as np
 import pandas as pd
 from pandas import json_normalize
 
 from definitions import STATES
 from collectors import RequestCollector
+from collectors.abstract import site_base_url
 from collectors.errors import NoRecords
+from collectors.extract import ld_json, preloaded_state
+from collectors.metrics import PARSE, NORMALIZE
 
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s -  %(levelname)s -  %(message)s')
 # logging.disable(logging.CRITICAL)
@@ -22,11 +24,12 @@ class Spokeo(RequestCollector):
         Spokeo follows the content recommendations from http://schema.org, so minimal modifications to the data
             structure will be required.
     """
-    def __init__(self, person, **kwargs):
+    def __init__(self, person, base_url=None, **kwargs):
         """
         :param person: Pandas.Series representing an individual
+        :param base_url: str replacing BASE_URL, ex: a local mock broker. Defaults to the "base_urls" setting.
         """
-        super(Spokeo, self).__init__(person, BASE_URL, **kwargs)
+        super(Spokeo, self).__init__(person, site_base_url('Spokeo', BASE_URL, base_url), **kwargs)
 
         # Converts State Abbreviation to full state name, as Spokeo requires for their Search URL.
         person_region = self.person.get('addressRegion', '').upper()
@@ -53,6 +56,85 @@ class Spokeo(RequestCollector):
     def __exit__(self, exc_type, exc_val, exc_tb):
         super(Spokeo, self).__exit__(exc_type, exc_val, exc_tb)
 
+    @staticmethod
+    def _normalize_people(people):
+        """
+        Converts the people hidden in the site scripts to match schema.org, all records at once.
+
+        Every record's 'top_city_states' list is exploded into one row per city, the city found to be the best match
+            for the search is moved to the top of its record's list, and the cities are grouped back into a 'geo' and
+            an 'address' list per record.
+
+        :param people: list() of dict(), the 'people' of Spokeo's __PRELOADED_STATE__
+        :return DataFrame:
+        """
+        search_results = pd.DataFrame(people)
+        search_results.rename(inplace=True, columns={'id': '@id'})
+        name_fields = search_results.pop('main_name')
+        # noinspection PyTypeChecker
+        name_fields = json_normalize(name_fields)
+        search_results['givenName'] = name_fields['first_name']
+        search_results['middleName'] = name_fields['middle_name']
+        search_results['familyName'] = name_fields['last_name']
+        search_results.rename(
+            inplace=True,
+            columns={
+                'top_city_states': 'geo',
+                'family_members': 'relatedTo',
+            })
+
+        # One row per city, indexed by the position of its record.
+        cities = search_results['geo'].explode().dropna()
+        position = cities.groupby(level=0).cumcount().to_numpy()
+        count = cities.groupby(level=0).transform('size').to_numpy()
+        top_city_match = search_results['top_city_states_best_match_index']\
+            .fillna(0).astype(int).to_numpy()[cities.index]
+        top_city_match = np.where(top_city_match < count, top_city_match, 0)
+
+        # Move the most recent city to the top of the list
+        order = np.where(position == top_city_match, 0, np.where(position < top_city_match, position + 1, position))
+
+        # Update the address and geo coordinates to match schema.org
+        cities = pd.DataFrame({
+            'record': cities.index,
+            'order': order,
+            'geo': [
+                {**{k: v for k, v in city.items() if k not in ('city', 'state', 'postal_code')},
+                 '@type': 'GeoCoordinates'}
+                for city in cities],
+            'address': [
+                {
+                    'addressLocality': city.get('city'),
+                    'addressRegion': city.get('state'),
+                    'postalCode': city.get('postal_code'),
+                    '@type': 'PostalAddress',
+                } for city in cities],
+        }).sort_values(['record', 'order'], kind='stable')
+        cities = cities.groupby('record', sort=False)[['geo', 'address']].agg(list)\
+            .reindex(search_results.index)
+
+        search_results['geo'] = [geo if type(geo) == list else list() for geo in cities['geo']]
+        search_results['address'] = [address if type(address) == list else list() for address in cities['address']]
+
+        # Update 'relatedTo' to match schema.org
+        search_results['relatedTo'] = [
+            [{'name': relation} for relation in related_to] if type(related_to) == list else list()
+            for related_to in search_results.get('relatedTo', pd.Series(index=search_results.index, dtype=object))]
+
+        search_results.drop(
+            inplace=True,
+            columns=[
+                'has_address',
+                'has_phone',
+                'has_email',
+                'directory_page_id',
+                'top_city_states_best_match_index',
+                'addl_full_names',
+                'full_name',
+            ])
+
+        return search_results
+
     def get_data(self):
         """
             Takes self.url (for a general Spokeo search), scrapes the site data, and adds
@@ -67,9 +149,7 @@ class Spokeo(RequestCollector):
             :return : DataFrame
             """
 
-            json_types = self.soup.find(class_="list-view").find_all("script", {"type": "application/ld+json"})
-            for tag in json_types:
-                search_results = json.loads(tag.contents[0])
+            for search_results in ld_json(self.content):
                 if type(search_results) == list and search_results[0]['@type'] == "Person":
                     break
             else:
@@ -96,79 +176,19 @@ class Spokeo(RequestCollector):
 
             :return DataFrame:
             """
-            re_json = re.compile("<script>var __PRELOADED_STATE__ = (.*)</script>")
-            scripts = self.soup.find_all("script")
-            for script in scripts:
-                matches = re_json.findall(str(script))
-                if len(matches) == 1:
-                    search_results = json.loads(matches[0])['data']['people']
-                    break
-            else:
+            try:
+                with self.stage(PARSE):
+                    search_results = preloaded_state(self.content)['data']['people']
+            except (TypeError, KeyError):
                 self._raise_site_schema_change()
                 return
 
-            search_results = pd.DataFrame(search_results)
-            search_results.rename(inplace=True, columns={'id': '@id'})
-            name_fields = search_results.pop('main_name')
-            # noinspection PyTypeChecker
-            name_fields = json_normalize(name_fields)
-            search_results['givenName'] = name_fields['first_name']
-            search_results['middleName'] = name_fields['middle_name']
-            search_results['familyName'] = name_fields['last_name']
-            search_results.rename(
-                inplace=True,
-                columns={
-                    'top_city_states': 'geo',
-                    'family_members': 'relatedTo',
-                })
-            search_results['address'] = None
-
-            for record_id, site_record in search_results.iterrows():
-                # Update the address and geo coordinates to match schema.org
-                geos = json_normalize(site_record['geo'])
-
-                address = pd.DataFrame()
-                address['addressLocality'] = geos.pop('city')
-                address['addressRegion'] = geos.pop('state')
-                address['postalCode'] = geos.pop('postal_code')
-
-                geos['@type'] = 'GeoCoordinates'
-                geos = geos.to_dict('records')
-
-                top_city_match = site_record['top_city_states_best_match_index']
-                if top_city_match is None:
-                    top_city_match = 0
-                # Move the most recent city to the top of the list
-                geos.insert(0, geos.pop(top_city_match))
-                search_results.at[record_id, 'geo'] = geos
-
-                address['@type'] = 'PostalAddress'
-                address = address.to_dict('records')
-
-                # Move the most recent city to the top of the list
-                address.insert(0, address.pop(top_city_match))
-                search_results.at[record_id, 'address'] = address
-
-                # Update 'relatedTo' to match schema.org
-                related_to = [{'name': relation} for relation in site_record.get('relatedTo', [])]
-                search_results.at[record_id, 'relatedTo'] = related_to
-
-            search_results.drop(
-                inplace=True,
-                columns=[
-                    'has_address',
-                    'has_phone',
-                    'has_email',
-                    'directory_page_id',
-                    'top_city_states_best_match_index',
-                    'addl_full_names',
-                    'full_name',
-                ])
-
-            return search_results
+            with self.stage(NORMALIZE):
+                return self._normalize_people(search_results)
 
         # Search Spokeo for the given person. Spokeo splits the data into 2 parts, one hidden and one visible.
-        visible_search_results = _visible_search_results()
+        with self.stage(PARSE):
+            visible_search_results = _visible_search_results()
         hidden_search_results = _hidden_search_results()
 
         all_search_results = pd.merge(visible_search_results, hidden_search_results, on='@id', how='outer')
@@ -0,0 +1,274 @@
+import gzip
+import json
+import logging
+from datetime import datetime
+from os import path, makedirs, remove, replace, scandir
+from threading import Lock
+from uuid import uuid4
+
+import pandas as pd
+
+from definitions import SETTINGS, RESULTS_DIR
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+RESULTS_SETTINGS = SETTINGS.get('results', dict())
+
+# 'parquet' : compressed columnar files. Needs pyarrow installed.
+# 'jsonl'   : gzipped JSON lines, one record per line.
+FORMATS = ('parquet', 'jsonl')
+FORMAT = RESULTS_SETTINGS.get('format', 'parquet')
+COMPRESSION = RESULTS_SETTINGS.get('compression', 'zstd')  # parquet compression codec
+EXTENSIONS = {'parquet': '.parquet', 'jsonl': '.jsonl.gz'}
+
+# Columns added to every record when it is saved.
+SITE = 'site'
+DATE = 'date'
+PERSON = 'person'
+COLLECTED = 'collected'
+
+_store = None
+_store_lock = Lock()
+
+
+def _partition_value(dir_name, key):
+    """:return: str of the value in a partition directory name, ex: 'site=Spokeo' -> 'Spokeo', or None."""
+    prefix = f'{key}='
+    return dir_name[len(prefix):] if dir_name.startswith(prefix) else None
+
+
+class ResultsStore:
+    """
+    Append only store of the site records found by the collectors.
+
+    Records are kept with their nested lists and dicts (address, relatedTo, geo, ...) intact, in one directory per
+        site and day:
+            {root}/site=Spokeo/date=2020-04-02/part-{time}-{id}.parquet
+
+    Every save adds a new part file, written under a temporary name and moved into place, so a reader never sees
+        half a file and a second run on the same day adds to the first instead of overwriting it. Parts are written
+        as Parquet when pyarrow is installed and as gzipped JSON lines otherwise, and a reader handles both.
+    """
+
+    def __init__(self, root=RESULTS_DIR, file_format=FORMAT, compression=COMPRESSION):
+        """
+        :param root: str of the directory holding the store.
+        :param file_format: str, one of FORMATS. Falls back to 'jsonl' if pyarrow isn't installed.
+        :param compression: str of the Parquet compression codec.
+        """
+        if file_format not in FORMATS:
+            raise ValueError(f'Results format must be one of {FORMATS}, not {file_format!r}')
+        if file_format == 'parquet' and pa is None:
+            logging.warning('pyarrow is not installed, saving results as JSON lines instead')
+            file_format = 'jsonl'
+
+        self.root = root
+        self.file_format = file_format
+        self.compression = compression
+        self._lock = Lock()
+
+    @staticmethod
+    def _records(data):
+        """:return: list() of dict(), the rows of data with missing values as None."""
+        data = data.astype(object).where(data.notna(), None)
+        return data.to_dict('records')
+
+    def _write_part(self, part_file, records):
+        """
+        Writes records to part_file, through a temporary file. If the records can't be typed as Parquet (ex: a field
+            that is a number in one record and text in another) the part is written as JSON lines instead.
+
+        :return: str of the file written.
+        """
+        if part_file.endswith(EXTENSIONS['parquet']):
+            try:
+                table = pa.Table.from_pylist(records)
+                pq.write_table(table, f'{part_file}.tmp', compression=self.compression)
+                replace(f'{part_file}.tmp', part_file)
+                return part_file
+            except (pa.ArrowException, ValueError, TypeError) as e:
+                logging.info(f'Saving {path.basename(part_file)} as JSON lines, it does not fit Parquet: {e}')
+                if path.exists(f'{part_file}.tmp'):
+                    remove(f'{part_file}.tmp')
+                part_file = part_file[:-len(EXTENSIONS['parquet'])] + EXTENSIONS['jsonl']
+
+        with gzip.open(f'{part_file}.tmp', 'wt', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, default=str))
+                f.write('\n')
+        replace(f'{part_file}.tmp', part_file)
+        return part_file
+
+    def append(self, site, data, person='', date=None):
+        """
+        Saves site records as a new part of the site's partition for the day.
+
+        :param site: str, ex: 'Spokeo'
+        :param data: Pandas.DataFrame of site records indexed by '@id', such as AbstractCollector.data_from_website.
+        :param person: str naming the person the records were collected for.
+        :param date: str 'YYYY-MM-DD' of the partition. Defaults to today.
+        :return: str of the file written, or None if there was nothing to save.
+        """
+        if len(data.index) == 0:
+            return None
+
+        collected = datetime.now()
+        date = collected.strftime('%Y-%m-%d') if date is None else str(date)
+
+        data = data.reset_index()
+        data['@id'] = data['@id'].astype(str)
+        data[PERSON] = person
+        data[COLLECTED] = collected.isoformat()
+
+        part_dir = path.join(self.root, f'{SITE}={site}', f'{DATE}={date}')
+        makedirs(part_dir, exist_ok=True)
+        part_file = path.join(part_dir, 'part-{time}-{id}{ext}'.format(
+            time=collected.strftime('%H%M%S'),
+            id=uuid4().hex[:8],
+            ext=EXTENSIONS[self.file_format]))
+        return self._write_part(part_file, self._records(data))
+
+    def partitions(self, sites=None, since=None, until=None):
+        """
+        :param sites: list() of str. Defaults to every site.
+        :param since: str 'YYYY-MM-DD' of the first day to include.
+        :param until: str 'YYYY-MM-DD' of the last day to include.
+        :return: list() of (site, date, partition directory)
+        """
+        partitions = list()
+        if not path.exists(self.root):
+            return partitions
+
+        for site_dir in scandir(self.root):
+            site = _partition_value(site_dir.name, SITE)
+            if not site_dir.is_dir() or site is None or (sites is not None and site not in sites):
+                continue
+            for date_dir in scandir(site_dir.path):
+                date = _partition_value(date_dir.name, DATE)
+                if not date_dir.is_dir() or date is None:
+                    continue
+                if (since is not None and date < str(since)) or (until is not None and date > str(until)):
+                    continue
+                partitions.append((site, date, date_dir.path))
+        return sorted(partitions)
+
+    @staticmethod
+    def _parts(partition_dir):
+        return sorted(
+            entry.path for entry in scandir(partition_dir)
+            if entry.is_file() and entry.name.endswith(tuple(EXTENSIONS.values()))
+        )
+
+    @staticmethod
+    def _read_part(part_file, columns=None):
+        """:return: list() of dict(), the records of a part with only the given columns."""
+        if part_file.endswith(EXTENSIONS['parquet']):
+            if pq is None:
+                raise ImportError(f'pyarrow is needed to read {part_file}')
+            if columns is not None:
+                columns = [c for c in pq.read_schema(part_file).names if c in columns]
+            return pq.read_table(part_file, columns=columns).to_pylist()
+
+        with gzip.open(part_file, 'rt', encoding='utf-8') as f:
+            records = [json.loads(line) for line in f if len(line.strip()) > 0]
+        if columns is not None:
+            records = [{k: v for k, v in record.items() if k in columns} for record in records]
+        return records
+
+    def read(self, sites=None, since=None, until=None, columns=None, person=None):
+        """
+        Loads the saved site records. Only the partitions of the given sites and days are opened, and only the given
+            columns are read from them.
+
+        :param sites: list() of str. Defaults to every site.
+        :param since: str 'YYYY-MM-DD' of the first day to include.
+        :param until: str 'YYYY-MM-DD' of the last day to include.
+        :param columns: list() of str. Defaults to every column. '@id', 'site' and 'date' are always included.
+        :param person: str, only the records collected for this person.
+        :return: Pandas.DataFrame
+        """
+        read_columns = None
+        if columns is not None:
+            read_columns = {'@id', *columns} | ({PERSON} if person is not None else set())
+
+        records = list()
+        for site, date, partition_dir in self.partitions(sites, since, until):
+            for part_file in self._parts(partition_dir):
+                for record in self._read_part(part_file, read_columns):
+                    if person is not None and record.get(PERSON) != person:
+                        continue
+                    record[SITE], record[DATE] = site, date
+                    records.append(record)
+
+        data = pd.DataFrame(records)
+        if columns is not None:
+            data = data.reindex(columns=['@id', *[c for c in columns if c != '@id'], SITE, DATE])
+        return data
+
+    def _rewrite(self, site, change, person=None):
+        """
+        Applies change to the records of every part of a site, and replaces the parts that changed.
+
+        :param change: callable taking and returning a list() of dict() records.
+        :return: int for the number of parts replaced.
+        """
+        replaced = 0
+        with self._lock:
+            for _, _, partition_dir in self.partitions([site]):
+                for part_file in self._parts(partition_dir):
+                    records = self._read_part(part_file)
+                    mine = [r for r in records if person is None or r.get(PERSON) == person]
+                    others = [r for r in records if not (person is None or r.get(PERSON) == person)]
+                    changed = change(mine)
+                    if changed == mine:
+                        continue
+
+                    new_file = self._write_part(part_file, others + changed) if len(others + changed) > 0 else None
+                    if new_file != part_file:
+                        remove(part_file)
+                    replaced += 1
+        return replaced
+
+    def drop(self, site, record_ids, person=None):
+        """
+        Removes records from every saved part of a site.
+
+        :param site: str
+        :param record_ids: list() of str
+        :param person: str, only drop the records collected for this person.
+        :return: int for the number of parts replaced.
+        """
+        record_ids = {str(record_id) for record_id in record_ids}
+        return self._rewrite(site, lambda records: [r for r in records if r['@id'] not in record_ids], person)
+
+    def update(self, site, values, person=None):
+        """
+        Sets fields on saved records, ex: to mark records as opted out.
+
+        :param site: str
+        :param values: Pandas.DataFrame indexed by '@id' of the fields to set.
+        :param person: str, only update the records collected for this person.
+        :return: int for the number of parts replaced.
+        """
+        values = self._records(values.set_axis(values.index.astype(str)).reset_index().rename(
+            columns={'index': '@id'}))
+        values = {record.pop('@id'): record for record in values}
+        return self._rewrite(
+            site, lambda records: [{**r, **values.get(r['@id'], dict())} for r in records], person)
+
+
+def get_results_store():
+    """
+    Gets the process wide ResultsStore, creating it on first use.
+
+    :return: ResultsStore
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ResultsStore()
+        return _store
@@ -0,0 +1,223 @@
+import logging
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from threading import Lock
+from urllib.parse import urlsplit
+
+from collectors.errors import Throttled
+from definitions import SETTINGS
+
+THROTTLE_SETTINGS = SETTINGS.get('throttle', dict())
+
+# Defaults for every host in "hosts". Rates are in requests per second.
+RATE = THROTTLE_SETTINGS.get('rate', 1.0)  # rate a host starts at
+BURST = THROTTLE_SETTINGS.get('burst', 3)  # requests that may go out back to back after a pause
+MIN_RATE = THROTTLE_SETTINGS.get('min_rate', 0.05)
+MAX_RATE = THROTTLE_SETTINGS.get('max_rate', 5.0)
+INCREASE = THROTTLE_SETTINGS.get('increase', 0.05)  # added to the rate after each request that isn't throttled
+DECREASE = THROTTLE_SETTINGS.get('decrease', 0.5)  # the rate is multiplied by this each time a host throttles
+COOLDOWN = THROTTLE_SETTINGS.get('cooldown', 5)  # seconds to pause after throttling without a Retry-After
+MAX_WAIT = THROTTLE_SETTINGS.get('max_wait', 300)  # longest pause, in seconds, before giving up with Throttled
+MAX_RETRIES = THROTTLE_SETTINGS.get('max_retries', 3)  # times a throttled request is retried
+STATUS_CODES = THROTTLE_SETTINGS.get('status_codes', [429, 503])
+# Text of the block or captcha pages the hosts serve, often with a 200. Checked in the pages loaded by the browsers and
+#   in the responses of CollectorSession, which back off and retry as they do for a 429.
+BLOCK_MARKERS = THROTTLE_SETTINGS.get('block_markers', list())
+HOSTS = THROTTLE_SETTINGS.get('hosts', dict())  # per host overrides, ex: {"spokeo.com": {"rate": 2}}
+
+_limiter = None
+_limiter_lock = Lock()
+
+
+def parse_retry_after(value):
+    """
+    :param value: str of a Retry-After header, either seconds or an HTTP date.
+    :return: float of the seconds to wait, or None if value is missing or can't be read.
+    """
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class TokenBucket:
+    """
+    Paces the requests to one host, adapting its rate to what the host tolerates (additive increase, multiplicative
+        decrease).
+
+    Every request that goes through raises the rate by `increase`, up to max_rate, so a host is probed for the fastest
+        rate it accepts. Each time the host throttles (a 429, or a block page) the rate is cut by `decrease`, down to
+        min_rate, and requests pause for the host's Retry-After, or for a cooldown that doubles while the host keeps
+        throttling.
+    """
+
+    def __init__(self, host, rate=RATE, burst=BURST, min_rate=MIN_RATE, max_rate=MAX_RATE, increase=INCREASE,
+                 decrease=DECREASE, cooldown=COOLDOWN, max_wait=MAX_WAIT):
+        self.host = host
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.max_wait = max_wait
+
+        self.tokens = float(burst)
+        self.strikes = 0  # throttles since the last request that went through
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = Lock()
+
+    def _refill(self, now):
+        self.tokens = min(float(self.burst), self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Waits until a request may be sent to the host."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = max(self._paused_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(wait)
+
+    def succeeded(self):
+        """Raises the rate after a request that wasn't throttled."""
+        with self._lock:
+            self.strikes = 0
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def throttled(self, retry_after=None):
+        """
+        Cuts the rate and pauses the host after it throttled a request.
+
+        :param retry_after: float of the seconds the host asked to wait, if it said.
+        :raise Throttled: if the host asked to wait longer than max_wait.
+        """
+        with self._lock:
+            self.strikes += 1
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self.tokens = 0.0
+            wait = self.cooldown * 2 ** (self.strikes - 1) if retry_after is None else retry_after
+            if wait > self.max_wait:
+                raise Throttled(f'{self.host} asked to wait {wait:.0f} seconds', retry_after=wait)
+            self._paused_until = max(self._paused_until, time.monotonic() + wait)
+        logging.warning(f'{self.host} is throttling, pausing {wait:.0f}s and slowing to {self.rate:.2f} requests/s')
+
+
+class RateLimiter:
+    """
+    The TokenBucket of each Data Broker, found by the host of a url. Hosts that aren't in the "hosts" setting (or in
+        the hosts given) aren't limited. Each egress proxy (see collectors.proxies) gets its own bucket for a host,
+        since the host limits each address separately.
+    """
+
+    def __init__(self, hosts=None, max_retries=MAX_RETRIES, status_codes=STATUS_CODES, block_markers=BLOCK_MARKERS):
+        """
+        :param hosts: dict() of {host: dict() of TokenBucket arguments}. A host also matches its subdomains.
+        :param max_retries: int for the number of times a throttled request is retried.
+        :param status_codes: list() of the HTTP status codes that mean a host is throttling.
+        :param block_markers: list() of str found in the block pages of the hosts.
+        """
+        self.hosts = HOSTS if hosts is None else hosts
+        self.max_retries = max_retries
+        self.status_codes = set(status_codes)
+        self.block_markers = list(block_markers)
+        self._buckets = dict()  # {(host, proxy): TokenBucket}
+        self._lock = Lock()
+
+    def bucket(self, url, proxy=None):
+        """
+        :param url: str
+        :param proxy: str of the proxy url the request goes through, if any.
+        :return: TokenBucket of the url's host, or None if it isn't limited.
+        """
+        host = (urlsplit(url).hostname or '').lower()
+        while host != '' and host not in self.hosts:
+            host = host.partition('.')[2]
+        if host == '':
+            return None
+
+        with self._lock:
+            if (host, proxy) not in self._buckets:
+                self._buckets[(host, proxy)] = TokenBucket(host, **self.hosts[host])
+            return self._buckets[(host, proxy)]
+
+    def blocked(self, page_source):
+        """:return: Boolean, True if the page is a block page."""
+        return any(marker in page_source for marker in self.block_markers)
+
+    def request(self, url, send, is_throttled, retry_after=lambda result: None, discard=lambda result: None,
+                proxy=None, max_retries=None):
+        """
+        Sends a request at the pace of its host, retrying it while the host throttles.
+
+        :param url: str
+        :param send: callable sending the request and returning its result.
+        :param is_throttled: callable taking the result, True if the host throttled the request.
+        :param retry_after: callable taking a throttled result and returning the seconds to wait, or None.
+        :param discard: callable taking a throttled result, to release it (ex: close a response) before a retry.
+        :param proxy: str of the proxy url the request goes through, if any.
+        :param max_retries: int, overrides self.max_retries.
+        :return: the result of send()
+        :raise Throttled: if the host is still throttling after max_retries retries.
+        """
+        bucket = self.bucket(url, proxy)
+        if bucket is None:
+            return send()
+
+        max_retries = self.max_retries if max_retries is None else max_retries
+        for _ in range(max_retries + 1):
+            bucket.acquire()
+            result = send()
+            if not is_throttled(result):
+                bucket.succeeded()
+                return result
+            wait = retry_after(result)
+            discard(result)
+            bucket.throttled(wait)
+        raise Throttled(f'{bucket.host} is still throttling after {max_retries} retries', retry_after=wait)
+
+
+def get_rate_limiter():
+    """
+    Gets the process wide RateLimiter, creating it on first use.
+
+    :return: RateLimiter
+    """
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter()
+        return _limiter
+
+
+def browser_get(driver, url, limiter=None, proxy=None, max_retries=None):
+    """
+    Loads a url in a browser at the pace of its host, reloading it while the host serves a block page.
+
+    :param driver: selenium WebDriver
+    :param url: str
+    :param limiter: RateLimiter. Defaults to the shared one.
+    :param proxy: str of the proxy url the browser goes through, if any.
+    :param max_retries: int, overrides the limiter's max_retries.
+    :raise Throttled: if the host is still throttling after the limiter's retries.
+    """
+    limiter = get_rate_limiter() if limiter is None else limiter
+    return limiter.request(url, lambda: driver.get(url),
+                           lambda _: len(limiter.block_markers) > 0 and limiter.blocked(driver.page_source),
+                           proxy=proxy, max_retries=max_retries)
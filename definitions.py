@@ -1,33 +1,49 @@
 import os
-import pandas as pd
 import json
-import shutil
+from functools import lru_cache
 
 ROOT_DIR = os.path.dirname(f'{os.path.abspath(__file__)}')
 TEST_DIR = os.path.join(ROOT_DIR, 'tests')
 FILES_DIR = os.path.join(ROOT_DIR, 'files')
 OUTPUT_DIR = os.path.join(FILES_DIR, 'output')
+CACHE_DIR = os.path.join(FILES_DIR, 'cache')
+RESULTS_DIR = os.path.join(FILES_DIR, 'results')
 NAMES_DIR = os.path.join(FILES_DIR, 'names.csv')
 EMAIL_DIR = os.path.join(FILES_DIR, 'email.txt')
+REVIEW_DIR = os.path.join(FILES_DIR, 'review.sqlite')
+INDEX_DIR = os.path.join(FILES_DIR, 'index.sqlite')
+JOURNAL_DIR = os.path.join(FILES_DIR, 'journal.jsonl')
+PHOTOS_DIR = os.path.join(FILES_DIR, 'photos')
+METRICS_DIR = os.path.join(FILES_DIR, 'metrics.json')
+PROFILES_DIR = os.path.join(FILES_DIR, 'profiles')
 TEMPLATES_DIR = os.path.join(ROOT_DIR, 'templates')
 
 DRIVERS_DIR = os.path.join(ROOT_DIR, 'drivers', )
 SETTINGS_DIR = os.path.join(ROOT_DIR, 'settings', )
+CONFIG_DIR = os.path.join(SETTINGS_DIR, 'config.json')
 
 try:
-    PEOPLE = pd.read_csv(NAMES_DIR, index_col=0).fillna('')
-except FileNotFoundError:
-    PEOPLE = pd.DataFrame()
+    with open(CONFIG_DIR) as f:
+        SETTINGS = json.load(f)
+except (FileNotFoundError, json.JSONDecodeError):
+    SETTINGS = dict()
 
 CHROME_DRIVER_DIR = os.path.join(DRIVERS_DIR, 'chromedriver.exe')
 # FIREFOX_DRIVER_DIR = os.path.join(DRIVERS_DIR, '')
 
-SCROLL_PAUSE_TIME = 1.5
-try:
-    with open(os.path.join(FILES_DIR, 'email.txt')) as f:
-        EMAIL = f.readlines()[0].strip()
-except FileNotFoundError:
-    EMAIL = ''
+
+@lru_cache(maxsize=None)
+def load_email(email_file=EMAIL_DIR):
+    """
+    :param email_file: str of the file holding the email given to the Data Brokers on its first line.
+    :return: str, '' if there is no such file.
+    """
+    try:
+        with open(email_file) as f:
+            return f.readlines()[0].strip()
+    except (FileNotFoundError, IndexError):
+        return ''
+
 
 STATES = {'AL': 'ALABAMA', 'AK': 'ALASKA', 'AZ': 'ARIZONA', 'AR': 'ARKANSAS', 'CA': 'CALIFORNIA', 'CO': 'COLORADO',
           'CT': 'CONNECTICUT', 'DE': 'DELAWARE', 'FL': 'FLORIDA', 'GA': 'GEORGIA', 'HI': 'HAWAII', 'ID': 'IDAHO',
@@ -1,19 +1,16 @@
-import os
+import argparse
 
-from definitions import OUTPUT_DIR
 from removers.spokeo import SpokeoRemovr
 
-# for folder_name, subfolders, filenames in os.walk(OUTPUT_DIR):
-#     print(folder_name)
-#     for subfolder in subfolders:
-#         print(f'\t└ {subfolder}')
-#         for file in filenames
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Opts a person out of the Data Brokers that list them')
+    parser.add_argument('person', help='the person the records were saved under, ex: Smith_John')
+    args = parser.parse_args(argv)
 
-for folder_name, subfolders, file_names in os.walk(os.path.join(OUTPUT_DIR, 'Austin_Gifford')):
-    for file_name in file_names:
-        print(folder_name)
-        with SpokeoRemovr(os.path.join(folder_name, file_name)) as s:
-            s.opt_out()
+    with SpokeoRemovr(args.person) as s:
+        s.opt_out()
 
 
+if __name__ == '__main__':
+    main()
@@ -6,66 +6,84 @@ from random import randint
 from os import path, remove, makedirs
 from urllib.parse import urljoin
 
-import pyautogui
-import pandas as pd
-from selenium.webdriver import Chrome
+from selenium.webdriver import Chrome, ChromeOptions
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as ec
 from selenium.webdriver.common.by import By
 
-from definitions import EMAIL, FILES_DIR
+from collectors.index import get_record_index
+from collectors.proxies import get_proxy_pool
+from collectors.store import get_results_store
+from collectors.throttle import browser_get
+from definitions import FILES_DIR, load_email
 
 
 logging.basicConfig(level=logging.DEBUG, format=' %(asctime)s - %(levelname)s - %(message)s')
 logging.disable(logging.DEBUG)
 
-pyautogui.PAUSE = 1
-pyautogui.FAILSAFE = True
-
 BASE_URL = 'https://www.spokeo.com'
 
 TIMEOUT = 5  # seconds
 
 
+def _pyautogui():
+    """
+    Imports pyautogui on first use, as it needs a display the moment it is imported.
+
+    :return: the pyautogui module
+    """
+    import pyautogui
+
+    pyautogui.PAUSE = 1
+    pyautogui.FAILSAFE = True
+    return pyautogui
+
+
 class SpokeoRemovr:
-    def __init__(self, csv_file, email=''):
-        self.csv_file = csv_file
-        self.df = pd.read_csv(self.csv_file, index_col=0)
+    def __init__(self, person, email='', store=None):
+        """
+        :param person: str the records were saved under in the results store, ex: 'Smith_John'
+        :param email: str of the email to give Spokeo. Defaults to files/email.txt
+        :param store: ResultsStore holding the Spokeo records. Defaults to the shared store.
+        """
+        self.person = person
+        self.store = get_results_store() if store is None else store
+        self.df = self.store.read(sites=['Spokeo'], person=person, columns=['url', 'opted_out', 'opt_out_date'])
+        self.df = self.df.drop_duplicates('@id', keep='last').set_index('@id')
         self.base_url = BASE_URL
         self.opt_out_url = urljoin(self.base_url, 'optout')
-        self.email = {True: email, False: EMAIL}[email != '']
+        self.email = {True: email, False: load_email()}[email != '']
         self.output_dir = path.join(FILES_DIR, 'Removr', type(self).__name__)
         if not path.exists(self.output_dir):
             makedirs(self.output_dir)
         self._short_sleep = lambda: sleep(random.uniform(0, 1))
         self._sleep = lambda: sleep(random.uniform(0, 3))
 
-        if 'opted_out' not in self.df.index:
-            self.df['opted_out'] = False
-
-        if 'opt_out_date' not in self.df.index:
-            self.df['opt_out_date'] = ''
+        self.df['opted_out'] = self.df['opted_out'].fillna(False).astype(bool)
+        self.df['opt_out_date'] = self.df['opt_out_date'].fillna('')
 
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.df.to_csv(self.csv_file)
+        self.store.update('Spokeo', self.df[['opted_out', 'opt_out_date']], person=self.person)
+        get_record_index().mark_opted_out('Spokeo', list(self.df.index[self.df['opted_out']]))
         return True
 
     def opt_out(self):
         for i, record in self.df.iterrows():
-            if record.opted_out is False:
+            if not record.opted_out:
                 self._opt_out(record.url)
                 self.df.loc[i, 'opted_out'] = True
-                self.df.loc[i, 'opt_out_date'] = datetime.today()
+                self.df.loc[i, 'opt_out_date'] = datetime.today().isoformat()
 
     def _click_element(self, element):
         element_dir = path.join(self.output_dir, f'{element.id}.png')
         with open(element_dir, 'wb') as f:
             f.write(bytes(element.screenshot_as_png))
 
+        pyautogui = _pyautogui()
         self._short_sleep()
         element_loc = pyautogui.locateOnScreen(element_dir)
         remove(element_dir)
@@ -76,8 +94,13 @@ class SpokeoRemovr:
         pyautogui.click()
 
     def _opt_out(self, url):
-        with Chrome() as driver:
-            driver.get(self.opt_out_url)
+        options = ChromeOptions()
+        proxy = get_proxy_pool().assign(self.person)
+        if proxy is not None:
+            options.add_argument(f'--proxy-server={proxy}')
+
+        with Chrome(options=options) as driver:
+            browser_get(driver, self.opt_out_url, proxy=proxy)
             re_captcha = WebDriverWait(driver, TIMEOUT).until(
                 ec.presence_of_element_located(
                     (By.XPATH, "//iframe[starts-with(@src, 'https://www.google.com/recaptcha/api2/anchor?ar=')]")))
@@ -0,0 +1,85 @@
+import pytest
+
+from benchmarks import load
+from benchmarks.broker import MockBroker
+from collectors import Spokeo, Radaris, MyLife
+from collectors.abstract import main as abstract
+from collectors.errors import SiteSchemaChange
+from collectors.session import CollectorSession
+from collectors.throttle import RateLimiter
+from tests import TEST_PERSON
+
+PERSON = TEST_PERSON.copy()
+PERSON['givenName'], PERSON['familyName'] = 'Ada', 'Lovelace'
+
+
+def _session():
+    return CollectorSession(timeout=5, rate_limiter=RateLimiter(hosts={}))
+
+
+def test_base_url_override(monkeypatch):
+    assert Radaris(PERSON, test=True).url.startswith('https://radaris.com/ng/search?')
+    assert Radaris(PERSON, base_url='http://127.0.0.1:8000/', test=True).url.startswith(
+        'http://127.0.0.1:8000/ng/search?ff=Ada&fl=Lovelace')
+
+    monkeypatch.setitem(abstract.BASE_URLS, 'Spokeo', 'http://127.0.0.1:8001/spokeo/')
+    assert Spokeo(PERSON, test=True).url == 'http://127.0.0.1:8001/spokeo/Ada-Lovelace/California/Los-Angeles'
+
+
+def test_search_pages():
+    with MockBroker(sites=['Spokeo', 'Radaris']) as broker:
+        for collector in [Spokeo, Radaris]:
+            c = collector(PERSON, base_url=broker.base_urls[collector.__name__], test=True)
+            with _session().get(c.url) as res:
+                c.content = res.content
+            c.get_data()
+            assert len(c.data_from_website.index) == 20
+            assert all('Lovelace' in name for name in c.data_from_website['name'])
+        assert broker.stats == {'Spokeo': {'ok': 1}, 'Radaris': {'ok': 1}}
+
+
+def test_mylife_search_api():
+    with MockBroker(sites=['MyLife']) as broker:
+        c = MyLife(PERSON, base_url=broker.base_urls['MyLife'], search_api=broker.search_api, test=True)
+        assert c._get_api_data()
+        assert list(c.data_from_website.index) == ['e1', 'e2', 'e3']
+
+        with _session().get(c.data_from_website['url'].iloc[0]) as res:
+            record = c._parse_deep_page(res.text)
+        assert record['familyName'] == 'Lovelace'
+        with _session().get(record['pictures'][0]) as res:
+            assert res.headers['Content-Type'] == 'image/jpeg'
+
+
+def test_faults():
+    with MockBroker(sites=['Radaris'], throttle_rate=1, retry_after=7) as broker:
+        with _session().get(broker.base_urls['Radaris'] + 'ng/search?ff=Ada') as res:
+            assert res.status_code == 429 and res.headers['Retry-After'] == '7'
+
+    with MockBroker(sites=['Radaris'], schema_change_rate=1) as broker:
+        c = Radaris(PERSON, base_url=broker.base_urls['Radaris'], test=True)
+        with _session().get(c.url) as res:
+            c.content = res.content
+        with pytest.raises(SiteSchemaChange):
+            c.get_data()
+
+
+def test_load_runs_the_scheduler(monkeypatch):
+    base_urls = dict(abstract.BASE_URLS)
+    committed = list()
+    commit = load.CollectionScheduler._commit
+
+    def _commit(self, job, result):
+        committed.append(job)
+        commit(self, job, result)
+    monkeypatch.setattr(load.LoadScheduler, '_commit', _commit)
+
+    with MockBroker(sites=['Spokeo', 'Radaris'], latency=0, jitter=0, schema_change_rate=1) as broker:
+        results = load.run(broker, people=3, workers=2, rate=0)
+
+    # Every job failed, and each was counted rather than stopping the batch.
+    assert results['jobs'] == 6
+    assert {site: result['outcomes'] for site, result in results['sites'].items()} == {
+        'Spokeo': {'SiteSchemaChange': 3}, 'Radaris': {'SiteSchemaChange': 3}}
+    assert committed == [(person, site) for person in range(3) for site in range(2)]
+    assert abstract.BASE_URLS == base_urls
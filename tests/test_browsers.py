@@ -0,0 +1,100 @@
+from threading import Thread
+
+import pytest
+
+from collectors.browsers import BrowserPool
+from collectors.errors import NoBrowser
+
+
+class FakeDriver:
+    """Stands in for a selenium WebDriver."""
+    started = 0
+
+    def __init__(self):
+        type(self).started += 1
+        self.cookies = {}
+        self.current_url = 'about:blank'
+        self.closed = False
+
+    def get(self, url):
+        self.current_url = url
+        if url != 'about:blank':
+            self.cookies[url] = 'session'
+
+    def execute_cdp_cmd(self, cmd, cmd_args):
+        self.cookies = {}
+
+    def execute_script(self, script):
+        pass
+
+    def quit(self):
+        self.closed = True
+
+
+def test_pool_reuses_and_recycles_browsers():
+    FakeDriver.started = 0
+    pool = BrowserPool(size=2, max_pages=3, factory=FakeDriver)
+
+    for _ in range(2):
+        with pool.browser() as driver:
+            driver.get('https://example.com/a')
+        assert driver.cookies == {}
+    assert FakeDriver.started == 1
+
+    with pool.browser() as driver:
+        driver.get('https://example.com/b')
+    assert driver.driver.closed
+    with pool.browser() as driver:
+        pass
+    assert FakeDriver.started == 2
+
+
+def test_pool_size_is_respected():
+    FakeDriver.started = 0
+    pool = BrowserPool(size=2, factory=FakeDriver)
+
+    def _search():
+        for _ in range(5):
+            with pool.browser() as driver:
+                driver.get('https://example.com/')
+
+    threads = [Thread(target=_search) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert FakeDriver.started <= 2
+    pool.close()
+
+
+def test_discarded_browsers_wake_waiting_borrowers():
+    FakeDriver.started = 0
+    pool = BrowserPool(size=1, max_pages=1, factory=FakeDriver)
+    searched = list()
+
+    def _search():
+        browser = pool.checkout(timeout=5)
+        try:
+            browser.get('https://example.com/')
+        finally:
+            pool.checkin(browser)
+        searched.append(browser)
+
+    # Every browser is worn out after one page, so each borrower waits on one being discarded, not returned.
+    threads = [Thread(target=_search) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+    assert len(searched) == 4
+    assert FakeDriver.started == 4
+    assert pool._open == 0
+
+
+def test_checkout_timeout():
+    pool = BrowserPool(size=1, factory=FakeDriver)
+    browser = pool.checkout()
+    with pytest.raises(NoBrowser):
+        pool.checkout(timeout=0.05)
+    pool.checkin(browser)
+    assert pool.checkout(timeout=0.05) is browser
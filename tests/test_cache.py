@@ -0,0 +1,78 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from threading import Thread
+
+import pytest
+
+from collectors.cache import ResponseCache
+from collectors.errors import CacheMiss
+from collectors.session import CollectorSession
+from collectors.throttle import RateLimiter
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    requests_seen = list()
+
+    def do_GET(self):
+        self.requests_seen.append(self.path)
+        if self.headers.get('If-None-Match') == '"v1"':
+            self.send_response(304)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = f'page {self.path}'.encode()
+        self.send_response(200)
+        self.send_header('ETag', '"v1"')
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def server():
+    _Handler.requests_seen = list()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+    server.server_close()
+
+
+def test_cache_hit_and_revalidate(server, tmp_path):
+    session = CollectorSession(timeout=2)
+    cache = ResponseCache(str(tmp_path), ttl=60)
+    assert cache.fetch(f'{server}/a', session=session).text == 'page /a'
+    assert cache.fetch(f'{server}/a', session=session).from_cache
+    assert _Handler.requests_seen == ['/a']
+
+    cache.ttl = 0
+    response = cache.fetch(f'{server}/a', session=session)
+    assert response.from_cache and response.text == 'page /a'
+    assert _Handler.requests_seen == ['/a', '/a']
+
+
+def test_cache_replay_and_eviction(server, tmp_path):
+    session = CollectorSession(timeout=2)
+    cache = ResponseCache(str(tmp_path), max_bytes=len('page /a') * 2)
+    for page in ('a', 'b', 'c'):
+        cache.fetch(f'{server}/{page}', session=session)
+    assert cache.size() <= cache.max_bytes
+
+    cache.mode = 'replay'
+    assert cache.fetch(f'{server}/c', session=session).text == 'page /c'
+    with pytest.raises(CacheMiss):
+        cache.fetch(f'{server}/a', session=session)
+    assert _Handler.requests_seen == ['/a', '/b', '/c']
+
+
+def test_block_pages_are_not_cached(server, tmp_path):
+    session = CollectorSession(timeout=2, rate_limiter=RateLimiter(hosts={}, block_markers=['page /blocked']))
+    cache = ResponseCache(str(tmp_path), ttl=60)
+    for page in ('blocked', 'blocked', 'a', 'a'):
+        cache.fetch(f'{server}/{page}', session=session)
+    assert _Handler.requests_seen == ['/blocked', '/blocked', '/a']
+    assert list(tmp_path.rglob('*.tmp')) == []
@@ -0,0 +1,83 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from os import path, listdir
+from threading import Thread
+import json
+
+import pytest
+import requests
+
+from collectors.downloads import Downloader
+
+PICTURE = b'\xff\xd8\xff' + b'picture' * 1000
+
+
+class PictureHandler(BaseHTTPRequestHandler):
+    """Serves the same picture at every path, with an ETag, and counts the requests it gets."""
+    requests = list()
+
+    def do_GET(self):
+        PictureHandler.requests.append((self.path, self.headers.get('If-None-Match')))
+        if self.path == '/missing.jpg':
+            self.send_response(404)
+            self.end_headers()
+        elif self.headers.get('If-None-Match') == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+        else:
+            self.send_response(200)
+            self.send_header('Content-Type', 'image/jpeg')
+            self.send_header('Content-Length', str(len(PICTURE)))
+            self.send_header('ETag', '"v1"')
+            self.end_headers()
+            self.wfile.write(PICTURE)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    PictureHandler.requests = list()
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), PictureHandler)
+    Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{httpd.server_port}'
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_download_all(tmp_path, server):
+    downloader = Downloader(root=str(tmp_path / 'photos'), workers=3, session=requests.Session())
+    john, jane = str(tmp_path / 'john'), str(tmp_path / 'jane')
+
+    downloaded = downloader.download_all([
+        (f'{server}/a.jpg', john, '0_a'),
+        (f'{server}/b.jpg', john, '0_b'),
+        (f'{server}/a.jpg', jane, '0_a'),
+        (f'{server}/missing.jpg', jane, '1_a'),
+    ])
+
+    assert downloaded[:3] == [path.join(john, '0_a.jpeg'), path.join(john, '0_b.jpeg'), path.join(jane, '0_a.jpeg')]
+    assert downloaded[3] is None
+    with open(downloaded[0], 'rb') as f:
+        assert f.read() == PICTURE
+
+    # The same picture at two urls is stored once, and listed in each person's manifest.
+    blobs = [name for name in listdir(tmp_path / 'photos' / 'blobs') if not name.endswith('.tmp')]
+    assert len(blobs) == 1
+    with open(path.join(john, 'manifest.json')) as f:
+        assert sorted(json.load(f)) == ['0_a.jpeg', '0_b.jpeg']
+
+    # A url that is already known isn't requested again.
+    requested = len(PictureHandler.requests)
+    downloader.download(f'{server}/a.jpg', john, '0_a')
+    assert len(PictureHandler.requests) == requested
+
+
+def test_revalidate(tmp_path, server):
+    downloader = Downloader(root=str(tmp_path / 'photos'), revalidate_after=0, session=requests.Session())
+    downloader.download(f'{server}/a.jpg', str(tmp_path / 'john'), '0_a')
+    downloaded = downloader.download(f'{server}/a.jpg', str(tmp_path / 'john'), '0_a')
+
+    assert PictureHandler.requests == [('/a.jpg', None), ('/a.jpg', '"v1"')]
+    with open(downloaded, 'rb') as f:
+        assert f.read() == PICTURE
@@ -0,0 +1,44 @@
+from os import path
+
+import pytest
+
+from collectors import Spokeo, Radaris
+from collectors.extract import BACKENDS, ld_json, preloaded_state
+from tests import TEST_PERSON
+
+PAGES_DIR = path.join(path.dirname(__file__), 'fixtures', 'pages')
+
+
+def page(site):
+    with open(path.join(PAGES_DIR, f'{site}.html'), 'rb') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_backends_agree(backend):
+    assert ld_json(page('spokeo'), backend=backend) == ld_json(page('spokeo'), backend='strainer')
+    assert len(ld_json(page('spokeo'), backend=backend)) == 2
+    assert ld_json(page('mylife'), backend=backend)[0]['about']['description'].startswith('John Allen Smith, age 42,\n')
+    assert preloaded_state(page('spokeo'), backend=backend)['data']['total'] == 20
+    assert preloaded_state(page('radaris'), backend=backend) is None
+
+
+def test_spokeo_records_from_page():
+    collector = Spokeo(TEST_PERSON.copy(), test=True)
+    collector.content = page('spokeo')
+    collector.get_data()
+
+    assert len(collector.data_from_website.index) == 20
+    assert collector._soup is None
+    record = collector.data_from_website.loc['1000']
+    assert record['givenName'] == 'John'
+    assert record['address'][0]['@type'] == 'PostalAddress'
+
+
+def test_radaris_records_from_page():
+    collector = Radaris(TEST_PERSON, test=True)
+    collector.content = page('radaris')
+    collector.get_data()
+
+    assert list(collector.data_from_website.index[:2]) == ['2000', '2001']
+    assert 'middleName' in collector.data_from_website.columns
@@ -0,0 +1,48 @@
+import pandas as pd
+import pytest
+
+from collectors.abstract import AbstractCollector
+from collectors.index import RecordIndex, NEW, CHANGED, UNCHANGED, RELISTED
+from tests import TEST_PERSON
+
+
+def records(*names):
+    return pd.DataFrame([{'@id': str(i), 'name': name} for i, name in names]).set_index('@id')
+
+
+def test_record_index(tmp_path):
+    index = RecordIndex(str(tmp_path / 'index.sqlite'))
+
+    assert index.update('Spokeo', records((1, 'John Smith'), (2, 'Jon Smith')), 'Smith_John') == {
+        '1': NEW, '2': NEW}
+    assert list(index.new()['record_id']) == ['1', '2']
+
+    index.mark_opted_out('Spokeo', ['2'])
+    assert index.relisted().empty
+
+    statuses = index.update('Spokeo', records((1, 'John A Smith'), (2, 'Jon Smith'), (3, 'J Smith')), 'Smith_John')
+    assert statuses == {'1': CHANGED, '2': RELISTED, '3': NEW}
+    assert list(index.new()['record_id']) == ['3']
+    assert list(index.changed()['record_id']) == ['1']
+    assert list(index.relisted()['record_id']) == ['2']
+
+    index.update('Radaris', records((1, 'John Smith')), 'Smith_John')
+    assert list(index.new(site='Spokeo')['record_id']) == ['3']
+    assert index.update('Radaris', records((1, 'John Smith')), 'Smith_John') == {'1': UNCHANGED}
+    assert index.new(site='Radaris').empty
+    assert len(index) == 4
+
+
+def test_collector_without_results_is_a_run(tmp_path):
+    index = RecordIndex(str(tmp_path / 'index.sqlite'))
+    with AbstractCollector(TEST_PERSON, '', test=True, record_index=index) as collector:
+        pass
+    assert index.last_run(collector.site, collector.person_key) is not None
+    assert len(index) == 0
+
+    person = TEST_PERSON.copy()
+    person['familyName'] = 'Doe'
+    with pytest.raises(ValueError):
+        with AbstractCollector(person, '', test=True, record_index=index) as collector:
+            raise ValueError
+    assert index.last_run(collector.site, collector.person_key) is None
@@ -0,0 +1,72 @@
+import pandas as pd
+import pytest
+
+from collectors import REGISTRY
+from collectors.errors import SiteSchemaChange
+from collectors.journal import Journal
+from collectors.main import collect_names_file
+from collectors.metrics import get_metrics
+from tests import test_scheduler
+from tests.test_scheduler import FailingRadaris
+
+PEOPLE = pd.DataFrame([
+    {'givenName': given_name, 'middleName': '', 'familyName': family_name, 'addressLocality': 'Boston',
+     'addressRegion': 'MA', 'checkRelatives': given_name == 'John'}
+    for given_name, family_name in [('John', 'Smith'), ('Ann', 'Lee'), ('Jane', 'Doe'), ('Bob', 'Ray')]
+])
+
+
+@pytest.fixture
+def names_file(tmp_path, monkeypatch):
+    for site in ['FakeSpokeo', 'FailingRadaris']:
+        monkeypatch.setitem(REGISTRY, site, test_scheduler.__name__)
+    monkeypatch.setattr(get_metrics(), 'write', lambda: str(tmp_path / 'metrics.json'))
+    monkeypatch.setattr(FailingRadaris, 'fail', True)
+    PEOPLE.to_csv(tmp_path / 'names.csv')
+    return str(tmp_path / 'names.csv')
+
+
+def _collect(names_file, output_file, chunk_size=2, **kwargs):
+    return collect_names_file(names_file, output_file, sites=['FakeSpokeo', 'FailingRadaris'], workers=2,
+                              chunk_size=chunk_size, journal=Journal(f'{output_file}.journal'), **kwargs)
+
+
+def test_chunks_are_written_as_they_finish(names_file, tmp_path):
+    output_file = str(tmp_path / 'out.csv')
+    with pytest.raises(SiteSchemaChange):
+        _collect(names_file, output_file)
+
+    # The first chunk, John Smith and his two relatives then Ann Lee, was written before Jane Doe failed.
+    people = pd.read_csv(output_file, index_col=0)
+    assert list(people['familyName']) == ['Smith', 'Lee', 'FakeSpokeo', 'FailingRadaris']
+
+    FailingRadaris.fail, FailingRadaris.runs = False, 0
+    assert _collect(names_file, output_file, resume=True) == 6
+    assert FailingRadaris.runs == 2  # Jane Doe and Bob Ray, the first chunk is not collected again
+
+    people = pd.read_csv(output_file, index_col=0)
+    assert list(people.index) == list(range(6))
+    assert list(people['familyName']) == ['Smith', 'Lee', 'FakeSpokeo', 'FailingRadaris', 'Doe', 'Ray']
+    assert list(people.columns) == [*PEOPLE.columns, 'ignore']
+
+
+def test_in_place(names_file):
+    FailingRadaris.fail = False
+    assert _collect(names_file, None) == 6
+    assert len(pd.read_csv(names_file, index_col=0).index) == 6
+
+
+def test_resume_before_the_first_checkpoint(names_file, tmp_path):
+    output_file = str(tmp_path / 'out.csv')
+    journal = Journal(f'{output_file}.journal')
+    with pytest.raises(SiteSchemaChange):
+        _collect(names_file, output_file, chunk_size=4)
+    assert len(journal.completed()) > 0
+
+    # Jane Doe failed in the only chunk, its finished jobs are in the journal and are not collected again.
+    runs = len([1 for _, site in journal.completed() if site == 'FailingRadaris'])
+    FailingRadaris.fail, FailingRadaris.runs = False, 0
+    assert _collect(names_file, output_file, chunk_size=4, resume=True) == 6
+    assert FailingRadaris.runs == 6 - runs
+    assert list(pd.read_csv(output_file, index_col=0)['familyName']) == [
+        'Smith', 'Lee', 'Doe', 'Ray', 'FakeSpokeo', 'FailingRadaris']
@@ -0,0 +1,40 @@
+import pandas as pd
+
+from collectors.abstract import AbstractCollector
+from collectors.abstract.main import MISMATCH_NAME, MISMATCH_LOCALITY, MATCH_AKA, MATCH_PERSON
+from collectors.matching import soundex, metaphone, levenshtein, BlockingIndex
+from tests import TEST_PERSON
+
+SITE_RECORDS = pd.DataFrame([
+    {'@id': '1', 'name': 'John Smith', 'address': [{'addressLocality': 'Los Angeles', 'addressRegion': 'CA'}]},
+    {'@id': '2', 'name': 'Jon Smyth', 'address': [{'addressLocality': 'Los Angeles', 'addressRegion': 'CA'}]},
+    {'@id': '3', 'name': 'Smith John', 'address': [{'addressLocality': 'Boston', 'addressRegion': 'MA'}]},
+    {'@id': '4', 'name': 'Jane Doe', 'address': [{'addressLocality': 'Los Angeles', 'addressRegion': 'CA'}]},
+]).set_index('@id')
+
+
+def test_phonetic_codes():
+    assert soundex('Robert') == soundex('Rupert') == 'R163'
+    assert soundex('Smith') == soundex('Smyth') == 'S530'
+    assert metaphone('Smith') == metaphone('Smyth')
+    assert metaphone('Catherine') == metaphone('Kathryn')
+
+
+def test_levenshtein():
+    assert list(levenshtein('kitten', ['sitting', 'kitten', '', 'k'])) == [3, 0, 6, 5]
+
+
+def test_fuzzy_strategy():
+    collector = AbstractCollector(TEST_PERSON, '', test=True, match_strategy='fuzzy')
+    checks = collector._classify_records(SITE_RECORDS)
+    assert list(checks['check']) == [MATCH_PERSON, MATCH_AKA, MISMATCH_LOCALITY, MISMATCH_NAME]
+    assert checks['score'].between(0, 1).all()
+
+
+def test_blocking():
+    index = BlockingIndex(SITE_RECORDS['name'])
+    assert sorted(index.candidates('Smith')) == [0, 1, 2]
+
+    # Jane Doe isn't in the Smith block, so she isn't scored.
+    collector = AbstractCollector(TEST_PERSON, '', test=True, match_strategy='fuzzy')
+    assert collector._classify_records(SITE_RECORDS).at['4', 'score'] == 0
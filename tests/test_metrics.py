@@ -0,0 +1,52 @@
+import json
+import pstats
+from os import listdir
+
+from collectors.abstract import AbstractCollector
+from collectors.metrics import Metrics, Histogram, VALIDATE, SAVE
+from tests import TEST_PERSON
+
+
+def test_histogram():
+    histogram = Histogram(buckets=[0.1, 1, 10])
+    for seconds in [0.05, 0.5, 0.5, 0.5, 20]:
+        histogram.observe(seconds)
+
+    summary = histogram.to_dict()
+    assert summary['count'] == 5
+    assert summary['buckets'] == {'0.1': 1, '1': 3, '10': 0, '+Inf': 1}
+    assert summary['p50'] == 1
+    assert summary['p95'] == 20
+
+
+def test_collector_stages(tmp_path):
+    metrics = Metrics(buckets=[1])
+    collector = AbstractCollector(TEST_PERSON, 'https://example.com', test=True)
+    collector.metrics = metrics
+    collector.interactive = False
+
+    collector.validate_data()
+    metrics.add_bytes('AbstractCollector', 1024)
+    metrics.count('AbstractCollector', 'records', 3)
+
+    with open(metrics.write(str(tmp_path / 'metrics.json'))) as f:
+        summary = json.load(f)
+    site = summary['sites']['AbstractCollector']
+    assert site['stages'][VALIDATE]['count'] == 1
+    assert SAVE not in site['stages']
+    assert site['bytes'] == 1024
+    assert site['counts'] == {'records': 3}
+
+
+def test_profile(tmp_path):
+    metrics = Metrics(profile_sites=['Spokeo'], profile_people=['John  Smith'], profiles_dir=str(tmp_path))
+
+    with metrics.profile('Radaris', 'Jane Doe'):
+        sum(range(1000))
+    assert listdir(tmp_path) == []
+
+    with metrics.profile('Radaris', 'john smith'):
+        sorted(range(1000), reverse=True)
+    profiles = listdir(tmp_path)
+    assert len(profiles) == 1 and profiles[0].startswith('Radaris_john_smith_')
+    assert pstats.Stats(str(tmp_path / profiles[0])).total_calls > 0
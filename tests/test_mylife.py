@@ -0,0 +1,147 @@
+import json
+import logging
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from os import path
+from threading import Thread
+
+import pandas as pd
+import pytest
+from selenium.common.exceptions import NoSuchElementException
+
+from collectors import MyLife
+from collectors.browsers import BrowserPool
+from collectors.errors import SiteSchemaChange
+from tests import TEST_PERSON
+
+with open(path.join(path.dirname(__file__), 'fixtures', 'mylife_search.json')) as f:
+    SEARCH_PAGES = json.load(f)
+
+PROFILE_PAGE = """<html><body>
+<script type="application/ld+json">{{"@id": "https://www.mylife.com/{slug}/{record_id}", "name": "{name}"}}</script>
+</body></html>"""
+
+
+class FakeDriver:
+    """Stands in for a selenium WebDriver, serving a MyLife profile page for each record url."""
+
+    def __init__(self):
+        self.current_url = 'about:blank'
+
+    def get(self, url):
+        self.current_url = url
+
+    @property
+    def page_source(self):
+        record_id = self.current_url.split('/')[-1]
+        if record_id == 'e2':
+            return '<html><body>Page moved</body></html>'
+        return PROFILE_PAGE.format(slug='john-smith', record_id=record_id, name=f'John {record_id} Smith')
+
+    def find_element(self, by, value):
+        if 'application/ld+json' not in self.page_source:
+            raise NoSuchElementException(value)
+        return object()
+
+    def fullscreen_window(self):
+        pass
+
+    def execute_cdp_cmd(self, cmd, cmd_args):
+        pass
+
+    def execute_script(self, script):
+        pass
+
+    def quit(self):
+        pass
+
+
+def test_gather_deep_data():
+    collector = MyLife(TEST_PERSON, test=True, browser_pool=BrowserPool(size=3, factory=FakeDriver), deep_workers=3,
+                       wait_timeout=0.2)
+    collector.data_from_website = pd.DataFrame({
+        '@id': [f'e{i}' for i in range(1, 6)],
+        'url': [f'https://www.mylife.com/john-smith/e{i}' for i in range(1, 6)],
+    }).set_index('@id')
+
+    collector._gather_deep_data()
+
+    assert list(collector.data_from_website.index) == ['e1', 'e3', 'e4', 'e5']
+    assert list(collector.data_from_website['middleName']) == ['e1', 'e3', 'e4', 'e5']
+    assert list(collector.deep_data_errors) == ['e2']
+    assert isinstance(collector.deep_data_errors['e2'], SiteSchemaChange)
+
+
+class _SearchHandler(BaseHTTPRequestHandler):
+    """Stands in for MyLife's search backend, serving the sample pages of hits."""
+    protocol_version = 'HTTP/1.1'
+    fail = False
+    broken = False
+    queries = list()
+
+    def do_POST(self):
+        query = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.queries.append(query)
+        if self.fail:
+            body, status = b'{}', 500
+        elif self.broken:
+            body, status = json.dumps({'hits': [{'name': 'JOHN SMITH', 'location': 'LOS ANGELES'}]}).encode(), 200
+        else:
+            body, status = json.dumps(SEARCH_PAGES[query['page']]).encode(), 200
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def search_api():
+    _SearchHandler.fail, _SearchHandler.broken, _SearchHandler.queries = False, False, list()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _SearchHandler)
+    Thread(target=server.serve_forever, daemon=True).start()
+    yield {'url': f'http://127.0.0.1:{server.server_port}/1/indexes/people/query'}
+    server.shutdown()
+    server.server_close()
+
+
+def test_search_api(search_api):
+    collector = MyLife(TEST_PERSON, test=True, search_api=search_api)
+    collector._get_browser_data = lambda: pytest.fail('the browser should not be used')
+
+    assert collector.get_data()
+    assert [query['page'] for query in _SearchHandler.queries] == [0, 1]
+    assert _SearchHandler.queries[0]['facetFilters'] == ['STATE:CA', 'CITY:Los Angeles']
+
+    records = collector.data_from_website
+    assert list(records.index) == ['e1', 'e2', 'e3']
+    assert list(records.columns) == [
+        '@type', 'name', 'givenName', 'middleName', 'familyName', 'url', 'address', 'workLocation', 'alumniOf']
+    assert records.at['e1', 'middleName'] == 'A'
+    assert records.at['e1', 'url'] == 'https://www.mylife.com/john-smith/e1'
+    assert records.at['e1', 'address'][0]['addressLocality'] == 'Los Angeles'
+    assert records.at['e1', 'workLocation'] == {'@type': 'Place', 'name': 'Acme Corp'}
+    assert records.at['e2', 'alumniOf'] == {'@type': 'EducationalOrganization'}
+    assert records.at['e3', 'address'][1] == {
+        '@type': 'PostalAddress', 'addressLocality': 'St Louis', 'addressRegion': 'MO'}
+
+
+def test_search_api_falls_back_to_the_browser(search_api):
+    _SearchHandler.fail = True
+    collector = MyLife(TEST_PERSON, test=True, search_api=search_api)
+    collector._get_browser_data = lambda: 'browser'
+
+    assert collector.get_data() == 'browser'
+
+
+def test_search_api_shape_change_falls_back_to_the_browser(search_api, monkeypatch):
+    _SearchHandler.broken = True
+    warnings = list()
+    monkeypatch.setattr(logging, 'warning', warnings.append)
+    collector = MyLife(TEST_PERSON, test=True, search_api=search_api)
+    collector._get_browser_data = lambda: 'browser'
+
+    assert collector.get_data() == 'browser'
+    assert len(warnings) == 1 and 'SiteSchemaChange' in warnings[0]
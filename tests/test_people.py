@@ -0,0 +1,33 @@
+import pandas as pd
+
+from collectors.abstract import AbstractCollector
+from collectors.people import PeopleRegistry
+from tests import TEST_PERSON
+
+
+def test_people_registry():
+    people = PeopleRegistry.from_frame(pd.DataFrame([TEST_PERSON]))
+    position = people.add({'givenName': 'Jane', 'middleName': 'Ann', 'familyName': 'Smith',
+                           'addressRegion': 'California', 'checkRelatives': False})
+
+    assert position == 1 and len(people) == 2
+    assert people.find({'givenName': ' jane ', 'middleName': 'ANN', 'familyName': 'Smith', 'addressRegion': 'ca'}) == 1
+    assert people.find({'givenName': 'Jane', 'familyName': 'Smith', 'addressRegion': 'CA'}) is None
+    assert people.has_name('JOHN', 'smith') and not people.has_name('John', 'Doe')
+
+    people.update(0, ignore={'relatives': [{'name': 'Jim Smith'}]})
+    assert people.row(0)['ignore'] == {'relatives': [{'name': 'Jim Smith'}]}
+    assert people.row(0).name == 0
+
+    frame = people.to_frame()
+    assert list(frame['givenName']) == ['John', 'Jane']
+    assert list(frame.columns[-1:]) == ['ignore']
+
+
+def test_check_relatives_skips_known_people():
+    person = TEST_PERSON.copy(deep=True)
+    person['checkRelatives'] = True
+    collector = AbstractCollector(person, '', test=True, interactive=False)
+    collector.data_from_website = pd.DataFrame([{'@id': '1', 'relatedTo': [{'name': 'John Smith'}]}])
+
+    assert collector.check_relatives(PeopleRegistry.from_frame(pd.DataFrame([TEST_PERSON]))) is False
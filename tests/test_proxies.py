@@ -0,0 +1,119 @@
+import socket
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from threading import Thread
+
+import pytest
+
+from collectors.abstract import AbstractCollector
+from collectors.abstract import main as abstract
+from collectors.browsers import BrowserPool
+from collectors.index import RecordIndex
+from collectors.proxies import ProxyPool, PROXY_KEY
+from collectors.session import CollectorSession
+from collectors.throttle import RateLimiter
+from tests import TEST_PERSON
+
+SITE = 'http://broker.test/search'
+
+
+def stand_in_proxy(name, status=200):
+    """Starts a local server acting as a forward proxy: it answers every request itself, naming the proxy."""
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = name.encode()
+            self.send_response(status)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+
+@pytest.fixture
+def proxies():
+    servers = list()
+
+    def _start(name, status=200):
+        server, url = stand_in_proxy(name, status)
+        servers.append(server)
+        return url
+
+    yield _start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _session(pool):
+    return CollectorSession(timeout=2, proxy_pool=pool, rate_limiter=RateLimiter(hosts={'broker.test': {'rate': 100}}))
+
+
+def _get_as(session, key):
+    token = PROXY_KEY.set(key)
+    try:
+        with session.get(SITE) as res:
+            return res.text
+    finally:
+        PROXY_KEY.reset(token)
+
+
+def test_keys_are_pinned_and_spread(proxies):
+    session = _session(ProxyPool([proxies('one'), proxies('two')]))
+
+    first = {key: _get_as(session, key) for key in ['alice', 'bob']}
+    assert sorted(first.values()) == ['one', 'two']
+    for _ in range(3):
+        assert {key: _get_as(session, key) for key in ['alice', 'bob']} == first
+
+
+def test_blocked_proxy_is_rested(proxies):
+    blocked = proxies('blocked', status=429)
+    pool = ProxyPool([blocked, proxies('ok')], cooldown=60)
+    session = _session(pool)
+
+    assert _get_as(session, 'alice') == 'ok'
+    assert not pool._proxies[blocked].healthy()
+    assert pool.assign('bob') != blocked
+
+
+def test_unreachable_proxy_is_skipped(proxies):
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        dead = f'http://127.0.0.1:{s.getsockname()[1]}'
+    pool = ProxyPool([dead, proxies('ok')], max_failures=1)
+
+    assert _get_as(_session(pool), 'alice') == 'ok'
+    assert not pool._proxies[dead].healthy()
+
+
+def test_browsers_get_a_proxy_each():
+    started = list()
+
+    class FakeDriver:
+        def __init__(self, proxy=None):
+            started.append(proxy)
+
+        def quit(self):
+            pass
+
+    pool = BrowserPool(size=2, factory=FakeDriver, proxy_pool=ProxyPool(['http://one:3128', 'http://two:3128']))
+    pool.checkout(), pool.checkout()
+    assert sorted(started) == ['http://one:3128', 'http://two:3128']
+
+
+def test_collectors_release_their_person(monkeypatch, tmp_path):
+    pool = ProxyPool(['http://one:3128', 'http://two:3128'])
+    monkeypatch.setattr(abstract, 'get_proxy_pool', lambda: pool)
+    record_index = RecordIndex(str(tmp_path / 'index.sqlite'))
+
+    with AbstractCollector(TEST_PERSON, '', test=True, record_index=record_index) as spokeo:
+        with AbstractCollector(TEST_PERSON, '', test=True, record_index=record_index):
+            pool.assign(spokeo.person_key)
+        # Another collector of the same person is still running.
+        assert spokeo.person_key in pool._keys
+    assert pool._keys == dict() and pool._holders == dict()
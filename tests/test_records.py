@@ -0,0 +1,55 @@
+import pandas as pd
+
+from collectors.abstract import AbstractCollector
+from collectors.records import Person, SiteRecord
+from tests import TEST_PERSON
+
+
+def test_person_reads_like_a_series():
+    person = Person.from_series(TEST_PERSON.rename(4))
+    person['none_relatives'] = 'x'
+
+    assert person.givenName == person['givenName'] == 'John'
+    assert person.get('middleName', '') == '' and 'middleName' not in person
+    assert person.none_relatives == 'x'
+    assert TEST_PERSON.get('none_relatives') is None
+
+    series = person.to_series()
+    assert series.name == 4
+    assert series.to_dict() == {**TEST_PERSON.to_dict(), 'none_relatives': 'x'}
+
+
+def test_site_records_round_trip():
+    frame = pd.DataFrame([
+        {'@id': '1', 'name': 'John Smith', 'address': [{'addressLocality': 'Los Angeles', 'addressRegion': 'CA'}]},
+        {'@id': '2', 'name': None, 'relatedTo': [{'name': 'Jane Smith'}, 'not a person']},
+    ]).set_index('@id')
+
+    records = SiteRecord.from_frame(frame)
+    assert [record.id for record in records] == ['1', '2']
+    assert records[0].first_address.addressRegion == 'CA'
+    assert records[1].name == '' and records[1].first_address.addressLocality == ''
+    assert records[1].related_to == ({'name': 'Jane Smith'},)
+
+    collector = AbstractCollector(TEST_PERSON, '', test=True)
+    collector.site_records = records
+    assert collector.data_from_website.index.name == '@id'
+    assert collector.data_from_website.equals(frame)
+
+
+def test_check_relatives_from_site_records(monkeypatch):
+    person = TEST_PERSON.copy()
+    person['checkRelatives'] = True
+    collector = AbstractCollector(person, '', test=True, interactive=True)
+    collector.site_records = [SiteRecord.from_dict({'@id': '1', 'relatedTo': [
+        {'@type': 'Person', 'name': 'jane ann smith'},
+        {'@type': 'Person', 'name': 'Jim Smith'},
+    ]})]
+    collector.ignore_people['relatives'] = [{'name': 'Jim Smith'}]
+    answers = {'Would you': 'y', 'State': 'ma', 'City': 'boston', 'Check relatives': 'n'}
+    monkeypatch.setattr(collector, '_ask', lambda prompt: next(a for q, a in answers.items() if q in prompt))
+
+    relatives = collector.check_relatives()
+    assert relatives.to_dict('records') == [{
+        'givenName': 'Jane', 'middleName': 'Ann', 'familyName': 'Smith', 'addressLocality': 'Boston',
+        'addressRegion': 'MA', 'checkRelatives': False, '@type': 'Person'}]
@@ -0,0 +1,72 @@
+import json
+
+import pandas as pd
+
+from collectors.abstract import AbstractCollector
+from collectors.index import RecordIndex
+from collectors import review as review_module
+from collectors.review import ReviewQueue, RELATIVE, DROP, apply_decisions, review
+from collectors.store import ResultsStore
+from tests import TEST_PERSON
+
+SITE_RECORDS = pd.DataFrame([
+    {'@id': '1', 'name': 'John Smith', 'address': [{'addressLocality': 'Los Angeles', 'addressRegion': 'CA'}],
+     'relatedTo': [{'name': 'Jane Smith'}]},
+    {'@id': '2', 'name': 'John Allen Smith', 'address': [{'addressLocality': 'Los Angeles', 'addressRegion': 'CA'}]},
+    {'@id': '3', 'name': 'Jane Doe', 'address': [{'addressLocality': 'Los Angeles', 'addressRegion': 'CA'}]},
+]).set_index('@id')
+
+
+def test_review_queue(tmp_path, monkeypatch):
+    people_file = str(tmp_path / 'names.csv')
+    person = TEST_PERSON.copy(deep=True)
+    person['middleName'] = ''
+    person['checkRelatives'] = True
+    person['ignore'] = json.dumps({'relatives': [{'name': "Pat O'Brien"}]})
+    pd.DataFrame([person]).to_csv(people_file)
+
+    queue = ReviewQueue(str(tmp_path / 'review.sqlite'))
+    store = ResultsStore(str(tmp_path / 'results'))
+    collector = AbstractCollector(person, '', test=True, interactive=False, review_queue=queue, results_store=store,
+                                  record_index=RecordIndex(str(tmp_path / 'index.sqlite')))
+    collector.data_from_website = SITE_RECORDS.copy(deep=True)
+
+    monkeypatch.setattr('builtins.input', lambda *args: _no_input())
+    collector.validate_data()
+    assert collector.check_relatives(pd.read_csv(people_file, index_col=0).fillna('')).empty
+    collector.save_results()
+    assert list(collector.data_from_website.index) == ['1', '2']
+    assert len(queue) == 2
+
+    answers = iter(['n', 'y', '', '', '', 'n'])
+    monkeypatch.setattr('builtins.input', lambda *args: next(answers))
+    people = review(queue, people_file, store)
+
+    assert list(store.read(sites=['AbstractCollector'], person=collector.person_key)['@id']) == ['1']
+    assert json.loads(people.at[0, 'ignore']) == {
+        'relatives': [{'name': "Pat O'Brien"}], 'searchResults': {'abstractcollector': ['2']}}
+    assert list(people['givenName']) == ['John', 'Jane']
+    assert len(queue) == 0 and len(queue.unapplied()) == 0
+
+
+def test_apply_decisions_without_a_middle_name_column(tmp_path):
+    people_file = str(tmp_path / 'names.csv')
+    pd.DataFrame([{'givenName': 'John', 'familyName': 'Smith', 'addressRegion': 'CA'}]).to_csv(people_file)
+
+    queue = ReviewQueue(str(tmp_path / 'review.sqlite'))
+    queue.push(RELATIVE, '', TEST_PERSON, 'Jane Smith', 'Is Jane Smith a relative?')
+    queue.decide(queue.undecided()[0]['id'], DROP)
+
+    people = apply_decisions(queue, people_file, ResultsStore(str(tmp_path / 'results')))
+    assert json.loads(people.at[0, 'ignore']) == {'relatives': [{'name': 'Jane Smith'}]}
+
+
+def test_main_people_file(monkeypatch):
+    reviewed = list()
+    monkeypatch.setattr(review_module, 'review', lambda people_file: reviewed.append(people_file))
+    review_module.main(['--people', 'other.csv'])
+    assert reviewed == ['other.csv']
+
+
+def _no_input():
+    raise AssertionError('A non interactive collector asked a question')
@@ -0,0 +1,133 @@
+import random
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from collectors.abstract import AbstractCollector
+from collectors.errors import SiteSchemaChange
+from collectors.index import RecordIndex
+from collectors.journal import Journal
+from collectors.scheduler import CollectionScheduler, merge_ignore
+
+PEOPLE = pd.DataFrame([
+    {'givenName': 'John', 'middleName': '', 'familyName': 'Smith', 'addressLocality': 'Los Angeles',
+     'addressRegion': 'CA', 'checkRelatives': True},
+    {'givenName': 'Jane', 'middleName': '', 'familyName': 'Doe', 'addressLocality': 'Boston',
+     'addressRegion': 'MA', 'checkRelatives': False},
+])
+
+
+class FakeCollector(AbstractCollector):
+    """Stands in for a real Collector: waits a random time, ignores one record and finds one relative."""
+    running = 0
+    most_running = 0
+    lock = threading.Lock()
+
+    def __init__(self, person, **kwargs):
+        super(FakeCollector, self).__init__(person, 'http://localhost/', test=True, **kwargs)
+
+    def __enter__(self):
+        with self.lock:
+            type(self).running += 1
+            type(self).most_running = max(type(self).most_running, type(self).running)
+        time.sleep(random.uniform(0, 0.02))
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        with self.lock:
+            type(self).running -= 1
+
+    def validate_data(self):
+        self.ignore_people.setdefault('searchResults', dict())[self.site.lower()] = [self.person.givenName]
+        return self.person
+
+    def check_relatives(self, people=None):
+        if not self.person.get('checkRelatives', False):
+            return False
+        return pd.DataFrame([{
+            'givenName': 'Relative', 'middleName': '', 'familyName': self.site, 'addressLocality': '',
+            'addressRegion': '', 'checkRelatives': False,
+        }])
+
+
+class FakeSpokeo(FakeCollector):
+    pass
+
+
+class FakeRadaris(FakeCollector):
+    pass
+
+
+def test_merge_ignore():
+    merged = merge_ignore(
+        {'searchResults': {'spokeo': ['1']}, 'relatives': [{'name': 'A'}]},
+        {'searchResults': {'spokeo': ['1', '2'], 'radaris': ['3']}, 'relatives': [{'name': 'A'}, {'name': 'B'}]},
+    )
+    assert merged == {
+        'searchResults': {'spokeo': ['1', '2'], 'radaris': ['3']},
+        'relatives': [{'name': 'A'}, {'name': 'B'}],
+    }
+
+
+def test_scheduler_is_deterministic():
+    results = list()
+    for _ in range(3):
+        people = CollectionScheduler(PEOPLE, collectors=(FakeSpokeo, FakeRadaris), workers=4).run()
+        results.append(people)
+
+    people = results[0]
+    assert list(people['familyName']) == ['Smith', 'Doe', 'FakeSpokeo', 'FakeRadaris']
+    assert people.at[0, 'ignore'] == {'searchResults': {'fakespokeo': ['John'], 'fakeradaris': ['John']}}
+    for other in results[1:]:
+        pd.testing.assert_frame_equal(people, other)
+
+
+def test_scheduler_site_limits():
+    people = pd.concat([PEOPLE] * 10, ignore_index=True)
+    people['checkRelatives'] = False
+    FakeSpokeo.most_running = 0
+    CollectionScheduler(people, collectors=(FakeSpokeo,), workers=8, site_limits={'FakeSpokeo': 3}).run()
+    assert 1 < FakeSpokeo.most_running <= 3
+
+
+class FailingRadaris(FakeRadaris):
+    """FakeRadaris that breaks on the second person, like a site schema change part way through a batch."""
+    fail = True
+    runs = 0
+
+    def validate_data(self):
+        type(self).runs += 1
+        if self.fail and self.person.familyName == 'Doe':
+            raise SiteSchemaChange('FailingRadaris has changed it schema.')
+        return super(FailingRadaris, self).validate_data()
+
+
+def test_scheduler_resumes_from_journal(tmp_path):
+    collectors = (FakeSpokeo, FailingRadaris)
+    journal = Journal(str(tmp_path / 'journal.jsonl'))
+    with pytest.raises(SiteSchemaChange):
+        CollectionScheduler(PEOPLE, collectors=collectors, workers=1, journal=journal).run()
+    assert ('john||smith|ca', 'FailingRadaris') in journal.completed()
+
+    FailingRadaris.fail, FailingRadaris.runs = False, 0
+    people = CollectionScheduler(journal.replay(PEOPLE), collectors=collectors, workers=1, journal=journal).run()
+    journal.close()
+    assert FailingRadaris.runs == 3  # Doe and the two relatives, but not Smith again
+
+    uninterrupted = CollectionScheduler(PEOPLE, collectors=collectors, workers=1).run()
+    pd.testing.assert_frame_equal(people, uninterrupted)
+
+
+def test_scheduler_skips_sites_collected_since(tmp_path, monkeypatch):
+    index = RecordIndex(str(tmp_path / 'index.sqlite'))
+    index.update('FakeSpokeo', pd.DataFrame([{'@id': '1', 'name': 'John Smith'}]).set_index('@id'), 'Smith_John')
+
+    monkeypatch.setattr(FailingRadaris, 'fail', False)
+    FailingRadaris.runs = 0
+    people = CollectionScheduler(PEOPLE.assign(checkRelatives=False), collectors=(FakeSpokeo, FailingRadaris),
+                                 workers=1, since='2000-01-01', record_index=index).run()
+    assert people.at[0, 'ignore'] == {'searchResults': {'failingradaris': ['John']}}
+    assert people.at[1, 'ignore'] == {'searchResults': {'fakespokeo': ['Jane'], 'failingradaris': ['Jane']}}
+    assert FailingRadaris.runs == 2
@@ -0,0 +1,38 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from threading import Thread
+
+from collectors.session import CollectorSession
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    clients = set()
+
+    def do_HEAD(self):
+        self.clients.add(self.client_address)
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+
+    def do_GET(self):
+        self.do_HEAD()
+        self.wfile.write(b'ok')
+
+    def log_message(self, *args):
+        pass
+
+
+def test_session_reuses_connections():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_port}/'
+    try:
+        session = CollectorSession(timeout=2)
+        session.preconnect([url])
+        for _ in range(5):
+            with session.get(url) as res:
+                assert res.text == 'ok'
+        assert len(_Handler.clients) == 1
+    finally:
+        server.shutdown()
+        server.server_close()
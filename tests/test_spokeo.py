@@ -0,0 +1,20 @@
+from benchmarks.spokeo import synthetic_people, legacy_normalize_people
+from collectors import Spokeo
+
+
+def test_normalize_people_matches_per_record_version():
+    people = synthetic_people(200)
+    assert Spokeo._normalize_people(people).to_dict('records') == legacy_normalize_people(people).to_dict('records')
+
+
+def test_normalize_people_reorders_cities():
+    people = synthetic_people(3)
+    people[0]['top_city_states_best_match_index'] = 9
+    people[1]['top_city_states'] = list()
+    people[2]['top_city_states_best_match_index'] = len(people[2]['top_city_states']) - 1
+    search_results = Spokeo._normalize_people(people)
+
+    assert search_results.at[0, 'address'][0]['addressLocality'] == people[0]['top_city_states'][0]['city']
+    assert search_results.at[1, 'geo'] == list() and search_results.at[1, 'address'] == list()
+    assert search_results.at[2, 'address'][0]['addressLocality'] == people[2]['top_city_states'][-1]['city']
+    assert len(search_results.at[2, 'geo']) == len(people[2]['top_city_states'])
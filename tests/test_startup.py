@@ -0,0 +1,11 @@
+from benchmarks.startup import time_import
+
+
+def test_light_imports():
+    for module in ['definitions', 'collectors', 'collectors.metrics']:
+        assert time_import(module)[1] == [], module
+
+
+def test_sites_load_what_they_use():
+    assert 'selenium' not in time_import('collectors.spokeo')[1]
+    assert 'pyautogui' not in time_import('removers.main')[1]
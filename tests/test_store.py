@@ -0,0 +1,40 @@
+import pandas as pd
+import pytest
+
+from collectors.store import ResultsStore, FORMATS, pa
+
+RECORDS = pd.DataFrame([
+    {'@id': '1', 'name': 'John Smith', 'age': 42,
+     'address': [{'@type': 'PostalAddress', 'addressLocality': 'Los Angeles', 'addressRegion': 'CA'}],
+     'relatedTo': [{'name': 'Jane Smith'}]},
+    {'@id': '2', 'name': 'John Allen Smith', 'age': None,
+     'address': [{'@type': 'PostalAddress', 'addressLocality': 'Pasadena', 'addressRegion': 'CA'}],
+     'relatedTo': list()},
+]).set_index('@id')
+
+
+@pytest.mark.parametrize('file_format', FORMATS)
+def test_results_store(tmp_path, file_format):
+    if file_format == 'parquet' and pa is None:
+        pytest.skip('pyarrow is not installed')
+    store = ResultsStore(str(tmp_path), file_format=file_format)
+
+    store.append('Spokeo', RECORDS, person='Smith_John', date='2020-04-01')
+    store.append('Spokeo', RECORDS.loc[['2']], person='Smith_John', date='2020-04-02')
+    store.append('Radaris', RECORDS, person='Smith_John', date='2020-04-02')
+    store.append('Spokeo', RECORDS, person='Doe_Jane', date='2020-04-02')
+
+    records = store.read(sites=['Spokeo'], person='Smith_John')
+    assert list(records['@id']) == ['1', '2', '2']
+    assert records.at[0, 'address'][0]['addressLocality'] == 'Los Angeles'
+    assert records.at[0, 'relatedTo'] == [{'name': 'Jane Smith'}]
+
+    records = store.read(since='2020-04-02', columns=['name'])
+    assert list(records.columns) == ['@id', 'name', 'site', 'date']
+    assert sorted(records['site']) == ['Radaris', 'Radaris', 'Spokeo', 'Spokeo', 'Spokeo']
+
+    store.drop('Spokeo', ['2'], person='Smith_John')
+    store.update('Spokeo', pd.DataFrame({'opted_out': [True]}, index=pd.Index(['1'], name='@id')), 'Smith_John')
+    records = store.read(sites=['Spokeo'], columns=['opted_out', 'person'])
+    assert list(zip(records['@id'], records['person'], records['opted_out'].fillna(False))) == [
+        ('1', 'Smith_John', True), ('1', 'Doe_Jane', False), ('2', 'Doe_Jane', False)]
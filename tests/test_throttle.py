@@ -0,0 +1,105 @@
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from threading import Thread
+
+import pytest
+
+from collectors.errors import Throttled
+from collectors.session import CollectorSession
+from collectors.throttle import RateLimiter, TokenBucket, parse_retry_after
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Answers 429 with a Retry-After (or a 200 block page) to the first `throttle` requests, then 200."""
+    throttle = 0
+    block = False
+    requests = 0
+
+    def do_GET(self):
+        _Handler.requests += 1
+        if _Handler.requests <= _Handler.throttle and _Handler.block:
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Content-Length', '7')
+            self.end_headers()
+            self.wfile.write(b'captcha')
+            return
+        if _Handler.requests <= _Handler.throttle:
+            self.send_response(429)
+            self.send_header('Retry-After', '0')
+            self.send_header('Content-Length', '0')
+        else:
+            self.send_response(200)
+            self.send_header('Content-Length', '2')
+        self.end_headers()
+        if _Handler.requests > _Handler.throttle:
+            self.wfile.write(b'ok')
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    _Handler.throttle, _Handler.block, _Handler.requests = 0, False, 0
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{httpd.server_port}/'
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('120') == 120
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0
+    assert parse_retry_after('soon') is None
+    assert parse_retry_after(None) is None
+
+
+def test_bucket_paces_requests():
+    bucket = TokenBucket('example.com', rate=20, burst=2, increase=0)
+    start = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    # 2 requests go out in the burst, the other 4 at 20 per second.
+    assert 0.15 <= time.monotonic() - start < 1
+
+
+def test_session_retries_throttled_requests(server):
+    _Handler.throttle = 2
+    limiter = RateLimiter(hosts={'127.0.0.1': {'rate': 100, 'burst': 1, 'max_rate': 100}})
+    session = CollectorSession(timeout=2, rate_limiter=limiter)
+
+    with session.get(server) as res:
+        assert res.text == 'ok'
+    assert _Handler.requests == 3
+    assert limiter.bucket(server).rate == pytest.approx(100 * 0.5 * 0.5 + 0.05)
+
+
+def test_session_gives_up(server):
+    _Handler.throttle = 10
+    limiter = RateLimiter(hosts={'127.0.0.1': {'rate': 100}}, max_retries=2)
+    session = CollectorSession(timeout=2, rate_limiter=limiter)
+
+    with pytest.raises(Throttled):
+        session.get(server)
+    assert _Handler.requests == 3
+
+
+def test_session_backs_off_block_pages(server):
+    _Handler.throttle, _Handler.block = 1, True
+    limiter = RateLimiter(hosts={'127.0.0.1': {'rate': 100, 'burst': 1, 'max_rate': 100, 'cooldown': 0}},
+                          block_markers=['captcha'])
+    session = CollectorSession(timeout=2, rate_limiter=limiter)
+
+    with session.get(server) as res:
+        assert res.text == 'ok'
+    assert _Handler.requests == 2
+    assert limiter.bucket(server).rate < 100
+
+
+def test_unlisted_hosts_are_not_limited(server):
+    _Handler.throttle = 1
+    session = CollectorSession(timeout=2, rate_limiter=RateLimiter(hosts=dict()))
+    with session.get(server) as res:
+        assert res.status_code == 429
@@ -0,0 +1,19 @@
+from benchmarks.validate import synthetic_records, legacy_classify
+from collectors.abstract import AbstractCollector
+from collectors.abstract.main import MATCH_AKA, MISMATCH_LOCALITY
+from tests import TEST_PERSON
+
+
+def test_classify_records_matches_per_record_check():
+    person = TEST_PERSON.copy(deep=True)
+    person['middleName'] = 'Trevor'
+    site_records = synthetic_records(500)
+    collector = AbstractCollector(person, '', test=True)
+
+    checks = collector._classify_records(site_records)['check']
+    assert checks.equals(legacy_classify(person, site_records))
+    assert all(
+        check == collector._site_record_matches_person(site_record)
+        for check, (_, site_record) in zip(checks, site_records.iterrows())
+    )
+    assert {MATCH_AKA, MISMATCH_LOCALITY} <= set(checks)